@@ -0,0 +1,139 @@
+# background.py
+# Named tasks run one after the other on a background thread, so that results are
+# prepared while the user reads a menu and handed over as soon as they are needed.
+import queue
+import threading
+from concurrent.futures import CancelledError, Future
+from time import perf_counter
+
+
+class BackgroundTasks:
+    """
+    Queue of named tasks executed in submission order by a daemon thread.
+
+    A thread rather than a worker process is used because the tasks fill the
+    in-process memo stores (distance matrices, cluster sweeps, embeddings) that
+    the menu handlers read afterwards. Later tasks may use the results of
+    earlier ones through `result`. Cancelling drops the tasks not yet started
+    and stops the worker after its current task; `join` waits for that, and
+    tasks with several stages can check `cancelled` between them. Since the
+    thread is a daemon, a task left running never delays the exit of the program.
+
+    Args:
+        name (str): Name of the worker thread.
+    """
+
+    def __init__(self, name="background"):
+        self.name = name
+        self._futures = {}
+        self._seconds = {}
+        self._queue = queue.SimpleQueue()
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Queue `func(*args, **kwargs)` under a name and start the worker if needed.
+
+        Returns:
+            Future: Future of the task's result.
+        """
+        if self._cancelled.is_set():
+            raise RuntimeError("Cannot submit tasks after cancel().")
+        future = Future()
+        self._futures[name] = future
+        self._queue.put((name, future, func, args, kwargs))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name=self.name, daemon=True)
+            self._thread.start()
+        return future
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None or self._cancelled.is_set():
+                return
+            name, future, func, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            self._seconds[name] = perf_counter() - start
+
+    @property
+    def cancelled(self):
+        """Event set by `cancel`."""
+        return self._cancelled
+
+    def __contains__(self, name):
+        return name in self._futures
+
+    def result(self, name, timeout=None):
+        """
+        Return the result of a task, waiting for it if it is still queued or running.
+
+        Raises:
+            Exception: Whatever the task raised, or CancelledError if it was cancelled.
+        """
+        return self._futures[name].result(timeout)
+
+    def wait(self, names=None, timeout=None):
+        """
+        Wait until tasks have finished, without raising their errors.
+
+        Handlers call this before recomputing a value the background is already
+        working on, so the work is not done twice; a failed task is simply
+        recomputed (and its error reported) by the handler.
+
+        Args:
+            names (iterable of str): Tasks to wait for (all by default; unknown names are ignored).
+            timeout (float): Maximum seconds to wait for each task.
+        """
+        for name in self._futures if names is None else names:
+            future = self._futures.get(name)
+            if future is None:
+                continue
+            try:
+                future.exception(timeout)
+            except CancelledError:
+                pass
+
+    def done(self, name):
+        """Whether a task has finished successfully."""
+        future = self._futures.get(name)
+        return future is not None and future.done() and not future.cancelled() and future.exception() is None
+
+    def pending(self):
+        """Names of the tasks that are queued or running."""
+        return [name for name, future in self._futures.items() if not future.done()]
+
+    def timings(self):
+        """Seconds spent per finished task."""
+        return dict(self._seconds)
+
+    def cancel(self):
+        """Drop the queued tasks and stop the worker after its current task."""
+        self._cancelled.set()
+        for future in self._futures.values():
+            future.cancel()
+        self._queue.put(None)
+
+    def join(self, timeout=None):
+        """Wait until the worker has stopped (after `cancel`, once its current task is done)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cancel()
+        return False
+
+    def __repr__(self):
+        return f"BackgroundTasks(tasks={len(self._futures)}, pending={len(self.pending())})"
@@ -0,0 +1,323 @@
+# batch.py
+import contextlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+from dataset import DEFAULT_DATASETS
+from embeddings import MDS_ENGINES
+from metrics import DEFAULT_METRIC, METRICS, metric_title
+from render import flush_figures
+from scheduler import Job, run_jobs
+
+# Analyses a job file can request, mapped to the datasets they need
+ANALYSES = (
+    "network",
+    "clusters_mds",
+    "clusters_tsne",
+    "country_boxplot",
+    "all_boxplot",
+    "compare_boxplot",
+    "extremes",
+    "export",
+)
+# Former analysis names, still accepted in job files
+ANALYSIS_ALIASES = {"kmeans_mds": "clusters_mds", "kmeans_tsne": "clusters_tsne"}
+
+
+def load_job(path):
+    """
+    Read a batch job specification from a JSON or YAML file.
+
+    Example (JSON):
+        {
+            "datasets": {"hofstede": {"path": "data/hofstede_data.json", "title": "Hofstede Data"}},
+            "highlights": {"core": ["Germany", "Japan"], "core_pairs": [["Germany", "Japan"]]},
+            "analyses": [
+                {"type": "network", "dataset": "hofstede", "highlight": "core", "engine": "cmds"},
+                {"type": "all_boxplot", "dataset": "hofstede", "highlight": "core_pairs"},
+                {"type": "export", "dataset": "hofstede", "formats": ["csv", "npy"]}
+            ],
+            "workers": 4,
+            "missing": "pairwise",
+            "metric": "seuclidean"
+        }
+
+    `datasets` defaults to both bundled datasets. Highlights may be given inline
+    instead of by name. The MDS steps accept an `engine` (see `embeddings.MDS_ENGINES`);
+    the clustering steps (`clusters_mds`, `clusters_tsne`; formerly `kmeans_mds`,
+    `kmeans_tsne`) run K-Means with `n_clusters` (4 by default), or accept
+    `"n_clusters": "auto"` to use the best method and k of a k-medoids/agglomerative
+    sweep. Their default titles name the method and k used.
+    `metric` selects the distance metric of all steps (see `metrics.METRICS`).
+    `compare_boxplot` steps also report the correlation of both matrices with
+    Mantel p-values (`permutations`, see `compare.compare_frameworks`).
+
+    Args:
+        path (str): Path of the job file.
+
+    Returns:
+        dict: The job specification.
+    """
+    path = Path(path)
+    with open(path, "r") as f:
+        if path.suffix in (".yaml", ".yml"):
+            import yaml
+            job = yaml.safe_load(f)
+        else:
+            job = json.load(f)
+    if not isinstance(job, dict) or not job.get("analyses"):
+        raise ValueError(f"Job file '{path}' does not list any analyses.")
+    from functions import MISSING_STRATEGIES
+    datasets = job.get("datasets", DEFAULT_DATASETS)
+    highlights = job.get("highlights", {})
+    if job.get("metric", DEFAULT_METRIC) not in METRICS:
+        raise ValueError(f"Unknown metric '{job['metric']}'. Choose from {', '.join(METRICS)}.")
+    if job.get("missing", "drop") not in MISSING_STRATEGIES:
+        raise ValueError(f"Unknown missing-value strategy '{job['missing']}'. Choose from {', '.join(MISSING_STRATEGIES)}.")
+    if job.get("missing", "drop") == "pairwise" and job.get("metric", DEFAULT_METRIC) != "seuclidean":
+        raise ValueError("The 'pairwise' missing-value strategy is only available with the 'seuclidean' metric.")
+    for step in job["analyses"]:
+        if step.get("type") in ANALYSIS_ALIASES:
+            step["type"] = ANALYSIS_ALIASES[step["type"]]
+        if step.get("type") not in ANALYSES:
+            raise ValueError(f"Unknown analysis type '{step.get('type')}'. Choose from {', '.join(ANALYSES)}.")
+        key = "datasets" if step["type"] == "compare_boxplot" else "dataset"
+        if key not in step:
+            raise ValueError(f"Analysis '{step['type']}' needs a '{key}'")
+        for name in _step_datasets(step):
+            if name not in datasets:
+                raise ValueError(f"Analysis '{step['type']}' refers to unknown dataset '{name}'.")
+        if step.get("engine", "mds") not in MDS_ENGINES:
+            raise ValueError(f"Unknown MDS engine '{step['engine']}'. Choose from {', '.join(MDS_ENGINES)}.")
+        if isinstance(step.get("highlight"), str) and step["highlight"] not in highlights:
+            raise ValueError(f"Analysis '{step['type']}' refers to unknown highlight set '{step['highlight']}'.")
+    return job
+
+
+def _step_datasets(step):
+    return step["datasets"] if step["type"] == "compare_boxplot" else [step["dataset"]]
+
+
+def _resolve_highlight(step, highlights):
+    highlight = step.get("highlight", [])
+    if isinstance(highlight, str):
+        highlight = highlights[highlight]
+    return highlight
+
+
+def execute_step(step, matrices, titles, highlights, show=False):
+    """
+    Run one analysis step on precomputed distance matrices.
+
+    Args:
+        step (dict): Step specification from the job file.
+        matrices (dict): Distance matrices needed by the step, keyed by dataset name.
+        titles (dict): Dataset titles keyed by dataset name.
+        highlights (dict): Named highlight sets.
+        show (bool): Whether to display figures.
+
+    Returns:
+        dict: Step result with the written outputs and any computed values.
+    """
+    from functions import (
+        visualize_country_network,
+        plot_clusters_with_highlight_MDS,
+        plot_clusters_with_highlight_t_SNE,
+        plot_country_distance_boxplot_with_highlight,
+        plot_all_distance_boxplot_with_highlight,
+        plot_two_distance_boxplots_with_highlight,
+        find_extreme_pairs,
+    )
+    from distance_io import export_distances
+
+    kind = step["type"]
+    highlight = _resolve_highlight(step, highlights)
+    names = _step_datasets(step)
+    matrix, title = matrices[names[0]], titles[names[0]]
+    result = {"outputs": []}
+
+    if kind == "network":
+        plot_title = step.get("title", f"{title} - Network Graph")
+        visualize_country_network(
+            matrix, highlight or None, title=plot_title, show=show, engine=step.get("engine", "mds"),
+            mode=step.get("mode", "complete"), k=step.get("k", 3), threshold=step.get("threshold"),
+        )
+        result["outputs"].append(f"figures/{plot_title}.png")
+    elif kind == "clusters_mds":
+        clusters, label = _clustering(step, matrix, result)
+        plot_title = step.get("title", f"{title} - {label} Clustering (MDS)")
+        plot_clusters_with_highlight_MDS(
+            matrix, highlight, title=plot_title, show=show, engine=step.get("engine", "mds"), **clusters,
+        )
+        result["outputs"].append(f"figures/{plot_title}.png")
+    elif kind == "clusters_tsne":
+        clusters, label = _clustering(step, matrix, result)
+        plot_title = step.get("title", f"{title} - {label} Clustering (t-SNE)")
+        plot_clusters_with_highlight_t_SNE(matrix, highlight, title=plot_title, show=show, **clusters)
+        result["outputs"].append(f"figures/{plot_title}.png")
+    elif kind == "country_boxplot":
+        if step["country"] not in matrix:
+            raise ValueError(f"Country '{step['country']}' not found in the dataset.")
+        plot_title = step.get("title", title)
+        plot_country_distance_boxplot_with_highlight(matrix, step["country"], highlight, title=plot_title, show=show)
+        result["outputs"].append(f"figures/{plot_title} - {step['country']}_distance_boxplot_styled.png")
+    elif kind == "all_boxplot":
+        plot_title = step.get("title", f"{title} - Boxplot with Highlights")
+        pairs = [tuple(pair) for pair in highlight]
+        plot_all_distance_boxplot_with_highlight(matrix, highlighted_pairs=pairs, title=plot_title, show=show)
+        result["outputs"].append(f"figures/{plot_title.replace(' ', '_').lower()}_styled.png")
+    elif kind == "compare_boxplot":
+        plot_title = step.get("title", "Both frameworks - Boxplot with Highlights")
+        pairs = [tuple(pair) for pair in highlight]
+        plot_two_distance_boxplots_with_highlight(
+            matrix, matrices[names[1]], highlight_pairs=pairs,
+            labels=(titles[names[0]], titles[names[1]]), title=plot_title, show=show,
+        )
+        result["outputs"].append(f"{plot_title.replace(' ', '_').lower()}.png")
+        from compare import MANTEL_PERMUTATIONS, compare_frameworks
+        result["comparison"] = compare_frameworks(
+            matrix, matrices[names[1]], permutations=step.get("permutations", MANTEL_PERMUTATIONS), max_workers=0,
+        )
+    elif kind == "extremes":
+        closest, farthest, stats = find_extreme_pairs(matrix, k=step.get("k", 5))
+        result["closest"] = closest.to_dict(orient="records")
+        result["farthest"] = farthest.to_dict(orient="records")
+        result["stats"] = {key: float(value) for key, value in stats.items()}
+    elif kind == "export":
+        for fmt in step.get("formats", ["csv"]):
+            filename = export_distances(matrix, title, fmt=fmt)
+            if filename is None:
+                raise RuntimeError(f"Export to {fmt} failed.")
+            result["outputs"].append(f"data/{filename}")
+    return result
+
+
+def _clustering(step, matrix, result):
+    # "n_clusters": "auto" picks the best labelling of a k sweep instead of K-Means
+    from clustering import clustering_label, sweep_clusters
+    if step.get("n_clusters") != "auto":
+        k = step.get("n_clusters", 4)
+        result.update({"method": "kmeans", "k": k})
+        return {"n_clusters": k}, clustering_label("kmeans", k)
+    sweep = sweep_clusters(matrix, max_workers=0)
+    result.update({"method": sweep.best_method, "k": sweep.best_k, "silhouette": sweep.best_score})
+    return {"cluster_labels": sweep.best_labels}, clustering_label(sweep.best_method, sweep.best_k)
+
+
+def _timed_step(index, step, matrices, titles, highlights, show):
+    start = perf_counter()
+    # Keep the plotting functions' console output out of the JSON summary on stdout
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            result = execute_step(step, matrices, titles, highlights, show)
+        result["status"] = "ok"
+    except Exception as e:
+        result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+    result["log"] = log.getvalue()
+    result.update({"index": index, "type": step["type"], "datasets": _step_datasets(step), "seconds": perf_counter() - start})
+    return result
+
+
+def run_batch(job, show=False):
+    """
+    Run all analyses of a batch job in one process pool.
+
+    Distance matrices are computed once per dataset in the parent process and
+    shared with every step; the independent steps are then fanned out to worker
+    processes by `scheduler.run_jobs` (or run in-process when `workers` is 1 or
+    figures are shown). Steps using a dataset that cannot be loaded fail
+    without being run; the other steps are not affected.
+
+    Args:
+        job (dict): Job specification, see `load_job`.
+        show (bool): Whether to display figures (forces in-process execution).
+
+    Returns:
+        dict: Machine-readable summary of the run.
+    """
+    from functions import calculate_distances
+    from dataset import load_dataset
+
+    start = perf_counter()
+    if not show:
+        # Worker processes inherit the non-GUI backend
+        os.environ["MPLBACKEND"] = "Agg"
+
+    datasets = job.get("datasets", DEFAULT_DATASETS)
+    highlights = job.get("highlights", {})
+    steps = job["analyses"]
+    needed = {name for step in steps for name in _step_datasets(step)}
+
+    metric = job.get("metric", DEFAULT_METRIC)
+    titles, matrices, load_errors = {}, {}, {}
+    for name in sorted(needed):
+        spec = datasets[name]
+        titles[name] = metric_title(spec.get("title", name), metric)
+        try:
+            matrices[name] = calculate_distances(load_dataset(spec["path"]), metric, missing=job.get("missing", "drop"))
+        except (OSError, ValueError) as e:
+            load_errors[name] = f"{type(e).__name__}: {e}"
+
+    def step_args(index, step):
+        used = _step_datasets(step)
+        return (index, step, {n: matrices[n] for n in used}, titles, highlights, show)
+
+    workers = job.get("workers")
+    if show or workers == 1 or len(steps) == 1:
+        workers = 0
+    results = [None] * len(steps)
+    runnable = []
+    for i, step in enumerate(steps):
+        unavailable = [name for name in _step_datasets(step) if name in load_errors]
+        if unavailable:
+            error = "; ".join(f"Dataset '{name}' could not be loaded: {load_errors[name]}" for name in unavailable)
+            results[i] = {"status": "failed", "error": error, "log": "", "index": i, "type": step["type"], "datasets": _step_datasets(step), "seconds": 0.0}
+        else:
+            runnable.append(i)
+    jobs = [Job(steps[i]["type"], _timed_step, step_args(i, steps[i])) for i in runnable]
+    for i, (result, error, seconds) in zip(runnable, run_jobs(jobs, max_workers=workers)):
+        results[i] = result
+    # The summary lists the figure files, so they must exist when it is printed
+    flush_figures()
+
+    failed = sum(result["status"] != "ok" for result in results)
+    return {
+        "status": "ok" if not failed else "failed",
+        "steps": results,
+        "failed": failed,
+        "seconds": perf_counter() - start,
+    }
+
+
+def run_batch_file(path, show=False, summary_path=None):
+    """
+    Run a batch job file and print its summary as JSON.
+
+    Args:
+        path (str): Path of the job file.
+        show (bool): Whether to display figures.
+        summary_path (str): Optional file to write the summary to (defaults to the job's `summary` entry).
+
+    Returns:
+        int: Process exit code, 0 if every step succeeded.
+    """
+    try:
+        job = load_job(path)
+    except (OSError, ValueError, ImportError) as e:
+        summary = {"status": "failed", "error": f"{type(e).__name__}: {e}", "steps": []}
+        job = {}
+    else:
+        summary = run_batch(job, show=show)
+
+    output = json.dumps(summary, indent=2, default=str)
+    summary_path = summary_path or job.get("summary")
+    if summary_path:
+        with open(summary_path, "w") as f:
+            f.write(output)
+    print(output, file=sys.stdout)
+    return 0 if summary["status"] == "ok" else 1
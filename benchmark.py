@@ -0,0 +1,371 @@
+# benchmark.py
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+
+def synthetic_data(n_entities, n_dimensions=6, seed=42, missing=0.0):
+    """Generate records in the project's dataset format with random 0-100 scores (and a share of -1 missing values)."""
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 101, size=(n_entities, n_dimensions))
+    scores[rng.random(scores.shape) < missing] = -1
+    dimensions = [f"dim{k}" for k in range(n_dimensions)]
+    return [
+        {"id": i, "name": f"Entity {i}", "scores": dict(zip(dimensions, map(int, row)))}
+        for i, row in enumerate(scores)
+    ]
+
+
+def benchmark_tiled(args):
+    """Compare the tiled process-pool engine with the single `pdist` call."""
+    from scipy.spatial.distance import pdist
+    from functions import prepare_scores, calculate_scaled_euclidean_distances_tiled
+
+    data = synthetic_data(args.entities, args.dimensions)
+    countries, scores, variances = prepare_scores(data)
+
+    start = perf_counter()
+    reference = pdist(scores, metric="seuclidean", V=variances)
+    pdist_time = perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = perf_counter()
+        tiled = calculate_scaled_euclidean_distances_tiled(
+            data, Path(tmp) / "distances", tile_size=args.tile_size, max_workers=args.workers
+        )
+        tiled_time = perf_counter() - start
+        identical = np.array_equal(reference, tiled.condensed)
+        del tiled
+
+    print(f"pdist: {pdist_time:.3f}s  tiled: {tiled_time:.3f}s  identical: {identical}")
+    return identical
+
+
+def benchmark_startup(args):
+    """
+    Measure the time a fresh interpreter needs to reach the main menu.
+
+    This covers importing `main` (and with it `terminal` and `functions`) and
+    loading the datasets, i.e. everything `python main.py -t` does before the
+    menu is rendered. Fails if the median exceeds the time budget.
+    """
+    script = "import main; main.load_datasets()"
+    timings = []
+    for _ in range(args.runs):
+        start = perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True)
+        timings.append(perf_counter() - start)
+
+    median = statistics.median(timings)
+    within_budget = median <= args.budget
+    print(f"startup median: {median:.3f}s  (min {min(timings):.3f}s, budget {args.budget:.3f}s)  ok: {within_budget}")
+    return within_budget
+
+
+def benchmark_mds(args):
+    """
+    Compare the MDS engines on accuracy and time.
+
+    Accuracy is reported as Kruskal's stress-1 against the input distances and
+    as the Procrustes disparity to the current SMACOF layout ("mds"). Fails if
+    an engine's stress exceeds the allowed multiple of the SMACOF stress.
+    """
+    from scipy.spatial import procrustes
+    from scipy.spatial.distance import pdist
+    from embeddings import EMBEDDING_DEFAULTS, MDS_ENGINES, fit_embedding
+    from functions import calculate_scaled_euclidean_distances
+
+    data = synthetic_data(args.entities, args.dimensions)
+    distance_matrix = calculate_scaled_euclidean_distances(data, use_cache=False)
+    engines = args.engines or MDS_ENGINES
+
+    reference = reference_stress = None
+    ok = True
+    print(f"{'engine':<12} {'time':>9} {'stress-1':>9} {'disparity':>10}")
+    for engine in ["mds"] + [engine for engine in engines if engine != "mds"]:
+        params = dict(EMBEDDING_DEFAULTS[engine])
+        if engine == "lmds":
+            params["n_landmarks"] = args.landmarks
+        start = perf_counter()
+        coordinates = fit_embedding(distance_matrix, engine, params)
+        elapsed = perf_counter() - start
+
+        embedded = pdist(coordinates)
+        stress = np.sqrt(np.sum((embedded - distance_matrix.condensed) ** 2) / np.sum(distance_matrix.condensed ** 2))
+        if reference is None:
+            reference, reference_stress = coordinates, stress
+        disparity = procrustes(reference, coordinates)[2]
+        ok &= stress <= args.max_stress_ratio * reference_stress
+        print(f"{engine:<12} {elapsed:>8.3f}s {stress:>9.4f} {disparity:>10.4f}")
+    return ok
+
+
+def benchmark_masked(args):
+    """
+    Compare the pairwise-complete masked kernel with the `pdist` path.
+
+    On complete data both must agree to rounding and the kernel may be at most
+    `--max-slowdown` times slower. With missing values the masked kernel keeps
+    every dimension, while `pdist` only sees the dimensions left after dropping
+    incomplete ones (often none), so only the times are reported.
+    """
+    from functions import calculate_scaled_euclidean_distances, prepare_scores
+
+    ok = True
+    for missing in (0.0, args.missing):
+        data = synthetic_data(args.entities, args.dimensions, missing=missing)
+        timings = {}
+        results = {}
+        for strategy in ("drop", "pairwise"):
+            start = perf_counter()
+            results[strategy] = calculate_scaled_euclidean_distances(data, use_cache=False, missing=strategy)
+            timings[strategy] = perf_counter() - start
+        line = f"missing {missing:.0%}: pdist {timings['drop']:.3f}s  masked {timings['pairwise']:.3f}s"
+        if missing == 0.0:
+            deviation = np.nanmax(np.abs(results["drop"].condensed - results["pairwise"].condensed))
+            ok &= deviation < 1e-9 and timings["pairwise"] <= args.max_slowdown * timings["drop"]
+            line += f"  max deviation {deviation:.2e}"
+        else:
+            kept = prepare_scores(data)[1].shape[1]
+            line += f"  (pdist keeps {kept} of {args.dimensions} dimensions)"
+        print(line)
+    return ok
+
+
+def benchmark_metrics(args):
+    """
+    Time every registered metric through `calculate_distance_set` against
+    independent `pdist` calls and check that both agree.
+    """
+    from scipy.spatial.distance import pdist
+    import functions
+    from functions import calculate_distance_set, prepare_scores
+    from metrics import METRICS
+
+    def separate_calls(data):
+        _, scores, variances = prepare_scores(data)
+        return {
+            "seuclidean": pdist(scores, "seuclidean", V=variances),
+            "kogut_singh": pdist(scores, "seuclidean", V=variances) ** 2 / scores.shape[1],
+            "mahalanobis": pdist(scores, "mahalanobis", VI=np.linalg.inv(np.cov(scores, rowvar=False))),
+            "cosine": pdist(scores, "cosine"),
+        }
+
+    data = synthetic_data(args.entities, args.dimensions)
+    # One untimed pass of each side imports pandas and scipy before timing either
+    calculate_distance_set(data, use_cache=False)
+    separate_calls(data)
+    # The timed registry run prepares the scores again, as the separate calls do
+    functions._prepared.clear()
+
+    start = perf_counter()
+    results = calculate_distance_set(data, use_cache=False)
+    shared = perf_counter() - start
+
+    start = perf_counter()
+    references = separate_calls(data)
+    separate = perf_counter() - start
+
+    ok = True
+    for metric in METRICS:
+        if metric in references:
+            deviation = np.max(np.abs(results[metric].condensed - references[metric]))
+            ok &= deviation < 1e-9
+            print(f"{metric:<12} max deviation {deviation:.2e}")
+    print(f"registry {shared:.3f}s  separate pdist calls {separate:.3f}s")
+    return ok
+
+
+def benchmark_bootstrap(args):
+    """
+    Time the batched bootstrap against a loop that rebuilds the records, calls
+    `calculate_scaled_euclidean_distances` once per replicate and takes the
+    intervals of the stacked replicates (measured on `--loop-replicates`
+    replicates and extrapolated).
+    """
+    from bootstrap import bootstrap_distances, dimension_weights
+    from functions import calculate_scaled_euclidean_distances
+
+    data = synthetic_data(args.entities, args.dimensions)
+    # Import scipy and pandas before timing either side
+    calculate_scaled_euclidean_distances(data, use_cache=False)
+    start = perf_counter()
+    bootstrap_distances(data, method="dimensions", replicates=args.replicates, max_workers=args.workers)
+    batched = perf_counter() - start
+
+    weights = dimension_weights(args.dimensions, args.loop_replicates)
+    keys = list(data[0]["scores"])
+    stacked = []
+    start = perf_counter()
+    for counts in weights.astype(int):
+        # Duplicated dimensions get distinct keys so the resample keeps them
+        resampled = [
+            {"name": item["name"], "scores": {f"{key}#{c}": item["scores"][key] for key, count in zip(keys, counts) for c in range(count)}}
+            for item in data
+        ]
+        stacked.append(calculate_scaled_euclidean_distances(resampled, use_cache=False).condensed)
+    stacked = np.array(stacked)
+    np.quantile(stacked, [0.025, 0.975], axis=0)
+    stacked.std(axis=0, ddof=1)
+    loop = (perf_counter() - start) / args.loop_replicates * args.replicates
+
+    print(f"batched {batched:.2f}s  loop (extrapolated) {loop:.2f}s  speed-up {loop / batched:.1f}x")
+    return batched < loop
+
+
+def benchmark_mantel(args):
+    """
+    Time the batched Mantel test against a loop that permutes the square matrix
+    and correlates once per permutation (measured on `--loop-permutations`
+    permutations and extrapolated).
+    """
+    from scipy.spatial.distance import pdist, squareform
+    from compare import mantel_test
+
+    rng = np.random.default_rng(42)
+    scores = rng.random((args.entities, args.dimensions))
+    x = pdist(scores)
+    y = pdist(scores + rng.normal(scale=0.5, size=scores.shape))
+    # Import scipy.stats before timing either side
+    mantel_test(x[:3], y[:3], permutations=10, max_workers=0)
+
+    start = perf_counter()
+    statistic, p_value = mantel_test(x, y, args.permutations, max_workers=args.workers)
+    batched = perf_counter() - start
+
+    y_square = squareform(y)
+    start = perf_counter()
+    for _ in range(args.loop_permutations):
+        order = rng.permutation(args.entities)
+        np.corrcoef(x, squareform(y_square[np.ix_(order, order)], checks=False))
+    loop = (perf_counter() - start) / args.loop_permutations * args.permutations
+
+    print(f"r = {statistic:.3f}, p = {p_value:.5f}")
+    print(f"batched {batched:.2f}s  loop (extrapolated) {loop:.2f}s  speed-up {loop / batched:.1f}x")
+    return batched < loop
+
+
+def _network_figure(n_entities, k, seed=42):
+    """A network-style figure: n random nodes with edges to their k nearest neighbours."""
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from scipy.spatial import cKDTree
+
+    positions = np.random.default_rng(seed).random((n_entities, 2))
+    _, neighbours = cKDTree(positions).query(positions, k=k + 1)
+    segments = np.stack([np.repeat(positions, k, axis=0), positions[neighbours[:, 1:].ravel()]], axis=1)
+    fig, ax = plt.subplots(figsize=(10, 7))
+    ax.add_collection(LineCollection(segments, linewidths=0.5, colors="black"))
+    ax.scatter(positions[:, 0], positions[:, 1], s=10, c="red", zorder=2)
+    ax.set_title(f"{n_entities} entities")
+    return fig
+
+
+def benchmark_render(args):
+    """
+    Time until a network figure is saved and control returns: a synchronous
+    300-DPI `savefig` against `render.save_figure` (preview, then background
+    writer). The time until the writer has finished is reported as well.
+    """
+    import os
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    import matplotlib.pyplot as plt
+    from render import RENDER_DPI, VECTOR_FORMATS_ENV, flush_figures, save_figure
+
+    if args.vector:
+        os.environ[VECTOR_FORMATS_ENV] = ",".join(args.vector)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm up fonts and the Agg renderer
+        save_figure(Path(tmp) / "warmup.png", fig=_network_figure(100, args.k))
+        flush_figures()
+
+        fig = _network_figure(args.entities, args.k)
+        start = perf_counter()
+        for fmt in ("png", *args.vector):
+            fig.savefig(Path(tmp) / f"sync.{fmt}", dpi=RENDER_DPI)
+        synchronous = perf_counter() - start
+        plt.close(fig)
+
+        fig = _network_figure(args.entities, args.k)
+        start = perf_counter()
+        save_figure(Path(tmp) / "deferred.png", fig=fig)
+        returned = perf_counter() - start
+        flush_figures()
+        written = perf_counter() - start
+
+    print(f"synchronous {synchronous:.2f}s  deferred: returned after {returned:.2f}s, written after {written:.2f}s  "
+          f"speed-up {synchronous / returned:.1f}x")
+    return returned < synchronous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the Cultural Dimensions Application")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    tiled = subparsers.add_parser("tiled", help="Tiled distance engine vs. pdist")
+    tiled.add_argument("-n", "--entities", type=int, default=5000)
+    tiled.add_argument("-d", "--dimensions", type=int, default=6)
+    tiled.add_argument("--tile-size", type=int, default=1024)
+    tiled.add_argument("--workers", type=int, default=None)
+    tiled.set_defaults(func=benchmark_tiled)
+
+    startup = subparsers.add_parser("startup", help="Time to reach the main menu")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--budget", type=float, default=1.0, help="Allowed median startup time in seconds")
+    startup.set_defaults(func=benchmark_startup)
+
+    mds = subparsers.add_parser("mds", help="MDS engines: accuracy vs. time")
+    mds.add_argument("-n", "--entities", type=int, default=1000)
+    mds.add_argument("-d", "--dimensions", type=int, default=6)
+    mds.add_argument("--engines", nargs="+", choices=("mds", "cmds", "cmds_smacof", "lmds"), default=None)
+    mds.add_argument("--landmarks", type=int, default=50)
+    mds.add_argument("--max-stress-ratio", type=float, default=2.0, help="Allowed stress relative to SMACOF")
+    mds.set_defaults(func=benchmark_mds)
+
+    masked = subparsers.add_parser("masked", help="Pairwise-complete masked kernel vs. pdist")
+    masked.add_argument("-n", "--entities", type=int, default=5000)
+    masked.add_argument("-d", "--dimensions", type=int, default=8)
+    masked.add_argument("--missing", type=float, default=0.05, help="Share of missing scores in the second run")
+    masked.add_argument("--max-slowdown", type=float, default=2.0)
+    masked.set_defaults(func=benchmark_masked)
+
+    metrics = subparsers.add_parser("metrics", help="All registered metrics vs. separate pdist calls")
+    metrics.add_argument("-n", "--entities", type=int, default=5000)
+    metrics.add_argument("-d", "--dimensions", type=int, default=6)
+    metrics.set_defaults(func=benchmark_metrics)
+
+    bootstrap = subparsers.add_parser("bootstrap", help="Batched bootstrap vs. one distance computation per replicate")
+    bootstrap.add_argument("-n", "--entities", type=int, default=200)
+    bootstrap.add_argument("-d", "--dimensions", type=int, default=6)
+    bootstrap.add_argument("--replicates", type=int, default=1000)
+    bootstrap.add_argument("--loop-replicates", type=int, default=50)
+    bootstrap.add_argument("--workers", type=int, default=None)
+    bootstrap.set_defaults(func=benchmark_bootstrap)
+
+    mantel = subparsers.add_parser("mantel", help="Batched Mantel test vs. one correlation per permutation")
+    mantel.add_argument("-n", "--entities", type=int, default=200)
+    mantel.add_argument("-d", "--dimensions", type=int, default=6)
+    mantel.add_argument("--permutations", type=int, default=50000)
+    mantel.add_argument("--loop-permutations", type=int, default=1000)
+    mantel.add_argument("--workers", type=int, default=None)
+    mantel.set_defaults(func=benchmark_mantel)
+
+    render = subparsers.add_parser("render", help="Deferred high-DPI figure saving vs. synchronous savefig")
+    render.add_argument("-n", "--entities", type=int, default=5000)
+    render.add_argument("-k", type=int, default=3, help="Edges per node")
+    render.add_argument("--vector", nargs="*", choices=("pdf", "svg"), default=[])
+    render.set_defaults(func=benchmark_render)
+
+    args = parser.parse_args()
+    ok = args.func(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# bootstrap.py
+# Resampling engine for confidence intervals of the variance-scaled euclidean distances.
+import os
+
+import numpy as np
+
+from distance_matrix import DistanceMatrix
+from scheduler import Job, run_jobs
+
+BOOTSTRAP_METHODS = ("dimensions", "perturb", "both")
+BOOTSTRAP_REPLICATES = 1000
+BOOTSTRAP_BATCH = 64  # Replicates computed per batched 3-D operation
+BOOTSTRAP_MEMORY_BYTES = 256 * 1024 * 1024  # Approximate replicate buffer of one task
+PARALLEL_MIN_ENTITIES = 500  # Below this, a process pool costs more than it saves
+
+
+class BootstrapResult:
+    """
+    Bootstrap confidence intervals of all pairwise distances and the stability
+    of every country's nearest neighbours.
+
+    Args:
+        estimate (DistanceMatrix): Distances of the original data.
+        lower, upper (DistanceMatrix): Percentile interval bounds per pair.
+        spread (DistanceMatrix): Standard deviation of the replicates per pair.
+        neighbour_stability (np.ndarray): Per country, the mean share of its k original nearest
+            neighbours that are also among its k nearest in a replicate.
+        nearest_stability (np.ndarray): Per country, the share of replicates in which its
+            original nearest neighbour stays the nearest.
+        confidence (float): Confidence level of the intervals.
+        replicates (int): Number of replicates.
+        k (int): Number of nearest neighbours compared.
+        method (str): Resampling method from BOOTSTRAP_METHODS.
+    """
+
+    def __init__(self, estimate, lower, upper, spread, neighbour_stability, nearest_stability, confidence, replicates, k, method):
+        self.estimate = estimate
+        self.lower = lower
+        self.upper = upper
+        self.spread = spread
+        self.neighbour_stability = neighbour_stability
+        self.nearest_stability = nearest_stability
+        self.confidence = confidence
+        self.replicates = replicates
+        self.k = k
+        self.method = method
+
+    def __repr__(self):
+        return f"BootstrapResult(method={self.method!r}, replicates={self.replicates}, confidence={self.confidence}, entities={self.estimate.n})"
+
+    @property
+    def labels(self):
+        return self.estimate.labels
+
+    def interval(self, label1, label2):
+        """Return (distance, lower bound, upper bound) of one pair."""
+        return (
+            self.estimate.distance(label1, label2),
+            self.lower.distance(label1, label2),
+            self.upper.distance(label1, label2),
+        )
+
+    def to_dataframe(self):
+        """All pairs with their distance, interval bounds and standard deviation."""
+        import pandas as pd
+        i, j = np.triu_indices(self.estimate.n, 1)
+        labels = np.asarray(self.labels, dtype=object)
+        return pd.DataFrame({
+            "Country 1": labels[i],
+            "Country 2": labels[j],
+            "Distance": self.estimate.condensed,
+            "Lower": self.lower.condensed,
+            "Upper": self.upper.condensed,
+            "Std": self.spread.condensed,
+        })
+
+    def stability_dataframe(self):
+        """Neighbour stability per country, least stable first."""
+        import pandas as pd
+        frame = pd.DataFrame({
+            "Country": self.labels,
+            f"Top-{self.k} kept": self.neighbour_stability,
+            "Nearest kept": self.nearest_stability,
+        })
+        return frame.sort_values(f"Top-{self.k} kept", kind="stable").reset_index(drop=True)
+
+
+def dimension_weights(n_dimensions, replicates, random_state=42):
+    """
+    Multiplicity of every dimension in each resample of the dimensions (drawn with replacement).
+
+    A weight vector w turns the squared distance into sum_k w_k (z_ik - z_jk)^2, so
+    resampling dimensions never copies the score matrix.
+
+    Returns:
+        np.ndarray: Weights of shape (replicates, n_dimensions), each row summing to n_dimensions.
+    """
+    rng = np.random.default_rng(random_state)
+    return rng.multinomial(n_dimensions, np.full(n_dimensions, 1.0 / n_dimensions), size=replicates).astype(float)
+
+
+def _perturbed_scores(scores, errors, start, stop, random_state):
+    # Every replicate has its own seed, so all jobs draw the same replicates whatever the batch size
+    noise = np.stack([np.random.default_rng([random_state, b]).standard_normal(scores.shape) for b in range(start, stop)])
+    return scores + noise * errors
+
+
+def _percentiles(values, quantiles):
+    """
+    Percentiles along the last axis with np.quantile's linear interpolation.
+
+    One in-place partition places every needed order statistic, instead of the
+    full sort (and copy) of np.quantile.
+    """
+    m = values.shape[-1]
+    positions = (m - 1) * np.asarray(quantiles, dtype=float)
+    below = np.floor(positions).astype(int)
+    above = np.minimum(below + 1, m - 1)
+    values.partition(np.unique(np.concatenate([below, above])), axis=-1)
+    return [values[..., lo] + (position - lo) * (values[..., hi] - values[..., lo]) for position, lo, hi in zip(positions, below, above)]
+
+
+def _bootstrap_rows(scores, variances, weights, errors, r0, r1, confidence, k, batch, random_state):
+    """
+    Compute every replicate of the distances from rows r0..r1-1 to all entities.
+
+    Replicates are processed `batch` at a time as 3-D arrays: with Z of shape
+    (batch, n, d) and weights W of shape (batch, d), the squared distances are
+    |z_i|_W^2 + |z_j|_W^2 - 2 (Z W) Z^T, one batched matrix product. Neighbours,
+    sums and sums of squares are taken from each batch while it is in cache; only
+    the upper-triangle part is kept (replicates last) for the percentiles.
+
+    Returns:
+        tuple: (r0, r1, lower, upper, spread, neighbour stability, nearest stability) for the rows;
+            the pair arrays cover columns r0+1..n-1.
+    """
+    replicates = weights.shape[0]
+    n, d = scores.shape
+    local = np.arange(r1 - r0)
+    rows = local + r0
+    # The block's upper-triangle part lies within columns r0+1..n-1
+    columns = slice(r0 + 1, n)
+    standardized = scores / np.sqrt(variances)
+
+    # The unweighted, unperturbed distances give the reference neighbours
+    squared = (standardized[r0:r1] ** 2).sum(axis=1)[:, None] + (standardized ** 2).sum(axis=1)[None, :] - 2.0 * standardized[r0:r1] @ standardized.T
+    squared[local, rows] = np.inf
+    reference = np.argpartition(squared, k - 1, axis=1)[:, :k]
+    nearest = reference[local, np.argmin(np.take_along_axis(squared, reference, axis=1), axis=1)]
+    members = np.zeros((r1 - r0, n), dtype=bool)
+    members[local[:, None], reference] = True
+
+    buffer = np.empty((r1 - r0, n - r0 - 1, replicates))
+    total = np.zeros((r1 - r0, n - r0 - 1))
+    total_squared = np.zeros((r1 - r0, n - r0 - 1))
+    kept = np.zeros(r1 - r0)
+    nearest_kept = np.zeros(r1 - r0)
+    for start in range(0, replicates, batch):
+        stop = min(start + batch, replicates)
+        if errors is None:
+            z = np.broadcast_to(standardized, (stop - start, n, d))
+        else:
+            perturbed = _perturbed_scores(scores, errors, start, stop, random_state)
+            # Each replicate is scaled by its own variances, as a recomputed distance matrix would be
+            z = perturbed / np.sqrt(perturbed.var(axis=1, ddof=1, keepdims=True))
+        weighted = z * weights[start:stop, None, :]
+        norms = np.einsum("bnd,bnd->bn", weighted, z)
+        squared = norms[:, r0:r1, None] + norms[:, None, :] - 2.0 * np.matmul(weighted[:, r0:r1], z.transpose(0, 2, 1))
+        np.maximum(squared, 0.0, out=squared)
+
+        upper_part = squared[:, :, columns]
+        distances = np.sqrt(upper_part)
+        buffer[:, :, start:stop] = distances.transpose(1, 2, 0)
+        total += distances.sum(axis=0)
+        total_squared += upper_part.sum(axis=0)
+
+        # Squared distances rank the neighbours just like the distances
+        squared[:, local, rows] = np.inf
+        neighbours = np.argpartition(squared, k - 1, axis=2)[:, :, :k]
+        kept += members[local[None, :, None], neighbours].sum(axis=(0, 2)) / k
+        nearest_kept += (np.argmin(squared, axis=2) == nearest[None, :]).sum(axis=0)
+
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = _percentiles(buffer, [alpha, 1.0 - alpha])
+    if replicates > 1:
+        spread = np.sqrt(np.maximum(total_squared - total ** 2 / replicates, 0.0) / (replicates - 1))
+    else:
+        spread = np.zeros_like(total)
+    return r0, r1, lower, upper, spread, kept / replicates, nearest_kept / replicates
+
+
+def bootstrap_distances(
+    data,
+    method="dimensions",
+    replicates=BOOTSTRAP_REPLICATES,
+    errors=None,
+    confidence=0.95,
+    k=5,
+    score_key="scores",
+    random_state=42,
+    batch=BOOTSTRAP_BATCH,
+    memory_bytes=BOOTSTRAP_MEMORY_BYTES,
+    max_workers=None,
+):
+    """
+    Bootstrap confidence intervals for the variance-scaled euclidean distances.
+
+    Methods:
+        dimensions: Resample the cultural dimensions with replacement.
+        perturb: Add normal noise with standard deviation `errors` to every score.
+        both: Both at once.
+
+    The entities are split into row blocks small enough that all replicates of a
+    block fit into about `memory_bytes`; every block is a job for
+    `scheduler.run_jobs` and computes its replicates in batched 3-D operations.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        method (str): One of BOOTSTRAP_METHODS.
+        replicates (int): Number of replicate distance matrices.
+        errors (float or np.ndarray): Standard error of the scores: one value, one per dimension
+            or one per score (entities x dimensions). Required by "perturb" and "both".
+        confidence (float): Confidence level of the percentile intervals.
+        k (int): Number of nearest neighbours whose stability is measured.
+        score_key (str): Key of the score dictionary inside each record.
+        random_state (int): Seed of the resampling.
+        batch (int): Replicates per batched operation.
+        memory_bytes (int): Approximate size of the replicate buffer of one job.
+        max_workers (int): Worker processes; None uses a pool only for datasets with at least
+            PARALLEL_MIN_ENTITIES entities, 0 always runs in this process.
+
+    Returns:
+        BootstrapResult: Interval bounds per pair and neighbour stability per country.
+    """
+    from functions import prepare_scores
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"Unknown bootstrap method '{method}'. Choose from {', '.join(BOOTSTRAP_METHODS)}.")
+    if method != "dimensions" and errors is None:
+        raise ValueError(f"The '{method}' bootstrap needs the standard errors of the scores.")
+    if replicates < 1:
+        raise ValueError(f"The number of replicates must be at least 1, got {replicates}.")
+    if not 0 < confidence < 1:
+        raise ValueError(f"The confidence level must lie between 0 and 1, got {confidence}.")
+
+    countries, scores, variances = prepare_scores(data, score_key)
+    n, d = scores.shape
+    if not 0 < k < n:
+        raise ValueError(f"k must be between 1 and {n - 1}, got {k}.")
+    if method == "perturb":
+        weights = np.ones((replicates, d))
+    else:
+        weights = dimension_weights(d, replicates, random_state)
+    if method == "dimensions":
+        errors = None
+    else:
+        errors = np.asarray(errors, dtype=float)
+
+    rows_per_job = max(1, memory_bytes // (replicates * n * 8))
+    if max_workers is None and n < PARALLEL_MIN_ENTITIES:
+        max_workers = 0
+    if max_workers != 0:
+        # Leave at least one block per worker
+        rows_per_job = min(rows_per_job, -(-n // (max_workers or os.cpu_count() or 1)))
+    jobs = [
+        Job(f"rows {r0}-{min(r0 + rows_per_job, n)}", _bootstrap_rows,
+            (scores, variances, weights, errors, r0, min(r0 + rows_per_job, n), confidence, k, batch, random_state))
+        for r0 in range(0, n, rows_per_job)
+    ]
+
+    size = n * (n - 1) // 2
+    estimate, lower, upper, spread = (np.empty(size) for _ in range(4))
+    neighbour_stability, nearest_stability = np.empty(n), np.empty(n)
+    from scipy.spatial.distance import pdist
+    estimate[:] = pdist(scores, metric="seuclidean", V=variances)
+    for job, (result, error, seconds) in zip(jobs, run_jobs(jobs, max_workers=max_workers)):
+        if error:
+            raise RuntimeError(f"Bootstrap job '{job.name}' failed: {error}")
+        r0, r1, block_lower, block_upper, block_spread, kept, nearest_kept = result
+        neighbour_stability[r0:r1] = kept
+        nearest_stability[r0:r1] = nearest_kept
+        for offset, i in enumerate(range(r0, r1)):
+            # Row i's upper-triangle part is columns i+1..n-1 (block column offset onwards),
+            # stored contiguously in the condensed layout
+            start = n * i - i * (i + 1) // 2
+            lower[start:start + n - i - 1] = block_lower[offset, offset:]
+            upper[start:start + n - i - 1] = block_upper[offset, offset:]
+            spread[start:start + n - i - 1] = block_spread[offset, offset:]
+
+    return BootstrapResult(
+        DistanceMatrix(estimate, countries),
+        DistanceMatrix(lower, countries),
+        DistanceMatrix(upper, countries),
+        DistanceMatrix(spread, countries),
+        neighbour_stability,
+        nearest_stability,
+        confidence,
+        replicates,
+        k,
+        method,
+    )
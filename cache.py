@@ -0,0 +1,208 @@
+# cache.py
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+CACHE_DIR = Path(".cache") / "distances"
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # Evict least recently used entries above 256 MB
+SOURCE_PATTERN = "data/*.json"
+SIDECAR_SUFFIXES = (".labels.json", ".header.json")  # Metadata of exported distances, not dataset sources
+
+
+def records_fingerprint(data, score_key="scores"):
+    """
+    Hash the parts of the input records that influence a distance matrix.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        score_key (str): Key of the score dictionary inside each record.
+
+    Returns:
+        str: Hex digest identifying the records.
+    """
+    # Compiled datasets carry the fingerprint of their source records
+    fingerprint = getattr(data, "fingerprint", None)
+    if fingerprint is not None and score_key == "scores":
+        return fingerprint
+    payload = [[item["name"], item[score_key]] for item in data]
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def distance_cache_key(data, score_key="scores", metric="seuclidean", **params):
+    """
+    Build the content address of a distance matrix.
+
+    Args:
+        data (list of dict): Input records.
+        score_key (str): Key of the score dictionary inside each record.
+        metric (str): Name of the distance metric.
+        **params: Additional metric parameters that change the result.
+
+    Returns:
+        str: Cache key.
+    """
+    header = json.dumps({"score_key": score_key, "metric": metric, "params": params}, sort_keys=True)
+    digest = hashlib.sha256(header.encode("utf-8"))
+    digest.update(records_fingerprint(data, score_key).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def source_signature(pattern=SOURCE_PATTERN):
+    """Return a signature of the source data files based on their size and modification time."""
+    entries = []
+    for path in sorted(glob.glob(pattern)):
+        if path.endswith(SIDECAR_SUFFIXES):
+            continue
+        stat = os.stat(path)
+        entries.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f"{key}.npz"
+
+
+def load_cached_distances(key, cache_dir=CACHE_DIR):
+    """
+    Load a cached condensed distance vector.
+
+    Args:
+        key (str): Cache key from `distance_cache_key`.
+        cache_dir (str or Path): Cache directory.
+
+    Returns:
+        tuple: (condensed distances, list of labels), or None on a cache miss.
+    """
+    path = _entry_path(key, cache_dir)
+    try:
+        with np.load(path, allow_pickle=False) as entry:
+            condensed = entry["condensed"]
+            labels = entry["labels"].tolist()
+    except (OSError, KeyError, ValueError):
+        return None
+    # Refresh the access time so eviction keeps recently used entries
+    os.utime(path)
+    return condensed, labels
+
+
+def store_cached_distances(key, condensed, labels, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Store a condensed distance vector and its labels under the given key.
+
+    The entry is written to a temporary file first and renamed into place, so
+    concurrent processes never read a partially written entry.
+
+    Args:
+        key (str): Cache key from `distance_cache_key`.
+        condensed (np.ndarray): Condensed distance vector as returned by `pdist`.
+        labels (list of str): Entity labels in matrix order.
+        cache_dir (str or Path): Cache directory.
+        max_bytes (int): Size bound of the cache directory.
+    """
+    cache_dir = Path(cache_dir)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                condensed=np.asarray(condensed, dtype=np.float64),
+                labels=np.asarray(labels, dtype=str),
+                sources=np.asarray(source_signature()),
+            )
+        os.replace(tmp_path, _entry_path(key, cache_dir))
+    except OSError as e:
+        print(f"Error writing distance cache: {e}")
+        return
+    evict_cache_entries(cache_dir, max_bytes)
+
+
+def evict_cache_entries(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, pattern="*.npz"):
+    """Remove the least recently used entries matching `pattern` until the cache fits into `max_bytes`."""
+    entries = []
+    for path in Path(cache_dir).glob(pattern):
+        try:
+            entries.append((path.stat().st_mtime, path.stat().st_size, path))
+        except OSError:
+            continue  # Removed by another process meanwhile
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        total -= size
+        path.unlink(missing_ok=True)
+
+
+class LRUMemo:
+    """
+    In-memory memo keeping only the most recently used entries.
+
+    The memo stores are filled by the background thread while the menu reads
+    them, so access is guarded by a lock.
+
+    Args:
+        max_entries (int): Number of entries kept.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the entry for `key` (marking it as recently used), or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Store an entry, dropping the least recently used ones beyond `max_entries`."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def prune_stale_entries(cache_dir=CACHE_DIR, pattern=SOURCE_PATTERN):
+    """
+    Remove entries that were written before the source data files last changed.
+
+    Returns:
+        int: Number of removed entries.
+    """
+    current = source_signature(pattern)
+    removed = 0
+    for path in Path(cache_dir).glob("*.npz"):
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                stale = str(entry["sources"]) != current
+        except (OSError, KeyError, ValueError):
+            stale = True
+        if stale:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -0,0 +1,258 @@
+# clustering.py
+# Clustering that works directly on precomputed distances, so every plot can reuse
+# the same labels instead of re-running K-Means on the rows of the distance matrix.
+from concurrent.futures import CancelledError
+
+import numpy as np
+
+from cache import LRUMemo
+from distance_matrix import as_distance_matrix
+from scheduler import Job, run_jobs
+
+CLUSTER_METHODS = ("kmedoids", "agglomerative")
+CLUSTER_METHOD_LABELS = {"kmeans": "K-Means", "kmedoids": "K-Medoids", "agglomerative": "Agglomerative"}  # Names in figure titles
+DEFAULT_K_VALUES = range(2, 11)
+SILHOUETTE_CHUNK_ROWS = 1024  # Matrix rows gathered at a time by silhouette_scores
+PARALLEL_MIN_ENTITIES = 500  # Below this, a process pool costs more than it saves
+
+# Sweeps keyed by (matrix fingerprint, k values, methods)
+_sweeps = LRUMemo(max_entries=8)
+
+
+def clustering_label(method, k):
+    """Name of a clustering run for figure titles, e.g. "K-Medoids (k=4)"."""
+    return f"{CLUSTER_METHOD_LABELS.get(method, method)} (k={k})"
+
+
+def k_medoids(distance_df, k, max_iter=100, random_state=42, chunk_rows=SILHOUETTE_CHUNK_ROWS):
+    """
+    Partition entities around k medoids (alternating k-medoids with k-medoids++ seeding).
+
+    The medoid update needs the distance sum of every entity to the rest of its
+    cluster; as in `silhouette_scores`, these are ``D @ M`` for the membership
+    matrix M, gathered a block of rows at a time instead of one dense
+    members x members block per cluster.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        k (int): Number of clusters.
+        max_iter (int): Maximum number of assignment/update rounds.
+        random_state (int): Seed of the initialization.
+        chunk_rows (int): Number of matrix rows gathered at a time.
+
+    Returns:
+        tuple: (cluster label per entity, matrix positions of the medoids)
+    """
+    distance_matrix = as_distance_matrix(distance_df)
+    n = distance_matrix.n
+    everyone = np.arange(n)
+    rng = np.random.default_rng(random_state)
+
+    medoids = [int(rng.integers(n))]
+    nearest = distance_matrix.take(everyone, np.full(n, medoids[0]))
+    for _ in range(k - 1):
+        weights = nearest ** 2
+        total = weights.sum()
+        medoid = int(rng.choice(n, p=weights / total)) if total > 0 else int(rng.integers(n))
+        medoids.append(medoid)
+        nearest = np.minimum(nearest, distance_matrix.take(everyone, np.full(n, medoid)))
+    medoids = np.asarray(medoids, dtype=np.intp)
+
+    for _ in range(max_iter):
+        labels = np.argmin(distance_matrix.take(everyone[:, None], medoids[None, :]), axis=1)
+        membership = np.zeros((n, k))
+        membership[everyone, labels] = 1.0
+        within = np.empty(n)
+        for row in range(0, n, chunk_rows):
+            rows = everyone[row:row + chunk_rows]
+            sums = distance_matrix.take(rows[:, None], everyone[None, :]) @ membership
+            within[rows] = sums[np.arange(rows.size), labels[rows]]
+        updated = medoids.copy()
+        for cluster in range(k):
+            members = np.flatnonzero(labels == cluster)
+            if members.size:
+                updated[cluster] = members[np.argmin(within[members])]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    labels = np.argmin(distance_matrix.take(everyone[:, None], medoids[None, :]), axis=1)
+    return labels, medoids
+
+
+def agglomerative_labels(distance_df, k_values, method="average"):
+    """
+    Cut one agglomerative linkage tree at several cluster counts.
+
+    The tree is built once from the condensed vector; each cut is then O(n).
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        k_values (iterable of int): Cluster counts to cut at.
+        method (str): Linkage method accepted by `scipy.cluster.hierarchy.linkage`.
+
+    Returns:
+        dict: Cluster labels (starting at 0) keyed by k.
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+    distance_matrix = as_distance_matrix(distance_df)
+    tree = linkage(np.asarray(distance_matrix.condensed, dtype=float), method=method)
+    return {k: fcluster(tree, t=k, criterion="maxclust") - 1 for k in k_values}
+
+
+def silhouette_scores(distance_df, labelings, chunk_rows=SILHOUETTE_CHUNK_ROWS):
+    """
+    Mean silhouette coefficient of several labelings in one pass over the matrix.
+
+    All labelings are stacked into one membership matrix M, so the per-cluster
+    distance sums of every entity are ``D @ M``, gathered a block of rows at a time.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        labelings (list of np.ndarray): Cluster label per entity, one array per labeling.
+        chunk_rows (int): Number of matrix rows gathered at a time.
+
+    Returns:
+        np.ndarray: Mean silhouette per labeling (0 for labelings with a single cluster).
+    """
+    distance_matrix = as_distance_matrix(distance_df)
+    n = distance_matrix.n
+    everyone = np.arange(n)
+
+    inverses, slices, start = [], [], 0
+    for labels in labelings:
+        clusters, inverse = np.unique(labels, return_inverse=True)
+        inverses.append(inverse)
+        slices.append(slice(start, start + clusters.size))
+        start += clusters.size
+    membership = np.zeros((n, start))
+    for inverse, columns in zip(inverses, slices):
+        membership[everyone, columns.start + inverse] = 1.0
+    sizes = membership.sum(axis=0)
+
+    sums = np.empty((n, start))
+    for row in range(0, n, chunk_rows):
+        rows = everyone[row:row + chunk_rows]
+        sums[rows] = distance_matrix.take(rows[:, None], everyone[None, :]) @ membership
+
+    scores = np.zeros(len(labelings))
+    for i, (inverse, columns) in enumerate(zip(inverses, slices)):
+        if columns.stop - columns.start < 2:
+            continue
+        cluster_sums, cluster_sizes = sums[:, columns], sizes[columns]
+        own_size = cluster_sizes[inverse]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = cluster_sums[everyone, inverse] / (own_size - 1)
+            means = cluster_sums / cluster_sizes
+        means[everyone, inverse] = np.inf
+        b = means.min(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            silhouette = (b - a) / np.maximum(a, b)
+        # Entities alone in their cluster score 0, as in scikit-learn
+        silhouette[own_size == 1] = 0.0
+        scores[i] = np.nan_to_num(silhouette).mean()
+    return scores
+
+
+class ClusterSweep:
+    """
+    Labelings and silhouette scores of a k sweep.
+
+    Args:
+        labelings (dict): Cluster labels keyed by (method, k).
+        scores (dict): Mean silhouette keyed by (method, k).
+    """
+
+    def __init__(self, labelings, scores):
+        self.labelings = labelings
+        self.scores = scores
+        self.best_method, self.best_k = max(scores, key=scores.get)
+
+    def __repr__(self):
+        return f"ClusterSweep(best_method={self.best_method!r}, best_k={self.best_k}, runs={len(self.scores)})"
+
+    @property
+    def best_labels(self):
+        return self.labelings[(self.best_method, self.best_k)]
+
+    @property
+    def best_score(self):
+        return self.scores[(self.best_method, self.best_k)]
+
+    def labels(self, method=None, k=None):
+        """Return the labels of one run; the method and k default to the best ones."""
+        method = method or self.best_method
+        if k is None:
+            k = max((key for key in self.scores if key[0] == method), key=self.scores.get)[1]
+        return self.labelings[(method, k)]
+
+    def to_dataframe(self):
+        """Silhouette scores as a k x method table."""
+        import pandas as pd
+        frame = pd.Series(self.scores).unstack(level=0)
+        frame.index.name = "k"
+        return frame
+
+
+def _kmedoids_job(distance_matrix, k):
+    return {("kmedoids", k): k_medoids(distance_matrix, k)[0]}
+
+
+def _agglomerative_job(distance_matrix, k_values):
+    return {("agglomerative", k): labels for k, labels in agglomerative_labels(distance_matrix, k_values).items()}
+
+
+def sweep_clusters(distance_df, k_values=DEFAULT_K_VALUES, methods=CLUSTER_METHODS, max_workers=None, cancel=None):
+    """
+    Cluster for every k in a range with every method and score the results.
+
+    Each k-medoids run and the agglomerative tree (built once, cut at every k)
+    is a separate job for `scheduler.run_jobs`; all labelings are then scored
+    by `silhouette_scores` in a single pass. Results are memoized per matrix.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        k_values (iterable of int): Cluster counts to try (values >= the number of entities are skipped).
+        methods (tuple of str): Methods from CLUSTER_METHODS.
+        max_workers (int): Worker processes; None uses a pool only for matrices with at least
+            PARALLEL_MIN_ENTITIES entities, 0 always runs in this process.
+        cancel (threading.Event): Checked before every job and before the scoring; once set,
+            the sweep stops with a CancelledError and nothing is memoized.
+
+    Returns:
+        ClusterSweep: All labelings, their silhouette scores and the best (method, k).
+    """
+    distance_matrix = as_distance_matrix(distance_df)
+    unknown = set(methods) - set(CLUSTER_METHODS)
+    if unknown:
+        raise ValueError(f"Unknown clustering method '{unknown.pop()}'. Choose from {', '.join(CLUSTER_METHODS)}.")
+    k_values = tuple(k for k in k_values if 2 <= k < distance_matrix.n)
+    if not k_values:
+        raise ValueError(f"No valid cluster count for {distance_matrix.n} entities.")
+
+    key = (distance_matrix.fingerprint(), k_values, tuple(methods))
+    sweep = _sweeps.get(key)
+    if sweep is not None:
+        return sweep
+
+    jobs = []
+    if "kmedoids" in methods:
+        jobs += [Job(f"k-medoids k={k}", _kmedoids_job, (distance_matrix, k)) for k in k_values]
+    if "agglomerative" in methods:
+        jobs.append(Job("agglomerative", _agglomerative_job, (distance_matrix, k_values)))
+    if max_workers is None and distance_matrix.n < PARALLEL_MIN_ENTITIES:
+        max_workers = 0
+
+    def check_cancelled(job=None):
+        if cancel is not None and cancel.is_set():
+            raise CancelledError("Cluster sweep cancelled.")
+
+    labelings = {}
+    for job, (result, error, seconds) in zip(jobs, run_jobs(jobs, max_workers=max_workers, on_start=check_cancelled)):
+        if error:
+            raise RuntimeError(f"Clustering job '{job.name}' failed: {error}")
+        labelings.update(result)
+
+    check_cancelled()
+    runs = list(labelings)
+    scores = silhouette_scores(distance_matrix, [labelings[run] for run in runs])
+    return _sweeps.put(key, ClusterSweep(labelings, {run: float(score) for run, score in zip(runs, scores)}))
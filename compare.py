@@ -0,0 +1,156 @@
+# compare.py
+# Agreement between two frameworks' distance matrices on the countries they share.
+import os
+
+import numpy as np
+
+from distance_matrix import as_distance_matrix
+from entities import EntityIndex, canonical_name
+from scheduler import Job, run_jobs
+
+MANTEL_PERMUTATIONS = 10_000
+MANTEL_BATCH_ELEMENTS = 131_072  # Permuted pair distances gathered per vectorized step (larger gathers leave the cache)
+PARALLEL_MIN_WORK = 500_000_000  # Permutations x pairs below which a process pool costs more than it saves
+
+
+def align_matrices(distance_df1, distance_df2):
+    """
+    Restrict two distance matrices to their common countries, in the same order.
+
+    Countries are matched through `entities.EntityIndex`, so differently spelled
+    names (e.g. "Great Britain" and "UK") are joined.
+
+    Args:
+        distance_df1, distance_df2 (DistanceMatrix or pd.DataFrame): The distance matrices.
+
+    Returns:
+        tuple: (common canonical country names, condensed vector of matrix 1, condensed vector of matrix 2)
+    """
+    distance_matrix1 = as_distance_matrix(distance_df1)
+    distance_matrix2 = as_distance_matrix(distance_df2)
+    pairs = EntityIndex(distance_matrix1.labels).common(EntityIndex(distance_matrix2.labels))
+    if len(pairs) < 3:
+        raise ValueError(f"The matrices share only {len(pairs)} countries; at least 3 are needed.")
+    labels1, labels2 = zip(*pairs)
+    condensed1 = distance_matrix1.submatrix(list(labels1)).condensed
+    condensed2 = distance_matrix2.submatrix(list(labels2)).condensed
+    return [canonical_name(label) for label in labels1], np.asarray(condensed1, dtype=float), np.asarray(condensed2, dtype=float)
+
+
+def _standardize(values):
+    centered = values - values.mean()
+    return centered / np.linalg.norm(centered)
+
+
+def _mantel_batch(x, y_square, pair_rows, pair_columns, permutations, batch, seed):
+    """
+    Count the permutations whose statistic reaches the observed one.
+
+    For a permutation p of the countries, the permuted condensed vector is
+    y_square[p[i], p[j]] over all pairs (i, j); a batch of permutations is one
+    (batch x pairs) gather from the flattened matrix followed by a
+    matrix-vector product with x.
+
+    Returns:
+        tuple: (count of statistics >= observed, count of |statistics| >= |observed|)
+    """
+    rng = np.random.default_rng(seed)
+    m = y_square.shape[0]
+    flat = y_square.ravel()
+    observed = float(x @ y_square[pair_rows, pair_columns])
+    # Statistics equal to the observed one up to rounding count as reaching it
+    tolerance = 1e-12 * max(1.0, abs(observed))
+    # 32-bit indices halve the memory traffic of the gathers
+    index_type = np.int32 if m * m < 2 ** 31 else np.int64
+    identity = np.arange(m, dtype=index_type)
+    pair_rows, pair_columns = pair_rows.astype(index_type), pair_columns.astype(index_type)
+    greater = extreme = 0
+    for start in range(0, permutations, batch):
+        size = min(batch, permutations - start)
+        orders = rng.permuted(np.tile(identity, (size, 1)), axis=1)
+        index = np.take(orders * m, pair_rows, axis=1)
+        index += np.take(orders, pair_columns, axis=1)
+        statistics = np.take(flat, index) @ x
+        greater += int(np.count_nonzero(statistics >= observed - tolerance))
+        extreme += int(np.count_nonzero(np.abs(statistics) >= abs(observed) - tolerance))
+    return greater, extreme
+
+
+def mantel_test(x, y, permutations=MANTEL_PERMUTATIONS, method="pearson", alternative="greater", random_state=42, batch=None, max_workers=None):
+    """
+    Mantel permutation test of the correlation between two condensed distance vectors.
+
+    Both vectors are standardized once; since a permutation only reorders the
+    entries of y, every permuted correlation is a plain dot product with x.
+    Permutations are split into jobs for `scheduler.run_jobs`, each evaluating
+    `batch` permutations per vectorized gather.
+
+    Args:
+        x, y (np.ndarray): Condensed distance vectors over the same countries.
+        permutations (int): Number of random permutations.
+        method (str): "pearson", or "spearman" to correlate the ranks.
+        alternative (str): "greater" (positive association) or "two-sided".
+        random_state (int): Seed of the permutations.
+        batch (int): Permutations per vectorized gather (defaults to about
+            MANTEL_BATCH_ELEMENTS gathered distances).
+        max_workers (int): Worker processes; None uses a pool only above PARALLEL_MIN_WORK
+            and with more than one CPU, 0 always runs in this process.
+
+    Returns:
+        tuple: (correlation, p-value)
+    """
+    from scipy.spatial.distance import squareform
+    from scipy.stats import rankdata
+    if method not in ("pearson", "spearman"):
+        raise ValueError(f"Unknown correlation method '{method}'. Choose from pearson, spearman.")
+    if alternative not in ("greater", "two-sided"):
+        raise ValueError(f"Unknown alternative '{alternative}'. Choose from greater, two-sided.")
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if method == "spearman":
+        x, y = rankdata(x), rankdata(y)
+    x, y = _standardize(x), _standardize(y)
+    y_square = squareform(y, checks=False)
+    pair_rows, pair_columns = np.triu_indices(y_square.shape[0], 1)
+    statistic = float(x @ y)
+    if batch is None:
+        batch = max(1, MANTEL_BATCH_ELEMENTS // x.size)
+
+    if max_workers is None and (permutations * x.size < PARALLEL_MIN_WORK or (os.cpu_count() or 1) < 2):
+        max_workers = 0
+    n_jobs = 1 if max_workers == 0 else max(1, min(-(-permutations // batch), max_workers or os.cpu_count() or 1))
+    shares = [permutations // n_jobs + (i < permutations % n_jobs) for i in range(n_jobs)]
+    jobs = [
+        Job(f"permutations {i}", _mantel_batch, (x, y_square, pair_rows, pair_columns, share, batch, [random_state, i]))
+        for i, share in enumerate(shares) if share
+    ]
+    greater = extreme = 0
+    for job, (result, error, seconds) in zip(jobs, run_jobs(jobs, max_workers=max_workers)):
+        if error:
+            raise RuntimeError(f"Mantel job '{job.name}' failed: {error}")
+        greater += result[0]
+        extreme += result[1]
+    hits = greater if alternative == "greater" else extreme
+    return statistic, (hits + 1) / (permutations + 1)
+
+
+def compare_frameworks(distance_df1, distance_df2, permutations=MANTEL_PERMUTATIONS, random_state=42, max_workers=None):
+    """
+    Correlate two frameworks' distances over their common countries.
+
+    Args:
+        distance_df1, distance_df2 (DistanceMatrix or pd.DataFrame): The distance matrices.
+        permutations (int): Permutations of each Mantel test.
+        random_state (int): Seed of the permutations.
+        max_workers (int): Worker processes of the Mantel tests (see `mantel_test`).
+
+    Returns:
+        dict: Number of common countries and pairs, Pearson and Spearman correlations
+            and the Mantel p-values of both.
+    """
+    countries, x, y = align_matrices(distance_df1, distance_df2)
+    report = {"countries": len(countries), "pairs": int(x.size), "permutations": permutations}
+    for method in ("pearson", "spearman"):
+        statistic, p_value = mantel_test(x, y, permutations, method=method, random_state=random_state, max_workers=max_workers)
+        report[method] = statistic
+        report[f"{method}_p"] = p_value
+    return report
@@ -1,7 +1,6 @@
 # %%
-import pandas as pd
 import json
-from io import StringIO 
+from ingest import ingest_long_csv, write_records
 
 # %%
 culture_map_data = [
@@ -77,545 +76,6 @@ culture_map_data = [
     {"id":70,"name":"Jamaica","datamapId":"JAM","isoCode":388,"isoShortCode":"JM","scores":{"communicating":65,"evaluating":30,"leading":78,"deciding":78,"trusting":80,"disagreeing":32,"scheduling":80,"persuading":60}},
     {"id":71,"name":"Dominican Republic","datamapId":"DOM","isoCode":214,"isoShortCode":"DO","scores":{"communicating":75,"evaluating":65,"leading":80,"deciding":80,"trusting":85,"disagreeing":65,"scheduling":80,"persuading":75}}
 ]
-hofstede_data = """
-ctr,country,cultural dimension,Value
-AFE,Africa East,idv,27
-AFE,Africa East,ivr,40
-AFE,Africa East,ltowvs,32
-AFE,Africa East,mas,41
-AFE,Africa East,pdi,64
-AFE,Africa East,uai,52
-AFW,Africa West,idv,20
-AFW,Africa West,ivr,78
-AFW,Africa West,ltowvs,9
-AFW,Africa West,mas,46
-AFW,Africa West,pdi,77
-AFW,Africa West,uai,54
-ALB,Albania,idv,27
-ALB,Albania,ivr,15
-ALB,Albania,ltowvs,61
-ALB,Albania,mas,80
-ALB,Albania,pdi,90
-ALB,Albania,uai,70
-ALG,Algeria,idv,29
-ALG,Algeria,ivr,32
-ALG,Algeria,ltowvs,26
-ALG,Algeria,mas,35
-ALG,Algeria,pdi,80
-ALG,Algeria,uai,70
-ARA,Arab countries,idv,38
-ARA,Arab countries,ivr,34
-ARA,Arab countries,ltowvs,23
-ARA,Arab countries,mas,53
-ARA,Arab countries,pdi,80
-ARA,Arab countries,uai,68
-ARG,Argentina,idv,46
-ARG,Argentina,ivr,62
-ARG,Argentina,ltowvs,20
-ARG,Argentina,mas,56
-ARG,Argentina,pdi,49
-ARG,Argentina,uai,86
-ARM,Armenia,idv,17
-ARM,Armenia,ivr,25
-ARM,Armenia,ltowvs,61
-ARM,Armenia,mas,50
-ARM,Armenia,pdi,85
-ARM,Armenia,uai,88
-AUL,Australia,idv,90
-AUL,Australia,ivr,71
-AUL,Australia,ltowvs,21
-AUL,Australia,mas,61
-AUL,Australia,pdi,38
-AUL,Australia,uai,51
-AUT,Austria,idv,55
-AUT,Austria,ivr,63
-AUT,Austria,ltowvs,60
-AUT,Austria,mas,79
-AUT,Austria,pdi,11
-AUT,Austria,uai,70
-AZE,Azerbaijan,idv,28
-AZE,Azerbaijan,ivr,22
-AZE,Azerbaijan,ltowvs,61
-AZE,Azerbaijan,mas,50
-AZE,Azerbaijan,pdi,85
-AZE,Azerbaijan,uai,88
-BAN,Bangladesh,idv,20
-BAN,Bangladesh,ivr,20
-BAN,Bangladesh,ltowvs,47
-BAN,Bangladesh,mas,55
-BAN,Bangladesh,pdi,80
-BAN,Bangladesh,uai,60
-BEL,Belgium,idv,75
-BEL,Belgium,ivr,57
-BEL,Belgium,ltowvs,82
-BEL,Belgium,mas,54
-BEL,Belgium,pdi,65
-BEL,Belgium,uai,94
-BLR,Belarus,idv,48
-BLR,Belarus,ivr,15
-BLR,Belarus,ltowvs,81
-BLR,Belarus,mas,20
-BLR,Belarus,pdi,95
-BLR,Belarus,uai,95
-BOS,Bosnia,idv,40
-BOS,Bosnia,ivr,44
-BOS,Bosnia,ltowvs,70
-BOS,Bosnia,mas,48
-BOS,Bosnia,pdi,90
-BOS,Bosnia,uai,87
-BRA,Brazil,idv,38
-BRA,Brazil,ivr,59
-BRA,Brazil,ltowvs,44
-BRA,Brazil,mas,49
-BRA,Brazil,pdi,69
-BRA,Brazil,uai,76
-BUF,Burkina Faso,idv,15
-BUF,Burkina Faso,ivr,18
-BUF,Burkina Faso,ltowvs,27
-BUF,Burkina Faso,mas,50
-BUF,Burkina Faso,pdi,70
-BUF,Burkina Faso,uai,55
-BUL,Bulgaria,idv,30
-BUL,Bulgaria,ivr,16
-BUL,Bulgaria,ltowvs,69
-BUL,Bulgaria,mas,40
-BUL,Bulgaria,pdi,70
-BUL,Bulgaria,uai,85
-CAN,Canada,idv,80
-CAN,Canada,ivr,68
-CAN,Canada,ltowvs,36
-CAN,Canada,mas,52
-CAN,Canada,pdi,39
-CAN,Canada,uai,48
-CHI,China,idv,20
-CHI,China,ivr,24
-CHI,China,ltowvs,87
-CHI,China,mas,66
-CHI,China,pdi,80
-CHI,China,uai,30
-CHL,Chile,idv,23
-CHL,Chile,ivr,68
-CHL,Chile,ltowvs,31
-CHL,Chile,mas,28
-CHL,Chile,pdi,63
-CHL,Chile,uai,86
-COL,Colombia,idv,13
-COL,Colombia,ivr,83
-COL,Colombia,ltowvs,13
-COL,Colombia,mas,64
-COL,Colombia,pdi,67
-COL,Colombia,uai,80
-CRO,Croatia,idv,33
-CRO,Croatia,ivr,33
-CRO,Croatia,ltowvs,58
-CRO,Croatia,mas,40
-CRO,Croatia,pdi,73
-CRO,Croatia,uai,80
-CZE,Czech Rep,idv,58
-CZE,Czech Rep,ivr,29
-CZE,Czech Rep,ltowvs,70
-CZE,Czech Rep,mas,57
-CZE,Czech Rep,pdi,57
-CZE,Czech Rep,uai,74
-DEN,Denmark,idv,74
-DEN,Denmark,ivr,70
-DEN,Denmark,ltowvs,35
-DEN,Denmark,mas,16
-DEN,Denmark,pdi,18
-DEN,Denmark,uai,23
-DOM,Dominican Rep,idv,38
-DOM,Dominican Rep,ivr,54
-DOM,Dominican Rep,ltowvs,13
-DOM,Dominican Rep,mas,65
-DOM,Dominican Rep,pdi,65
-DOM,Dominican Rep,uai,45
-EGY,Egypt,idv,13
-EGY,Egypt,ivr,4
-EGY,Egypt,ltowvs,7
-EGY,Egypt,mas,55
-EGY,Egypt,pdi,80
-EGY,Egypt,uai,55
-EST,Estonia,idv,60
-EST,Estonia,ivr,16
-EST,Estonia,ltowvs,82
-EST,Estonia,mas,30
-EST,Estonia,pdi,40
-EST,Estonia,uai,60
-ETH,Ethiopia,idv,7
-ETH,Ethiopia,ivr,46
-ETH,Ethiopia,ltowvs,14
-ETH,Ethiopia,mas,65
-ETH,Ethiopia,pdi,70
-ETH,Ethiopia,uai,55
-FIN,Finland,idv,63
-FIN,Finland,ivr,57
-FIN,Finland,ltowvs,38
-FIN,Finland,mas,26
-FIN,Finland,pdi,33
-FIN,Finland,uai,59
-FRA,France,idv,71
-FRA,France,ivr,48
-FRA,France,ltowvs,63
-FRA,France,mas,43
-FRA,France,pdi,68
-FRA,France,uai,86
-GBR,Great Britain,idv,89
-GBR,Great Britain,ivr,69
-GBR,Great Britain,ltowvs,51
-GBR,Great Britain,mas,66
-GBR,Great Britain,pdi,35
-GBR,Great Britain,uai,35
-GEO,Georgia,idv,15
-GEO,Georgia,ivr,32
-GEO,Georgia,ltowvs,38
-GEO,Georgia,mas,55
-GEO,Georgia,pdi,65
-GEO,Georgia,uai,85
-GER,Germany,idv,67
-GER,Germany,ivr,40
-GER,Germany,ltowvs,83
-GER,Germany,mas,66
-GER,Germany,pdi,35
-GER,Germany,uai,65
-GRE,Greece,idv,35
-GRE,Greece,ivr,50
-GRE,Greece,ltowvs,45
-GRE,Greece,mas,57
-GRE,Greece,pdi,60
-GRE,Greece,uai,100
-HOK,Hong Kong,idv,25
-HOK,Hong Kong,ivr,17
-HOK,Hong Kong,ltowvs,61
-HOK,Hong Kong,mas,57
-HOK,Hong Kong,pdi,68
-HOK,Hong Kong,uai,29
-HUN,Hungary,idv,80
-HUN,Hungary,ivr,31
-HUN,Hungary,ltowvs,58
-HUN,Hungary,mas,88
-HUN,Hungary,pdi,46
-HUN,Hungary,uai,82
-ICE,Iceland,idv,83
-ICE,Iceland,ivr,67
-ICE,Iceland,ltowvs,28
-ICE,Iceland,mas,10
-ICE,Iceland,pdi,30
-ICE,Iceland,uai,50
-IDO,Indonesia,idv,14
-IDO,Indonesia,ivr,38
-IDO,Indonesia,ltowvs,62
-IDO,Indonesia,mas,46
-IDO,Indonesia,pdi,78
-IDO,Indonesia,uai,48
-IND,India,idv,48
-IND,India,ivr,26
-IND,India,ltowvs,51
-IND,India,mas,56
-IND,India,pdi,77
-IND,India,uai,40
-IRA,Iran,idv,41
-IRA,Iran,ivr,40
-IRA,Iran,ltowvs,14
-IRA,Iran,mas,43
-IRA,Iran,pdi,58
-IRA,Iran,uai,59
-IRE,Ireland,idv,70
-IRE,Ireland,ivr,65
-IRE,Ireland,ltowvs,24
-IRE,Ireland,mas,68
-IRE,Ireland,pdi,28
-IRE,Ireland,uai,35
-IRQ,Iraq,idv,25
-IRQ,Iraq,ivr,17
-IRQ,Iraq,ltowvs,25
-IRQ,Iraq,mas,53
-IRQ,Iraq,pdi,97
-IRQ,Iraq,uai,96
-ITA,Italy,idv,76
-ITA,Italy,ivr,30
-ITA,Italy,ltowvs,61
-ITA,Italy,mas,70
-ITA,Italy,pdi,50
-ITA,Italy,uai,75
-JOR,Jordan,idv,20
-JOR,Jordan,ivr,43
-JOR,Jordan,ltowvs,16
-JOR,Jordan,mas,45
-JOR,Jordan,pdi,70
-JOR,Jordan,uai,65
-JPN,Japan,idv,46
-JPN,Japan,ivr,42
-JPN,Japan,ltowvs,88
-JPN,Japan,mas,95
-JPN,Japan,pdi,54
-JPN,Japan,uai,92
-KOR,Korea South,idv,18
-KOR,Korea South,ivr,29
-KOR,Korea South,ltowvs,100
-KOR,Korea South,mas,39
-KOR,Korea South,pdi,60
-KOR,Korea South,uai,85
-LAT,Latvia,idv,70
-LAT,Latvia,ivr,13
-LAT,Latvia,ltowvs,69
-LAT,Latvia,mas,9
-LAT,Latvia,pdi,44
-LAT,Latvia,uai,63
-LIT,Lithuania,idv,60
-LIT,Lithuania,ivr,16
-LIT,Lithuania,ltowvs,82
-LIT,Lithuania,mas,19
-LIT,Lithuania,pdi,42
-LIT,Lithuania,uai,65
-LUX,Luxembourg,idv,60
-LUX,Luxembourg,ivr,56
-LUX,Luxembourg,ltowvs,64
-LUX,Luxembourg,mas,50
-LUX,Luxembourg,pdi,40
-LUX,Luxembourg,uai,70
-MAC,Macedonia Rep,idv,40
-MAC,Macedonia Rep,ivr,35
-MAC,Macedonia Rep,ltowvs,62
-MAC,Macedonia Rep,mas,45
-MAC,Macedonia Rep,pdi,90
-MAC,Macedonia Rep,uai,87
-MAL,Malaysia,idv,26
-MAL,Malaysia,ivr,57
-MAL,Malaysia,ltowvs,41
-MAL,Malaysia,mas,50
-MAL,Malaysia,pdi,100
-MAL,Malaysia,uai,36
-MEX,Mexico,idv,30
-MEX,Mexico,ivr,97
-MEX,Mexico,ltowvs,24
-MEX,Mexico,mas,69
-MEX,Mexico,pdi,81
-MEX,Mexico,uai,82
-MLT,Malta,idv,59
-MLT,Malta,ivr,66
-MLT,Malta,ltowvs,47
-MLT,Malta,mas,47
-MLT,Malta,pdi,56
-MLT,Malta,uai,96
-MNG,Montenegro,idv,27
-MNG,Montenegro,ivr,20
-MNG,Montenegro,ltowvs,75
-MNG,Montenegro,mas,48
-MNG,Montenegro,pdi,88
-MNG,Montenegro,uai,90
-MOL,Moldova,idv,27
-MOL,Moldova,ivr,19
-MOL,Moldova,ltowvs,71
-MOL,Moldova,mas,39
-MOL,Moldova,pdi,90
-MOL,Moldova,uai,95
-MOR,Morocco,idv,46
-MOR,Morocco,ivr,25
-MOR,Morocco,ltowvs,14
-MOR,Morocco,mas,53
-MOR,Morocco,pdi,70
-MOR,Morocco,uai,68
-NET,Netherlands,idv,80
-NET,Netherlands,ivr,68
-NET,Netherlands,ltowvs,67
-NET,Netherlands,mas,14
-NET,Netherlands,pdi,38
-NET,Netherlands,uai,53
-NIG,Nigeria,idv,0
-NIG,Nigeria,ivr,84
-NIG,Nigeria,ltowvs,13
-NIG,Nigeria,mas,60
-NIG,Nigeria,pdi,80
-NIG,Nigeria,uai,55
-NOR,Norway,idv,69
-NOR,Norway,ivr,55
-NOR,Norway,ltowvs,35
-NOR,Norway,mas,8
-NOR,Norway,pdi,31
-NOR,Norway,uai,50
-NZL,New Zealand,idv,79
-NZL,New Zealand,ivr,75
-NZL,New Zealand,ltowvs,33
-NZL,New Zealand,mas,58
-NZL,New Zealand,pdi,22
-NZL,New Zealand,uai,49
-PAK,Pakistan,idv,14
-PAK,Pakistan,ivr,0
-PAK,Pakistan,ltowvs,50
-PAK,Pakistan,mas,50
-PAK,Pakistan,pdi,55
-PAK,Pakistan,uai,70
-PER,Peru,idv,16
-PER,Peru,ivr,46
-PER,Peru,ltowvs,25
-PER,Peru,mas,42
-PER,Peru,pdi,64
-PER,Peru,uai,87
-PHI,Philippines,idv,32
-PHI,Philippines,ivr,42
-PHI,Philippines,ltowvs,27
-PHI,Philippines,mas,64
-PHI,Philippines,pdi,94
-PHI,Philippines,uai,44
-POL,Poland,idv,60
-POL,Poland,ivr,29
-POL,Poland,ltowvs,38
-POL,Poland,mas,64
-POL,Poland,pdi,68
-POL,Poland,uai,93
-POR,Portugal,idv,27
-POR,Portugal,ivr,33
-POR,Portugal,ltowvs,28
-POR,Portugal,mas,31
-POR,Portugal,pdi,63
-POR,Portugal,uai,99
-PUE,Puerto Rico,idv,43
-PUE,Puerto Rico,ivr,90
-PUE,Puerto Rico,ltowvs,0
-PUE,Puerto Rico,mas,56
-PUE,Puerto Rico,pdi,68
-PUE,Puerto Rico,uai,38
-ROM,Romania,idv,30
-ROM,Romania,ivr,20
-ROM,Romania,ltowvs,52
-ROM,Romania,mas,42
-ROM,Romania,pdi,90
-ROM,Romania,uai,90
-RUS,Russia,idv,39
-RUS,Russia,ivr,20
-RUS,Russia,ltowvs,81
-RUS,Russia,mas,36
-RUS,Russia,pdi,93
-RUS,Russia,uai,95
-SAF,South Africa,idv,23
-SAF,South Africa,ivr,63
-SAF,South Africa,ltowvs,34
-SAF,South Africa,mas,63
-SAF,South Africa,pdi,49
-SAF,South Africa,uai,49
-SAL,El Salvador,idv,19
-SAL,El Salvador,ivr,89
-SAL,El Salvador,ltowvs,20
-SAL,El Salvador,mas,40
-SAL,El Salvador,pdi,66
-SAL,El Salvador,uai,94
-SAU,Saudi Arabia,idv,48
-SAU,Saudi Arabia,ivr,52
-SAU,Saudi Arabia,ltowvs,36
-SAU,Saudi Arabia,mas,43
-SAU,Saudi Arabia,pdi,72
-SAU,Saudi Arabia,uai,64
-SER,Serbia,idv,25
-SER,Serbia,ivr,28
-SER,Serbia,ltowvs,52
-SER,Serbia,mas,43
-SER,Serbia,pdi,86
-SER,Serbia,uai,92
-SIN,Singapore,idv,20
-SIN,Singapore,ivr,46
-SIN,Singapore,ltowvs,72
-SIN,Singapore,mas,48
-SIN,Singapore,pdi,74
-SIN,Singapore,uai,8
-SLK,Slovak Rep,idv,52
-SLK,Slovak Rep,ivr,28
-SLK,Slovak Rep,ltowvs,77
-SLK,Slovak Rep,mas,100
-SLK,Slovak Rep,pdi,100
-SLK,Slovak Rep,uai,51
-SLV,Slovenia,idv,27
-SLV,Slovenia,ivr,48
-SLV,Slovenia,ltowvs,49
-SLV,Slovenia,mas,19
-SLV,Slovenia,pdi,71
-SLV,Slovenia,uai,88
-SPA,Spain,idv,51
-SPA,Spain,ivr,44
-SPA,Spain,ltowvs,48
-SPA,Spain,mas,42
-SPA,Spain,pdi,57
-SPA,Spain,uai,86
-SWE,Sweden,idv,71
-SWE,Sweden,ivr,78
-SWE,Sweden,ltowvs,53
-SWE,Sweden,mas,5
-SWE,Sweden,pdi,31
-SWE,Sweden,uai,29
-SWI,Switzerland,idv,68
-SWI,Switzerland,ivr,66
-SWI,Switzerland,ltowvs,74
-SWI,Switzerland,mas,70
-SWI,Switzerland,pdi,34
-SWI,Switzerland,uai,58
-TAI,Taiwan,idv,17
-TAI,Taiwan,ivr,49
-TAI,Taiwan,ltowvs,93
-TAI,Taiwan,mas,45
-TAI,Taiwan,pdi,58
-TAI,Taiwan,uai,69
-TAN,Tanzania,idv,25
-TAN,Tanzania,ivr,38
-TAN,Tanzania,ltowvs,34
-TAN,Tanzania,mas,40
-TAN,Tanzania,pdi,70
-TAN,Tanzania,uai,50
-THA,Thailand,idv,20
-THA,Thailand,ivr,45
-THA,Thailand,ltowvs,32
-THA,Thailand,mas,34
-THA,Thailand,pdi,64
-THA,Thailand,uai,64
-TRI,Trinidad and Tobago,idv,16
-TRI,Trinidad and Tobago,ivr,80
-TRI,Trinidad and Tobago,ltowvs,13
-TRI,Trinidad and Tobago,mas,58
-TRI,Trinidad and Tobago,pdi,47
-TRI,Trinidad and Tobago,uai,55
-TUR,Turkey,idv,37
-TUR,Turkey,ivr,49
-TUR,Turkey,ltowvs,46
-TUR,Turkey,mas,45
-TUR,Turkey,pdi,66
-TUR,Turkey,uai,85
-UKR,Ukraine,idv,55
-UKR,Ukraine,ivr,14
-UKR,Ukraine,ltowvs,86
-UKR,Ukraine,mas,27
-UKR,Ukraine,pdi,92
-UKR,Ukraine,uai,95
-URU,Uruguay,idv,36
-URU,Uruguay,ivr,53
-URU,Uruguay,ltowvs,26
-URU,Uruguay,mas,38
-URU,Uruguay,pdi,61
-URU,Uruguay,uai,98
-USA,U.S.A.,idv,91
-USA,U.S.A.,ivr,68
-USA,U.S.A.,ltowvs,26
-USA,U.S.A.,mas,62
-USA,U.S.A.,pdi,40
-USA,U.S.A.,uai,46
-VEN,Venezuela,idv,12
-VEN,Venezuela,ivr,100
-VEN,Venezuela,ltowvs,16
-VEN,Venezuela,mas,73
-VEN,Venezuela,pdi,81
-VEN,Venezuela,uai,76
-VIE,Vietnam,idv,20
-VIE,Vietnam,ivr,35
-VIE,Vietnam,ltowvs,57
-VIE,Vietnam,mas,40
-VIE,Vietnam,pdi,70
-VIE,Vietnam,uai,30
-ZAM,Zambia,idv,35
-ZAM,Zambia,ivr,42
-ZAM,Zambia,ltowvs,30
-ZAM,Zambia,mas,40
-ZAM,Zambia,pdi,60
-ZAM,Zambia,uai,50
-"""
-
-
 
 # Save to JSON
 output_path="culture_map_data.json"
@@ -623,30 +83,13 @@ with open(output_path, "w") as json_file:
     json.dump(culture_map_data, json_file, indent=4)
 print(f"Data saved to {output_path}")
 
-data = pd.read_csv(StringIO(hofstede_data))
-
-# Convert the data into the hierarchical JSON structure
-hierarchical_data = []
-unique_countries = data["country"].unique()
-
-for country in unique_countries:
-    country_data = data[data["country"] == country]
-    scores = {
-        row["cultural dimension"]: int(row["Value"])  # Convert to Python int
-        for _, row in country_data.iterrows()
-    }
-    hierarchical_data.append({
-        "id": int(country_data.index[0]),  # Convert index to int
-        "name": country,
-        "datamapId": country_data.iloc[0]["ctr"],
-        "isoCode": None,  # Add ISO codes if available
-        "isoShortCode": None,  # Add short ISO codes if available
-        "scores": scores
-    })
+# %%
+# The Hofstede scores are stored in long format (ctr, country, cultural dimension, Value)
+# and converted by the chunked ingestion pipeline, see ingest.py
+hierarchical_data = ingest_long_csv("data/raw/hofstede_long.csv")
 
 # Save to a JSON file
 output_path = "hofstede_data.json"
-with open(output_path, "w") as json_file:
-    json.dump(hierarchical_data, json_file, indent=4)
+write_records(hierarchical_data, output_path)
 
-print(f"Data saved to {output_path}")
\ No newline at end of file
+print(f"Data saved to {output_path}")
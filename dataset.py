@@ -0,0 +1,214 @@
+# dataset.py
+# Compiled, columnar form of the data/*_data.json files. The JSON files stay the
+# editable source; the compiled artifact is rebuilt whenever they change.
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from cache import records_fingerprint
+from masked import masked_variances
+
+DATASET_CACHE_DIR = Path(".cache") / "datasets"
+ARTIFACT_VERSION = 1
+MISSING_SCORE = -1  # Missing value in the JSON records
+MISSING_UINT8 = 255  # Missing value in compiled uint8 score matrices
+
+# Bundled datasets by name, used by the batch jobs and the command line
+DEFAULT_DATASETS = {
+    "hofstede": {"path": "data/hofstede_data.json", "title": "Hofstede Data"},
+    "culture_map": {"path": "data/culture_map_data.json", "title": "Culture Map Data"},
+}
+
+
+class Dataset:
+    """
+    Dataset records held as a score matrix plus per-record metadata columns.
+
+    Iterating, indexing and `len` behave like the list of record dicts loaded from
+    the JSON file, so a Dataset can be passed wherever records are expected. The
+    distance functions use the matrix directly (see `prepare`).
+
+    Args:
+        names (list of str): Record names.
+        dimensions (list of str): Score dimensions, in record order.
+        scores (np.ndarray): Score matrix (uint8 with MISSING_UINT8, or float with NaN for missing values).
+        fields (dict): Other record fields, each a list aligned with `names`.
+        fingerprint (str): `cache.records_fingerprint` of the source records.
+    """
+
+    def __init__(self, names, dimensions, scores, fields, fingerprint):
+        self.names = list(names)
+        self.dimensions = list(dimensions)
+        self.scores = scores
+        self.fields = fields
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_records(cls, records):
+        """Compile a list of record dicts into a Dataset."""
+        dimensions = list(dict.fromkeys(key for item in records for key in item["scores"]))
+        values = np.array(
+            [[item["scores"].get(dimension, MISSING_SCORE) for dimension in dimensions] for item in records],
+            dtype=float,
+        ).reshape(len(records), len(dimensions))
+        missing = values == MISSING_SCORE
+        present = values[~missing]
+        if np.all((present == np.round(present)) & (present >= 0) & (present < MISSING_UINT8)):
+            scores = np.where(missing, MISSING_UINT8, values).astype(np.uint8)
+        else:
+            scores = np.where(missing, np.nan, values)
+        keys = [key for key in (records[0] if records else {}) if key not in ("name", "scores")]
+        fields = {key: [item.get(key) for item in records] for key in keys}
+        return cls([item["name"] for item in records], dimensions, scores, fields, records_fingerprint(records))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self.names)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        record = {key: column[i] for key, column in self.fields.items()}
+        record["name"] = self.names[i]
+        row = self.scores[i]
+        if self.scores.dtype == np.uint8:
+            values = [MISSING_SCORE if value == MISSING_UINT8 else value for value in row.tolist()]
+        else:
+            values = [MISSING_SCORE if np.isnan(value) else value for value in row.tolist()]
+        record["scores"] = dict(zip(self.dimensions, values))
+        return record
+
+    def __repr__(self):
+        return f"Dataset(records={len(self.names)}, dimensions={len(self.dimensions)}, dtype={self.scores.dtype})"
+
+    def missing_mask(self):
+        """Boolean matrix marking missing scores."""
+        if self.scores.dtype == np.uint8:
+            return self.scores == MISSING_UINT8
+        return np.isnan(self.scores)
+
+    def prepare(self):
+        """
+        Fast path of `functions.prepare_scores` working on the matrix directly.
+
+        Returns:
+            tuple: (list of names, float score matrix without incomplete dimensions, per-dimension variances)
+        """
+        complete = ~self.missing_mask().any(axis=0)
+        scores = self.scores[:, complete].astype(float)
+        return self.names, scores, scores.var(axis=0, ddof=1)
+
+    def prepare_masked(self):
+        """
+        Fast path of `functions.prepare_masked_scores`.
+
+        Returns:
+            tuple: (list of names, float score matrix with NaN for missing values, per-dimension variances)
+        """
+        scores = np.where(self.missing_mask(), np.nan, self.scores.astype(float))
+        return self.names, scores, masked_variances(scores)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _artifact_paths(source, cache_dir):
+    # Sources with the same file name in different directories get separate artifacts
+    location = hashlib.sha256(str(Path(source).resolve()).encode("utf-8")).hexdigest()[:12]
+    stem = f"{Path(source).stem}-{location}"
+    return Path(cache_dir) / f"{stem}.scores.npy", Path(cache_dir) / f"{stem}.meta.json"
+
+
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def compile_dataset(source, cache_dir=DATASET_CACHE_DIR):
+    """
+    Parse a JSON dataset and write its compiled artifact.
+
+    Args:
+        source (str): Path of the JSON source file.
+        cache_dir (str or Path): Directory of the compiled artifacts.
+
+    Returns:
+        Dataset: The compiled dataset.
+    """
+    stat = os.stat(source)
+    with open(source, "r") as f:
+        dataset = Dataset.from_records(json.load(f))
+    meta = {
+        "version": ARTIFACT_VERSION,
+        "source": {"path": str(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _file_digest(source)},
+        "names": dataset.names,
+        "dimensions": dataset.dimensions,
+        "fields": dataset.fields,
+        "fingerprint": dataset.fingerprint,
+    }
+    scores_path, meta_path = _artifact_paths(source, cache_dir)
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        _write_atomic(scores_path, lambda f: np.save(f, dataset.scores))
+        _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    except OSError as e:
+        print(f"Error writing compiled dataset: {e}")
+    return dataset
+
+
+def load_dataset(source, cache_dir=DATASET_CACHE_DIR):
+    """
+    Load a dataset from its compiled artifact, rebuilding it when the source changed.
+
+    The artifact is trusted while the source's size and mtime match. If only the
+    mtime changed (e.g. after a checkout), the content hash decides; an unchanged
+    hash just refreshes the stored mtime. The score matrix is memory-mapped.
+
+    Args:
+        source (str): Path of the JSON source file.
+        cache_dir (str or Path): Directory of the compiled artifacts.
+
+    Returns:
+        Dataset: The dataset.
+    """
+    scores_path, meta_path = _artifact_paths(source, cache_dir)
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return compile_dataset(source, cache_dir)
+
+    stat = os.stat(source)
+    stored = meta.get("source", {})
+    if meta.get("version") != ARTIFACT_VERSION or stored.get("size") != stat.st_size:
+        return compile_dataset(source, cache_dir)
+    if stored.get("mtime_ns") != stat.st_mtime_ns:
+        if stored.get("sha256") != _file_digest(source):
+            return compile_dataset(source, cache_dir)
+        stored["mtime_ns"] = stat.st_mtime_ns
+        try:
+            _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+        except OSError:
+            pass
+
+    try:
+        scores = np.load(scores_path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError):
+        return compile_dataset(source, cache_dir)
+    return Dataset(meta["names"], meta["dimensions"], scores, meta["fields"], meta["fingerprint"])
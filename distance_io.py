@@ -0,0 +1,197 @@
+# distance_io.py
+import json
+from pathlib import Path
+
+import numpy as np
+
+from distance_matrix import DistanceMatrix, as_distance_matrix
+
+EXPORT_FORMATS = ("csv", "npy", "npz", "raw", "parquet")
+PARQUET_BATCH_SIZE = 1_000_000  # Pairs per row group when writing edge lists
+
+
+def _stem(title):
+    return f"{title.replace(' ', '_').lower()}_distances"
+
+
+def _with_extension(path, extension):
+    # Appended rather than set with `with_suffix`, which would cut titles like "... (cos.)" at their last dot
+    path = Path(path)
+    return path if path.name.endswith(extension) else path.with_name(path.name + extension)
+
+
+def export_distances(distance_df, title, fmt="csv", directory="data"):
+    """
+    Export a distance matrix in one of the supported formats.
+
+    Formats:
+        csv: Dense labelled matrix as text (`<stem>.csv`).
+        npy: Condensed vector (`<stem>.npy`) with a label sidecar (`<stem>.labels.json`).
+        npz: Condensed vector and labels in one uncompressed archive (`<stem>.npz`); unlike
+            npy and raw, it is read into memory as a whole when loaded.
+        raw: Memory-mappable float64 condensed vector (`<stem>.f64`) with a JSON header (`<stem>.header.json`).
+        parquet: Long-format edge list with columns country1, country2, distance (`<stem>.parquet`).
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        title (str): Title used to derive the file name.
+        fmt (str): One of EXPORT_FORMATS.
+        directory (str): Output directory.
+
+    Returns:
+        str: Name of the written file, or None if the export failed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from {', '.join(EXPORT_FORMATS)}.")
+    distance_matrix = as_distance_matrix(distance_df)
+    path = Path(directory) / _stem(title)
+    writer = {
+        "csv": save_csv,
+        "npy": save_npy,
+        "npz": save_npz,
+        "raw": save_raw,
+        "parquet": save_parquet,
+    }[fmt]
+    try:
+        return writer(distance_matrix, path).name
+    except Exception as e:
+        print(f"Error exporting distances: {e}")
+
+
+def save_csv(distance_matrix, path):
+    path = _with_extension(path, ".csv")
+    distance_matrix.to_dataframe().to_csv(path)
+    return path
+
+
+def save_npy(distance_matrix, path):
+    path = _with_extension(path, ".npy")
+    np.save(path, np.asarray(distance_matrix.condensed, dtype=np.float64))
+    with open(path.with_suffix(".labels.json"), "w") as f:
+        json.dump(distance_matrix.labels, f)
+    return path
+
+
+def save_npz(distance_matrix, path):
+    path = _with_extension(path, ".npz")
+    np.savez(
+        path,
+        condensed=np.asarray(distance_matrix.condensed, dtype=np.float64),
+        labels=np.asarray(distance_matrix.labels, dtype=str),
+    )
+    return path
+
+
+def save_raw(distance_matrix, path):
+    path = _with_extension(path, ".f64")
+    condensed = np.asarray(distance_matrix.condensed, dtype="<f8")
+    condensed.tofile(path)
+    write_raw_header(path, distance_matrix.labels)
+    return path
+
+
+def write_raw_header(path, labels):
+    """Write the JSON header describing a raw condensed `.f64` file."""
+    header = {"layout": "condensed", "dtype": "<f8", "n": len(labels), "labels": list(labels)}
+    with open(Path(path).with_suffix(".header.json"), "w") as f:
+        json.dump(header, f)
+
+
+def save_parquet(distance_matrix, path, batch_size=PARQUET_BATCH_SIZE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = _with_extension(path, ".parquet")
+    # Country names are dictionary-encoded, so each row only stores two small integers
+    dictionary = pa.array(distance_matrix.labels, type=pa.string())
+    schema = pa.schema(
+        [
+            ("country1", pa.dictionary(pa.int32(), pa.string())),
+            ("country2", pa.dictionary(pa.int32(), pa.string())),
+            ("distance", pa.float64()),
+        ],
+        metadata={"labels": json.dumps(distance_matrix.labels)},
+    )
+    condensed = distance_matrix.condensed
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, condensed.size, batch_size):
+            k = np.arange(start, min(start + batch_size, condensed.size))
+            i, j = distance_matrix.pair_at(k)
+            batch = pa.record_batch(
+                [
+                    pa.DictionaryArray.from_arrays(pa.array(i.astype(np.int32)), dictionary),
+                    pa.DictionaryArray.from_arrays(pa.array(j.astype(np.int32)), dictionary),
+                    pa.array(np.asarray(condensed[start:start + k.size], dtype=np.float64)),
+                ],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+    return path
+
+
+def load_distances(path):
+    """
+    Load a distance matrix written by `export_distances`.
+
+    Binary formats are opened without parsing: `.npy` and `.f64` files are
+    memory-mapped and Parquet files are read through Arrow's memory map.
+    `.npz` archives cannot be memory-mapped by numpy, so their condensed vector
+    is read into memory in full; use npy or raw for matrices larger than memory.
+
+    Args:
+        path (str or Path): Path of the exported file.
+
+    Returns:
+        DistanceMatrix: The loaded distance matrix.
+    """
+    path = Path(path)
+    loader = {
+        ".csv": load_csv,
+        ".npy": load_npy,
+        ".npz": load_npz,
+        ".f64": load_raw,
+        ".parquet": load_parquet,
+    }.get(path.suffix)
+    if loader is None:
+        raise ValueError(f"Unsupported distance file '{path}'.")
+    return loader(path)
+
+
+def load_csv(path):
+    import pandas as pd
+    return DistanceMatrix.from_dataframe(pd.read_csv(path, index_col=0))
+
+
+def load_npy(path):
+    path = Path(path)
+    with open(path.with_suffix(".labels.json")) as f:
+        labels = json.load(f)
+    return DistanceMatrix(np.load(path, mmap_mode="r"), labels)
+
+
+def load_npz(path):
+    # Not lazy: numpy reads archive members into memory
+    with np.load(path, allow_pickle=False) as archive:
+        return DistanceMatrix(archive["condensed"], archive["labels"].tolist())
+
+
+def load_raw(path, mode="r"):
+    path = Path(path)
+    with open(path.with_suffix(".header.json")) as f:
+        header = json.load(f)
+    n = header["n"]
+    condensed = np.memmap(path, dtype=header["dtype"], mode=mode, shape=(n * (n - 1) // 2,))
+    return DistanceMatrix(condensed, header["labels"])
+
+
+def load_parquet(path):
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=["distance"], memory_map=True)
+    labels = json.loads(table.schema.metadata[b"labels"])
+    column = table.column("distance")
+    if column.num_chunks == 1:
+        condensed = column.chunk(0).to_numpy(zero_copy_only=True)
+    else:
+        condensed = column.to_numpy()
+    return DistanceMatrix(condensed, labels)
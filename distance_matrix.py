@@ -0,0 +1,184 @@
+# distance_matrix.py
+import hashlib
+import json
+
+import numpy as np
+
+
+class DistanceMatrix:
+    """
+    Symmetric distance matrix backed by its condensed upper-triangle vector.
+
+    The condensed layout is the one produced by `scipy.spatial.distance.pdist`:
+    the distance between entities i < j is stored at
+    ``n * i - i * (i + 1) // 2 + (j - i - 1)``. Only n * (n - 1) / 2 values are
+    kept in memory; a dense DataFrame is built lazily when it is requested.
+
+    Args:
+        condensed (np.ndarray): Condensed distance vector.
+        labels (list of str): Entity names in matrix order.
+    """
+
+    def __init__(self, condensed, labels):
+        self.condensed = np.asarray(condensed)
+        self.labels = list(labels)
+        self.n = len(self.labels)
+        if self.condensed.shape != (self.n * (self.n - 1) // 2,):
+            raise ValueError(
+                f"Condensed vector of length {self.condensed.shape} does not match {self.n} labels."
+            )
+        self._positions = {label: i for i, label in enumerate(self.labels)}
+        if len(self._positions) != self.n:
+            raise ValueError("Distance matrix labels must be unique.")
+        self._dataframe = None
+        self._fingerprint = None
+
+    @classmethod
+    def from_dataframe(cls, distance_df):
+        """Build a DistanceMatrix from a square, labelled distance DataFrame."""
+        values = distance_df.values
+        i, j = np.triu_indices(values.shape[0], k=1)
+        return cls(values[i, j], distance_df.index.tolist())
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, label):
+        return label in self._positions
+
+    def __repr__(self):
+        return f"DistanceMatrix(n={self.n}, pairs={self.condensed.size})"
+
+    def fingerprint(self):
+        """Return a content hash of the distances and labels (computed once)."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256(np.ascontiguousarray(self.condensed, dtype=np.float64).tobytes())
+            digest.update(json.dumps(self.labels).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def index(self):
+        """Entity labels as a pandas Index, mirroring the DataFrame interface."""
+        import pandas as pd
+        return pd.Index(self.labels)
+
+    @property
+    def shape(self):
+        return (self.n, self.n)
+
+    def position(self, label):
+        """Return the matrix position of an entity."""
+        return self._positions[label]
+
+    def positions(self, labels):
+        """Return the matrix positions of several entities as an integer array."""
+        return np.fromiter((self._positions[label] for label in labels), dtype=np.intp, count=len(labels))
+
+    def condensed_index(self, i, j):
+        """
+        Map matrix positions to condensed positions (vectorized).
+
+        Args:
+            i, j (int or np.ndarray): Matrix positions with i != j.
+
+        Returns:
+            int or np.ndarray: Positions in the condensed vector.
+        """
+        i, j = np.minimum(i, j), np.maximum(i, j)
+        return self.n * i - i * (i + 1) // 2 + (j - i - 1)
+
+    def pair_at(self, k):
+        """
+        Map condensed positions back to matrix positions (vectorized).
+
+        Args:
+            k (int or np.ndarray): Positions in the condensed vector.
+
+        Returns:
+            tuple: Row and column positions with row < column.
+        """
+        k = np.asarray(k, dtype=np.int64)
+        n = self.n
+        # Invert the triangular offset n * i - i * (i + 1) / 2 for the row
+        i = (n - 2 - np.floor(np.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2.0 - 0.5)).astype(np.int64)
+        j = k + i + 1 - n * (n - 1) // 2 + (n - i) * (n - i - 1) // 2
+        return i, j
+
+    def distance(self, label1, label2):
+        """Return the distance between two entities in O(1)."""
+        i, j = self._positions[label1], self._positions[label2]
+        if i == j:
+            return 0.0
+        return float(self.condensed[self.condensed_index(i, j)])
+
+    def take(self, i, j):
+        """
+        Gather distances for arrays of matrix positions in one call.
+
+        Args:
+            i, j (np.ndarray): Matrix positions of equal shape.
+
+        Returns:
+            np.ndarray: Distances, zero where i == j.
+        """
+        i, j = np.asarray(i, dtype=np.intp), np.asarray(j, dtype=np.intp)
+        same = i == j
+        # Point self-pairs at a valid dummy slot and zero them afterwards
+        k = self.condensed_index(i, np.where(same, (i + 1) % max(self.n, 1), j))
+        values = self.condensed[k]
+        return np.where(same, 0.0, values)
+
+    def row(self, label):
+        """Return all distances from one entity as an array in matrix order."""
+        i = self._positions[label]
+        return self.take(np.full(self.n, i), np.arange(self.n))
+
+    def row_series(self, label, exclude_self=True):
+        """Return all distances from one entity as a labelled Series."""
+        import pandas as pd
+        series = pd.Series(self.row(label), index=self.labels, name=label)
+        if exclude_self:
+            series = series.drop(label)
+        return series
+
+    def submatrix(self, labels):
+        """Return the DistanceMatrix restricted to the given entities, in the given order."""
+        idx = self.positions(labels)
+        i, j = np.triu_indices(len(idx), k=1)
+        return DistanceMatrix(self.take(idx[i], idx[j]), labels)
+
+    def to_numpy(self):
+        """Return the dense square matrix as a NumPy array."""
+        from scipy.spatial.distance import squareform
+        return squareform(self.condensed, checks=False)
+
+    @property
+    def values(self):
+        """Dense square matrix, mirroring the DataFrame interface."""
+        return self.to_numpy()
+
+    def to_dataframe(self):
+        """Return the dense square matrix as a labelled DataFrame (built once on demand)."""
+        if self._dataframe is None:
+            import pandas as pd
+            self._dataframe = pd.DataFrame(self.to_numpy(), index=self.labels, columns=self.labels)
+        return self._dataframe
+
+
+def as_distance_matrix(distances):
+    """
+    Accept either a DistanceMatrix or a square distance DataFrame.
+
+    Args:
+        distances (DistanceMatrix or pd.DataFrame): Distance matrix.
+
+    Returns:
+        DistanceMatrix: Condensed distance matrix.
+    """
+    if isinstance(distances, DistanceMatrix):
+        return distances
+    import pandas as pd
+    if isinstance(distances, pd.DataFrame):
+        return DistanceMatrix.from_dataframe(distances)
+    raise TypeError(f"Expected a DistanceMatrix or DataFrame, got {type(distances).__name__}.")
@@ -0,0 +1,330 @@
+# embeddings.py
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from cache import LRUMemo, evict_cache_entries
+from distance_matrix import as_distance_matrix
+
+EMBEDDING_CACHE_DIR = Path(".cache") / "embeddings"
+EMBEDDING_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Evict least recently used coordinates above 64 MB
+
+# Parameters of each embedding method; they are part of the store key
+EMBEDDING_DEFAULTS = {
+    "mds": {"n_components": 2, "random_state": 42},
+    "cmds": {"n_components": 2},
+    "cmds_smacof": {"n_components": 2, "random_state": 42},
+    "lmds": {"n_components": 2, "n_landmarks": 50, "random_state": 42},
+    "tsne": {"n_components": 2, "init": "random", "random_state": 42},
+}
+
+# Engines that can be used wherever the plots need MDS coordinates
+MDS_ENGINES = ("mds", "cmds", "cmds_smacof", "lmds")
+
+
+def fit_embedding(distance_matrix, method, params):
+    """
+    Fit an embedding of a precomputed distance matrix.
+
+    Methods:
+        mds: scikit-learn's SMACOF with its default random initializations.
+        cmds: Classical (Torgerson) MDS, a single eigendecomposition.
+        cmds_smacof: One SMACOF run seeded with the classical MDS solution.
+        lmds: Landmark MDS; only the landmark distances are decomposed and the
+            remaining entities are triangulated, so no dense matrix is needed.
+        tsne: scikit-learn's t-SNE.
+
+    Args:
+        distance_matrix (DistanceMatrix): The distance matrix.
+        method (str): One of EMBEDDING_DEFAULTS.
+        params (dict): Complete method parameters.
+
+    Returns:
+        np.ndarray: Coordinates of shape (n, n_components).
+    """
+    if method == "mds":
+        from sklearn.manifold import MDS
+        return MDS(dissimilarity="precomputed", **params).fit_transform(distance_matrix.to_numpy())
+    if method == "cmds":
+        return classical_mds(distance_matrix.to_numpy(), **params)
+    if method == "cmds_smacof":
+        from sklearn.manifold import MDS
+        square = distance_matrix.to_numpy()
+        init = classical_mds(square, n_components=params["n_components"])
+        return MDS(dissimilarity="precomputed", n_init=1, **params).fit_transform(square, init=init)
+    if method == "lmds":
+        return landmark_mds(distance_matrix, **params)
+    if method == "tsne":
+        from sklearn.manifold import TSNE
+        return TSNE(metric="precomputed", **params).fit_transform(distance_matrix.to_numpy())
+    raise ValueError(f"Unknown embedding method '{method}'. Choose from {', '.join(EMBEDDING_DEFAULTS)}.")
+
+
+def _top_eigenpairs(b, n_components):
+    """Largest eigenvalues (clipped at zero) and eigenvectors of a symmetric matrix."""
+    n = b.shape[0]
+    if n > 200 and n_components < n - 1:
+        # Only the top eigenpairs are needed: Lanczos iterations cost O(n^2) each
+        # instead of the O(n^3) of a full decomposition
+        from scipy.sparse.linalg import eigsh
+        eigenvalues, eigenvectors = eigsh(b, k=n_components, which="LA", v0=np.random.default_rng(0).standard_normal(n))
+    else:
+        eigenvalues, eigenvectors = np.linalg.eigh(b)
+        eigenvalues, eigenvectors = eigenvalues[-n_components:], eigenvectors[:, -n_components:]
+    order = np.argsort(eigenvalues)[::-1]
+    return np.clip(eigenvalues[order], 0, None), eigenvectors[:, order]
+
+
+def classical_mds(square, n_components=2):
+    """
+    Classical (Torgerson) MDS of a dense distance matrix.
+
+    The squared distances are double-centred into a Gram matrix whose top
+    eigenvectors, scaled by the square roots of their eigenvalues, give the
+    coordinates.
+
+    Args:
+        square (np.ndarray): Dense square distance matrix.
+        n_components (int): Number of output dimensions.
+
+    Returns:
+        np.ndarray: Coordinates of shape (n, n_components).
+    """
+    squared = np.asarray(square, dtype=float) ** 2
+    # Double centring: B = -1/2 * J D^2 J with J = I - 11'/n
+    row_means = squared.mean(axis=1, keepdims=True)
+    b = -0.5 * (squared - row_means - row_means.T + squared.mean())
+    eigenvalues, eigenvectors = _top_eigenpairs(b, n_components)
+    return eigenvectors * np.sqrt(eigenvalues)
+
+
+def select_landmarks(distance_matrix, n_landmarks, random_state=42):
+    """
+    Pick well-spread landmarks by max-min (farthest point) selection.
+
+    Returns:
+        np.ndarray: Matrix positions of the landmarks.
+    """
+    n = distance_matrix.n
+    n_landmarks = min(n_landmarks, n)
+    rng = np.random.default_rng(random_state)
+    landmarks = [int(rng.integers(n))]
+    nearest = distance_matrix.row(distance_matrix.labels[landmarks[0]])
+    for _ in range(n_landmarks - 1):
+        landmarks.append(int(np.argmax(nearest)))
+        nearest = np.minimum(nearest, distance_matrix.row(distance_matrix.labels[landmarks[-1]]))
+    return np.asarray(landmarks, dtype=np.intp)
+
+
+def landmark_mds(distance_matrix, n_components=2, n_landmarks=50, random_state=42):
+    """
+    Landmark MDS (de Silva & Tenenbaum).
+
+    Classical MDS is run on the landmark submatrix only; every other entity is
+    placed by distance-based triangulation from its distances to the landmarks.
+    Time and memory are O(n * n_landmarks) instead of O(n^2).
+
+    Args:
+        distance_matrix (DistanceMatrix): The distance matrix.
+        n_components (int): Number of output dimensions.
+        n_landmarks (int): Number of landmarks.
+        random_state (int): Seed of the first landmark.
+
+    Returns:
+        np.ndarray: Coordinates of shape (n, n_components).
+    """
+    landmarks = select_landmarks(distance_matrix, max(n_landmarks, n_components + 1), random_state)
+    squared = distance_matrix.take(landmarks[:, None], landmarks[None, :]) ** 2
+
+    row_means = squared.mean(axis=1, keepdims=True)
+    b = -0.5 * (squared - row_means - row_means.T + squared.mean())
+    eigenvalues, eigenvectors = _top_eigenpairs(b, n_components)
+    positive = eigenvalues > 0
+    pseudo_inverse = np.zeros_like(eigenvectors)
+    pseudo_inverse[:, positive] = eigenvectors[:, positive] / np.sqrt(eigenvalues[positive])
+
+    # Squared distances of every entity to the landmarks, shape (n, n_landmarks)
+    to_landmarks = distance_matrix.take(np.arange(distance_matrix.n)[:, None], landmarks[None, :]) ** 2
+    return -0.5 * (to_landmarks - squared.mean(axis=0)) @ pseudo_inverse
+
+
+
+def squared_row_means(distance_matrix):
+    """
+    Mean squared distance of every entity to all entities (itself included).
+
+    Walks the condensed vector one row segment at a time, so no dense matrix is built.
+
+    Args:
+        distance_matrix (DistanceMatrix): The distance matrix.
+
+    Returns:
+        np.ndarray: Mean squared distance per entity, in matrix order.
+    """
+    n = distance_matrix.n
+    sums = np.zeros(n)
+    start = 0
+    for i in range(n - 1):
+        segment = distance_matrix.condensed[start:start + n - i - 1] ** 2
+        sums[i] += segment.sum()
+        sums[i + 1:] += segment
+        start += n - i - 1
+    return sums / max(n, 1)
+
+
+class EmbeddingInterpolator:
+    """
+    Place new entities into a fitted embedding without refitting it (Gower interpolation).
+
+    For centred reference coordinates X and a new entity with squared distances
+    d² to the reference entities, the position y solving
+    ``X y = -1/2 (d² - mean squared reference distances)`` in the least-squares
+    sense is the one whose inner products with the reference points best match
+    the double-centred distances. It coincides with landmark-MDS triangulation
+    and is exact for classical MDS; for SMACOF and t-SNE layouts it is the
+    closest linear placement. The reference coordinates never move.
+
+    All terms that depend only on the reference set are computed once, so placing
+    a new entity is a single (n x dims) product.
+
+    Args:
+        distance_matrix (DistanceMatrix or pd.DataFrame): Distances between the reference entities.
+        coordinates (np.ndarray): Fitted coordinates of the reference entities, in matrix order.
+    """
+
+    def __init__(self, distance_matrix, coordinates):
+        self.distance_matrix = as_distance_matrix(distance_matrix)
+        self.coordinates = np.asarray(coordinates, dtype=float)
+        if self.coordinates.shape[0] != self.distance_matrix.n:
+            raise ValueError(
+                f"{self.coordinates.shape[0]} coordinates do not match {self.distance_matrix.n} reference entities."
+            )
+        self.labels = self.distance_matrix.labels
+        self._center = self.coordinates.mean(axis=0)
+        # Least-squares solver (X'X)^-1 X' of the centred reference coordinates
+        self._solver = np.linalg.pinv(self.coordinates - self._center)
+        self._mean_squared = squared_row_means(self.distance_matrix)
+
+    @classmethod
+    def from_embedding(cls, distance_df, method="mds", **params):
+        """Build an interpolator on the memoized embedding of the whole matrix (see `get_embedding`)."""
+        distance_matrix = as_distance_matrix(distance_df)
+        return cls(distance_matrix, get_embedding(distance_matrix, method, **params))
+
+    def place(self, distances):
+        """
+        Coordinates of new entities from their distances to the reference entities.
+
+        Args:
+            distances (np.ndarray): Shape (n,) for one entity or (m, n) for several,
+                columns in the reference matrix order.
+
+        Returns:
+            np.ndarray: Coordinates of shape (dims,) or (m, dims).
+        """
+        distances = np.asarray(distances, dtype=float)
+        if distances.shape[-1] != len(self.labels):
+            raise ValueError(f"Expected distances to {len(self.labels)} reference entities, got {distances.shape[-1]}.")
+        return self._center + (-0.5 * (distances ** 2 - self._mean_squared)) @ self._solver.T
+
+
+class EmbeddingStore:
+    """
+    Memoized embeddings keyed by (matrix hash, method, parameters, subset).
+
+    Recently used coordinates are kept in an in-memory LRU. With a cache
+    directory they are also written to disk as `.npy` files, so other
+    processes (scheduler workers, later sessions) reuse them too; the least
+    recently used files are evicted once the directory exceeds `max_bytes`.
+
+    Args:
+        max_entries (int): Number of embeddings kept in memory.
+        cache_dir (str or Path): Directory for persisted coordinates, or None to keep them in memory only.
+        max_bytes (int): Size bound of the cache directory.
+    """
+
+    def __init__(self, max_entries=32, cache_dir=EMBEDDING_CACHE_DIR, max_bytes=EMBEDDING_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_bytes = max_bytes
+        # Read by the menu while the background precompute tasks fill it
+        self._entries = LRUMemo(max_entries)
+
+    def key(self, distance_matrix, method, params, subset=None):
+        header = json.dumps(
+            {"matrix": distance_matrix.fingerprint(), "method": method, "params": params, "subset": subset},
+            sort_keys=True,
+        )
+        return hashlib.sha256(header.encode("utf-8")).hexdigest()
+
+    def get(self, distance_df, method="mds", subset=None, **params):
+        """
+        Return the embedding coordinates, fitting them only on a miss.
+
+        Args:
+            distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+            method (str): Embedding method, one of EMBEDDING_DEFAULTS.
+            subset (list of str): Entities to embed, in order. None embeds all of them.
+            **params: Overrides of the method's default parameters.
+
+        Returns:
+            np.ndarray: Coordinates in the order of `subset` (or of the matrix labels).
+        """
+        if method not in EMBEDDING_DEFAULTS:
+            raise ValueError(f"Unknown embedding method '{method}'. Choose from {', '.join(EMBEDDING_DEFAULTS)}.")
+        distance_matrix = as_distance_matrix(distance_df)
+        params = {**EMBEDDING_DEFAULTS[method], **params}
+        subset = list(subset) if subset is not None else None
+        key = self.key(distance_matrix, method, params, subset)
+
+        coordinates = self._entries.get(key)
+        if coordinates is None:
+            coordinates = self._load(key)
+        if coordinates is None:
+            matrix = distance_matrix.submatrix(subset) if subset is not None else distance_matrix
+            coordinates = fit_embedding(matrix, method, params)
+            self._save(key, coordinates)
+        return self._entries.put(key, coordinates)
+
+    def clear(self):
+        """Drop all in-memory entries."""
+        self._entries.clear()
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir / f"{key}.npy"
+        try:
+            coordinates = np.load(path, allow_pickle=False)
+            # Refresh the access time so eviction keeps recently used entries
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return coordinates
+
+    def _save(self, key, coordinates):
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, coordinates)
+            os.replace(tmp_path, self.cache_dir / f"{key}.npy")
+        except OSError as e:
+            print(f"Error writing embedding cache: {e}")
+            return
+        evict_cache_entries(self.cache_dir, self.max_bytes, pattern="*.npy")
+
+
+# Shared by every plotting function
+embedding_store = EmbeddingStore()
+
+
+def get_embedding(distance_df, method="mds", subset=None, **params):
+    """Return memoized embedding coordinates from the shared store (see `EmbeddingStore.get`)."""
+    return embedding_store.get(distance_df, method=method, subset=subset, **params)
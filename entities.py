@@ -0,0 +1,218 @@
+# entities.py
+# Name resolution for countries and other entities: normalized names, aliases and
+# codes map to dataset labels in O(1), and a trigram index serves fuzzy search.
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+
+CODE_FIELDS = ("isoShortCode", "isoCode", "datamapId")  # Record fields indexed as entity codes
+SEARCH_LIMIT = 50  # Suggestions returned by EntityIndex.search
+
+# Canonical country names and the other spellings the datasets (or users) use for them
+ENTITY_ALIASES = {
+    "United Kingdom": ("Great Britain", "UK", "Britain"),
+    "United States": ("U.S.A.", "USA", "US", "United States of America"),
+    "South Korea": ("Korea South", "Korea", "Republic of Korea"),
+    "Czech Republic": ("Czech Rep", "Czechia"),
+    "Dominican Republic": ("Dominican Rep",),
+    "Slovakia": ("Slovak Rep", "Slovak Republic"),
+    "North Macedonia": ("Macedonia Rep", "Macedonia"),
+    "United Arab Emirates": ("U.A.E (Emirati)", "UAE"),
+}
+
+# Default highlight set of the terminal plots, in canonical names
+DEFAULT_HIGHLIGHTS = ("Germany", "United Kingdom", "Indonesia", "Ireland", "Japan", "United States")
+
+
+def normalize_name(name):
+    """
+    Normalize a name for lookups: accents removed, case folded, punctuation dropped.
+
+    "U.S.A." and "usa" both become "usa"; "Côte d'Ivoire" becomes "cote divoire".
+    """
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    cleaned = re.sub(r"[^\w\s]", "", stripped.casefold())
+    return " ".join(cleaned.split())
+
+
+# Normalized spelling -> canonical name
+_canonical = {
+    normalize_name(spelling): canonical
+    for canonical, aliases in ENTITY_ALIASES.items()
+    for spelling in (canonical, *aliases)
+}
+
+
+def canonical_name(name):
+    """Return the canonical name of an entity (the name itself if it has no aliases)."""
+    return _canonical.get(normalize_name(name), name)
+
+
+def trigrams(text):
+    """Character trigrams of a normalized string, padded so that short prefixes match."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EntityIndex:
+    """
+    Lookup structure over the labels of one dataset (or any list of names).
+
+    Every label is reachable through its normalized name, its canonical name and
+    aliases (see ENTITY_ALIASES) and its codes; `resolve` is a single dict lookup.
+    Fuzzy search ranks the spellings (labels and aliases) by trigram similarity
+    using inverted posting lists, so a keystroke touches only the spellings
+    sharing a trigram with the input.
+
+    Args:
+        names (list of str): Entity labels.
+        codes (list of iterable): Optional codes per label (e.g. ISO codes).
+    """
+
+    def __init__(self, names, codes=None):
+        self.names = list(names)
+        self._keys = {}
+        for position, name in enumerate(self.names):
+            self._keys.setdefault(normalize_name(name), position)
+        # Aliases and codes never shadow a label's own name
+        spellings = [self._spellings(name) for name in self.names]
+        for position, aliases in enumerate(spellings):
+            for alias in aliases:
+                self._keys.setdefault(alias, position)
+        if codes is not None:
+            # Codes shared by several labels (e.g. two language groups of one country) stay unresolved
+            normalized_codes = [{normalize_name(code) for code in entity_codes if code is not None} for entity_codes in codes]
+            counts = Counter(code for entity_codes in normalized_codes for code in entity_codes)
+            for position, entity_codes in enumerate(normalized_codes):
+                for code in entity_codes:
+                    if counts[code] == 1:
+                        self._keys.setdefault(code, position)
+
+        # Every label and alias is a separate spelling; a label ranks by its best spelling
+        self._spelling_text = []
+        self._spelling_entity = []
+        for position, (name, aliases) in enumerate(zip(self.names, spellings)):
+            for text in (normalize_name(name), *sorted(aliases)):
+                self._spelling_text.append(text)
+                self._spelling_entity.append(position)
+        self._spelling_entity = np.asarray(self._spelling_entity, dtype=np.intp)
+
+        postings = defaultdict(list)
+        sizes = np.empty(len(self._spelling_text))
+        for spelling, text in enumerate(self._spelling_text):
+            grams = trigrams(text)
+            sizes[spelling] = len(grams)
+            for gram in grams:
+                postings[gram].append(spelling)
+        self._postings = {gram: np.asarray(spelling_ids, dtype=np.intp) for gram, spelling_ids in postings.items()}
+        self._sizes = sizes
+
+    @classmethod
+    def from_records(cls, records, names=None):
+        """
+        Index the names of dataset records together with their CODE_FIELDS.
+
+        Args:
+            records (list of dict): Dataset records.
+            names (list of str): Labels to index, in this order (e.g. those of a distance
+                matrix); records of other names are left out. Defaults to all records.
+        """
+        by_name = {item["name"]: item for item in records}
+        if names is None:
+            names = list(by_name)
+        codes = [
+            [str(by_name[name][field]) for field in CODE_FIELDS if by_name.get(name, {}).get(field) is not None]
+            for name in names
+        ]
+        return cls(names, codes)
+
+    @staticmethod
+    def _spellings(name):
+        canonical = canonical_name(name)
+        aliases = {normalize_name(spelling) for spelling in (canonical, *ENTITY_ALIASES.get(canonical, ()))}
+        aliases.discard(normalize_name(name))
+        return aliases
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def __repr__(self):
+        return f"EntityIndex(entities={len(self.names)}, spellings={len(self._spelling_text)}, trigrams={len(self._postings)})"
+
+    def resolve(self, name):
+        """
+        Return the label an input refers to (by name, alias or code), or None.
+
+        Args:
+            name (str): Name, alias or code as typed.
+
+        Returns:
+            str: The matching label, or None.
+        """
+        position = self._keys.get(normalize_name(name))
+        return None if position is None else self.names[position]
+
+    def resolve_all(self, names):
+        """Resolve several inputs, dropping those without a match."""
+        resolved = (self.resolve(name) for name in names)
+        return [name for name in resolved if name is not None]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Rank labels by trigram similarity to a (partial) input.
+
+        Labels starting with the input come first, then the others by Jaccard
+        similarity of their trigram sets with the input's.
+
+        Args:
+            query (str): Input text.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list of str: Matching labels, best first.
+        """
+        text = normalize_name(query)
+        if not text:
+            return self.names[:limit]
+        query_grams = trigrams(text)
+        grams = [gram for gram in query_grams if gram in self._postings]
+        if not grams:
+            return []
+        hits = np.bincount(np.concatenate([self._postings[gram] for gram in grams]), minlength=len(self._spelling_text))
+        candidates = np.flatnonzero(hits)
+        similarity = hits[candidates] / (len(query_grams) + self._sizes[candidates] - hits[candidates])
+        prefix = np.fromiter((self._spelling_text[i].startswith(text) for i in candidates), dtype=bool, count=candidates.size)
+        ranked = self._spelling_entity[candidates[np.lexsort((-similarity, ~prefix))]]
+        # Keep each label at the rank of its best spelling
+        entities, first = np.unique(ranked, return_index=True)
+        return [self.names[i] for i in entities[np.argsort(first)][:limit]]
+
+    def common(self, other):
+        """
+        Pair up the labels of two indexes that refer to the same entity.
+
+        Args:
+            other (EntityIndex): Index over the other dataset's labels.
+
+        Each label of `other` is paired at most once, with the first label here
+        that resolves to it.
+
+        Returns:
+            list of tuple: (label here, label in `other`) in this index's order.
+        """
+        pairs = []
+        matched = set()
+        for name in self.names:
+            match = other.resolve(canonical_name(name))
+            if match is None:
+                match = other.resolve(name)
+            if match is not None and match not in matched:
+                matched.add(match)
+                pairs.append((name, match))
+        return pairs
@@ -19,85 +19,416 @@ PLOT_STYLE = {
 }
 
 # functions.py
-import pandas as pd
+# pandas, plotting, scikit-learn and scipy are imported inside the functions
+# that use them, so importing this module (and starting the terminal) stays fast.
 import numpy as np
-from scipy.spatial.distance import pdist, squareform
-import matplotlib.pyplot as plt
-from sklearn.manifold import MDS, TSNE
-from sklearn.cluster import KMeans
-import networkx as nx
+from dataset import Dataset
+from cache import LRUMemo, distance_cache_key, load_cached_distances, records_fingerprint, store_cached_distances
+from distance_matrix import DistanceMatrix, as_distance_matrix
+from masked import masked_variances, pairwise_complete_seuclidean
+from metrics import DEFAULT_METRIC, METRICS, ScoreStatistics, compute_cross_metric, compute_metric
+from tiled import DEFAULT_TILE_SIZE, compute_condensed_tiled
+from render import save_figure
+from embeddings import EmbeddingInterpolator, get_embedding
+
+MISSING_STRATEGIES = ("drop", "pairwise")
+EXTREMES_CHUNK_SIZE = 10_000_000  # Pairs scanned at a time by find_extreme_pairs
+NETWORK_MODES = ("complete", "knn", "threshold", "mst")
+NETWORK_NODE_LABEL_LIMIT = 15  # Larger networks get small nodes with offset labels
+NETWORK_EDGE_LABEL_LIMIT = 50  # Edge distances are only written on smaller networks
+NETWORK_NAME_LIMIT = 300  # Country names are left out of larger networks
+
+# (country names, ScoreStatistics) keyed by (records fingerprint, score key)
+_prepared = LRUMemo(max_entries=8)
+# K-Means labels keyed by (matrix fingerprint, n_clusters)
+_kmeans_labels = LRUMemo(max_entries=16)
 
 
 # Core Data Processing Functions
-def calculate_scaled_euclidean_distances(data, score_key="scores"):
+def check_shared_dimensions(distances, countries, listed=5):
+    """
+    Reject pairwise-complete distances of pairs without a shared dimension.
+
+    `masked.pairwise_complete_seuclidean` gives such pairs NaN, which the
+    embeddings, clustering and neighbour searches cannot handle.
+
+    Raises:
+        ValueError: Naming the first `listed` offending pairs.
+    """
+    undefined = np.flatnonzero(np.isnan(distances))
+    if undefined.size:
+        rows, columns = DistanceMatrix(distances, countries).pair_at(undefined[:listed])
+        pairs = ", ".join(f"{countries[i]} - {countries[j]}" for i, j in zip(rows, columns))
+        more = f" and {undefined.size - listed} more" if undefined.size > listed else ""
+        raise ValueError(
+            f"{undefined.size} pairs share no dimension with a score: {pairs}{more}. "
+            "Remove these countries or use the 'drop' strategy."
+        )
+
+def calculate_distances(data, metric=DEFAULT_METRIC, score_key="scores", use_cache=True, missing="drop"):
+    """
+    Calculate the distances between all countries under a registered metric.
+
+    Results are cached on disk, keyed by a hash of the input records and the metric,
+    so repeated calls with unchanged data skip the computation. The statistics the
+    metrics share (variances, covariance, norms) are computed once per dataset.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        metric (str): Metric name from `metrics.METRICS`.
+        score_key (str): Key of the score dictionary inside each record.
+        use_cache (bool): Whether to read from and write to the on-disk distance cache.
+        missing (str): "drop" removes every dimension with a missing value for any country;
+            "pairwise" uses all dimensions both countries of a pair have (see `masked.py`,
+            standardized euclidean only).
+
+    Returns:
+        DistanceMatrix: Condensed distance matrix labelled with the country names.
+
+    Raises:
+        ValueError: With "pairwise", if some pairs share no dimension with a score.
+    """
+    if missing not in MISSING_STRATEGIES:
+        raise ValueError(f"Unknown missing-value strategy '{missing}'. Choose from {', '.join(MISSING_STRATEGIES)}.")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Choose from {', '.join(METRICS)}.")
+    if missing == "pairwise" and metric != "seuclidean":
+        raise ValueError(f"Pairwise-complete distances are only available for the seuclidean metric, not '{metric}'.")
+    key = distance_cache_key(data, score_key, metric=metric, missing=missing) if use_cache else None
+    cached = load_cached_distances(key) if use_cache else None
+    if cached is not None:
+        distances, countries = cached
+        if missing == "pairwise":
+            # Entries cached before this check existed may still hold NaN
+            check_shared_dimensions(distances, countries)
+    elif missing == "pairwise":
+        countries, scores, variances = prepare_masked_scores(data, score_key)
+        distances = pairwise_complete_seuclidean(scores, variances)
+        check_shared_dimensions(distances, countries)
+        if use_cache:
+            store_cached_distances(key, distances, countries)
+    else:
+        countries, statistics = _score_statistics(data, score_key)
+        distances = compute_metric(metric, statistics)
+        if use_cache:
+            store_cached_distances(key, distances, countries)
+    return DistanceMatrix(distances, countries)
+
+def calculate_distance_set(data, metrics=None, score_key="scores", use_cache=True):
+    """
+    Calculate the distances between all countries under several metrics at once.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        metrics (iterable of str): Metric names (defaults to every registered metric).
+        score_key (str): Key of the score dictionary inside each record.
+        use_cache (bool): Whether to use the on-disk distance cache.
+
+    Returns:
+        dict: DistanceMatrix per metric name, in the requested order.
+    """
+    metrics = list(METRICS) if metrics is None else list(metrics)
+    return {metric: calculate_distances(data, metric, score_key=score_key, use_cache=use_cache) for metric in metrics}
+
+def calculate_scaled_euclidean_distances(data, score_key="scores", use_cache=True, missing="drop"):
+    """
+    Calculate the variance-scaled euclidean distances between all countries.
+
+    Shorthand for `calculate_distances(data, "seuclidean", ...)`.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        score_key (str): Key of the score dictionary inside each record.
+        use_cache (bool): Whether to read from and write to the on-disk distance cache.
+        missing (str): "drop" or "pairwise", see `calculate_distances`.
+
+    Returns:
+        DistanceMatrix: Condensed distance matrix labelled with the country names.
+    """
+    return calculate_distances(data, "seuclidean", score_key=score_key, use_cache=use_cache, missing=missing)
+
+def _score_statistics(data, score_key="scores"):
+    # Prepared scores and their statistics are shared by all metrics of a dataset
+    fingerprint = (records_fingerprint(data, score_key), score_key)
+    prepared = _prepared.get(fingerprint)
+    if prepared is not None:
+        return prepared
+    countries, scores, variances = prepare_scores(data, score_key)
+    return _prepared.put(fingerprint, (countries, ScoreStatistics(scores, variances)))
+
+def prepare_scores(data, score_key="scores"):
+    """
+    Build the score matrix used by the distance calculations.
+
+    Dimensions with a missing value (-1) for any country are dropped.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        score_key (str): Key of the score dictionary inside each record.
+
+    Returns:
+        tuple: (list of country names, score matrix as np.ndarray, per-dimension variances)
+    """
+    if isinstance(data, Dataset) and score_key == "scores":
+        return data.prepare()
+    import pandas as pd
     countries = [item["name"] for item in data]
     scores = [item[score_key] for item in data]
     scores_df = pd.DataFrame(scores, index=countries).replace(-1, pd.NA).dropna(axis=1, how="any")
-    variances = scores_df.var().values
-    distances = pdist(scores_df, metric="seuclidean", V=variances)
-    distance_matrix = squareform(distances)
-    return pd.DataFrame(distance_matrix, index=countries, columns=countries)
+    variances = scores_df.var().values.astype(float)
+    return countries, scores_df.to_numpy(dtype=float), variances
+
+def prepare_masked_scores(data, score_key="scores"):
+    """
+    Build the score matrix for the pairwise-complete distances, keeping every dimension.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        score_key (str): Key of the score dictionary inside each record.
+
+    Returns:
+        tuple: (list of country names, score matrix with NaN for missing values, per-dimension variances)
+    """
+    if isinstance(data, Dataset) and score_key == "scores":
+        return data.prepare_masked()
+    import pandas as pd
+    countries = [item["name"] for item in data]
+    scores = pd.DataFrame([item[score_key] for item in data], index=countries).replace(-1, np.nan).to_numpy(dtype=float)
+    # Row-major like the compiled Dataset path, so both sum in the same order
+    scores = np.ascontiguousarray(scores)
+    return countries, scores, masked_variances(scores)
+
+def calculate_distances_to_reference(new_data, reference_data, score_key="scores", metric=DEFAULT_METRIC):
+    """
+    Calculate the distances of new countries to a reference set under a registered metric.
+
+    The dimensions and statistics (variances, covariance) are those of the
+    reference data, so the result matches the reference distance matrix of the
+    same metric (with missing="drop") and the reference embedding does not have
+    to change (see `embeddings.EmbeddingInterpolator`).
+
+    Args:
+        new_data (list of dict): Records of the countries to place.
+        reference_data (list of dict): Records the reference distance matrix was computed from.
+        score_key (str): Key of the score dictionary inside each record.
+        metric (str): Metric of the reference distance matrix, see `metrics.METRICS`.
+
+    Returns:
+        tuple: (list of new country names, distances of shape (new, reference) as np.ndarray)
+    """
+    import pandas as pd
+    countries = [item["name"] for item in reference_data]
+    scores = pd.DataFrame([item[score_key] for item in reference_data], index=countries).replace(-1, pd.NA).dropna(axis=1, how="any")
+    variances = scores.var().values.astype(float)
+
+    names = [item["name"] for item in new_data]
+    new_scores = pd.DataFrame([item[score_key] for item in new_data], index=names).reindex(columns=scores.columns)
+    incomplete = new_scores.replace(-1, pd.NA).isna().any(axis=1)
+    if incomplete.any():
+        raise ValueError(f"Missing scores for {', '.join(new_scores.index[incomplete])} in dimensions used by the reference data.")
+    statistics = ScoreStatistics(scores.to_numpy(dtype=float), variances)
+    return names, compute_cross_metric(metric, statistics, new_scores.to_numpy(dtype=float))
+
+def calculate_scaled_euclidean_distances_tiled(data, path, score_key="scores", tile_size=DEFAULT_TILE_SIZE, max_workers=None, progress=None):
+    """
+    Calculate the variance-scaled euclidean distances out of core with a process pool.
+
+    The result is numerically identical to `calculate_scaled_euclidean_distances`,
+    but is written tile by tile into a memory-mapped raw condensed file at `path`.
+
+    Args:
+        data (list of dict): List of dictionaries containing country data and their cultural dimensions.
+        path (str): Output path of the raw condensed `.f64` file.
+        score_key (str): Key of the score dictionary inside each record.
+        tile_size (int): Number of entities per tile edge.
+        max_workers (int): Number of worker processes (defaults to the CPU count).
+        progress (callable): Optional callback receiving the number of pairs written per tile.
 
-def visualize_country_network(distance_df, selected_countries=None, title="Network Graph of Country Distances", show=False):
+    Returns:
+        DistanceMatrix: Distance matrix backed by the memory-mapped file.
+    """
+    countries, scores, variances = prepare_scores(data, score_key)
+    return compute_condensed_tiled(scores, variances, countries, path, tile_size=tile_size, max_workers=max_workers, progress=progress)
+
+def _spanning_tree_keys(distance_matrix):
+    # Prim's algorithm gathering one matrix row per step: no dense square, and a
+    # distance of 0 is an edge like any other (sparse graph routines drop it)
+    n = distance_matrix.n
+    if np.isnan(distance_matrix.condensed).any():
+        raise ValueError("Cannot build a spanning tree of distances with missing values.")
+    everyone = np.arange(n)
+    in_tree = np.zeros(n, dtype=bool)
+    nearest = np.full(n, np.inf)  # Distance of each country to the tree
+    parent = np.zeros(n, dtype=np.intp)
+    keys = np.empty(max(n - 1, 0), dtype=np.intp)
+    node = 0
+    for step in range(n - 1):
+        in_tree[node] = True
+        distances = distance_matrix.take(np.full(n, node), everyone)
+        closer = ~in_tree & (distances < nearest)
+        nearest[closer] = distances[closer]
+        parent[closer] = node
+        node = int(np.argmin(np.where(in_tree, np.inf, nearest)))
+        keys[step] = distance_matrix.condensed_index(parent[node], node)
+    return np.sort(keys)
+
+def network_edges(distance_df, mode="complete", k=3, threshold=None, chunk_rows=1024):
+    """
+    Select the edges of a country network without visiting pairs one by one.
+
+    Modes:
+        complete: Every pair of countries.
+        knn: Each country linked to its k nearest neighbours (symmetrized).
+        threshold: Every pair at most `threshold` apart.
+        mst: The minimum spanning tree of the distances.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        mode (str): One of NETWORK_MODES.
+        k (int): Number of neighbours for the knn mode (at least 1, capped at the number of other countries).
+        threshold (float): Maximum edge length for the threshold mode (defaults to the 10th percentile).
+        chunk_rows (int): Matrix rows gathered at a time by the knn mode.
+
+    Returns:
+        tuple: (row positions, column positions, distances) of the edges as np.ndarray, with row < column.
+
+    Raises:
+        ValueError: If the mode is unknown, or `k` is below 1 in the knn mode.
+    """
+    distance_matrix = as_distance_matrix(distance_df)
+    n = distance_matrix.n
+    if mode == "complete":
+        keys = np.arange(distance_matrix.condensed.size)
+    elif mode == "threshold":
+        if threshold is None:
+            threshold = np.percentile(distance_matrix.condensed, 10)
+        keys = np.flatnonzero(distance_matrix.condensed <= threshold)
+    elif mode == "knn":
+        if k < 1:
+            raise ValueError(f"The number of neighbours must be at least 1, got {k}.")
+        k = min(k, n - 1)
+        everyone = np.arange(n)
+        blocks = []
+        # k is 0 only for a single country, which has no neighbours
+        for row in range(0, n if k else 0, chunk_rows):
+            rows = everyone[row:row + chunk_rows]
+            block = distance_matrix.take(rows[:, None], everyone[None, :])
+            block[np.arange(rows.size), rows] = np.inf
+            neighbours = np.argpartition(block, k - 1, axis=1)[:, :k]
+            blocks.append(distance_matrix.condensed_index(np.repeat(rows, k), neighbours.ravel()))
+        keys = np.unique(np.concatenate(blocks)) if blocks else np.empty(0, dtype=np.intp)
+    elif mode == "mst":
+        keys = _spanning_tree_keys(distance_matrix)
+    else:
+        raise ValueError(f"Unknown network mode '{mode}'. Choose from {', '.join(NETWORK_MODES)}.")
+    i, j = distance_matrix.pair_at(keys)
+    return i, j, np.asarray(distance_matrix.condensed[keys], dtype=float)
+
+def visualize_country_network(distance_df, selected_countries=None, title="Network Graph of Country Distances", show=False, engine="mds", mode="complete", k=3, threshold=None):
     """
     Visualize a network graph of country distances to scale.
 
+    Edges are drawn as one batched LineCollection; node and edge labels are only
+    drawn while the graph is small enough for them to be readable.
+
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
         selected_countries (list): A list of country codes to include in the graph. If None, include all countries.
         title (str): Title of the graph.
+        engine (str): MDS engine used for the layout, one of MDS_ENGINES.
+        mode (str): Edge selection, one of NETWORK_MODES (see `network_edges`).
+        k (int): Number of neighbours for the knn mode.
+        threshold (float): Maximum edge length for the threshold mode.
     """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    distance_matrix = as_distance_matrix(distance_df)
     if selected_countries is None:
-        selected_countries = distance_df.index.tolist()
-
-    filtered_df = distance_df.loc[selected_countries, selected_countries]
-    mds = MDS(n_components=2, dissimilarity="precomputed", random_state=42)
-    positions = mds.fit_transform(filtered_df.values)
-    pos = {country: (positions[i, 0], positions[i, 1]) for i, country in enumerate(filtered_df.index)}
-
-    G = nx.Graph()
-    for country1 in filtered_df.index:
-        for country2 in filtered_df.columns:
-            if country1 != country2:
-                G.add_edge(country1, country2, weight=filtered_df.loc[country1, country2])
-
-    plt.figure(figsize=PLOT_STYLE['figsize'])
-    nx.draw_networkx_nodes(G, pos, node_size=PLOT_STYLE['node_size'], node_color=PLOT_STYLE['node_color'])
-    nx.draw_networkx_edges(G, pos, width=1.0, alpha=0.7, edge_color=PLOT_STYLE['edge_color'])
-    nx.draw_networkx_labels(G, pos, font_size=PLOT_STYLE['font_size'], font_color=PLOT_STYLE['font_color'])
-    edge_labels = nx.get_edge_attributes(G, 'weight')
-    edge_labels = {k: f"{v:.2f}" for k, v in edge_labels.items()}
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=PLOT_STYLE['font_size'])
+        selected_countries = distance_matrix.labels
+
+    filtered = distance_matrix.submatrix(selected_countries)
+    positions = get_embedding(distance_matrix, engine, subset=selected_countries)
+    i, j, weights = network_edges(filtered, mode=mode, k=k, threshold=threshold)
+
+    small = filtered.n <= NETWORK_NODE_LABEL_LIMIT
+    fig, ax = plt.subplots(figsize=PLOT_STYLE['figsize'])
+    segments = np.stack([positions[i], positions[j]], axis=1)
+    ax.add_collection(LineCollection(segments, linewidths=1.0, alpha=0.7, colors=PLOT_STYLE['edge_color'], zorder=1))
+    ax.scatter(
+        positions[:, 0], positions[:, 1],
+        s=PLOT_STYLE['node_size'] if small else 30,
+        c=PLOT_STYLE['node_color'], zorder=2,
+    )
+    for node, country in enumerate(filtered.labels if filtered.n <= NETWORK_NAME_LIMIT else []):
+        if small:
+            ax.text(positions[node, 0], positions[node, 1], country, fontsize=PLOT_STYLE['font_size'], color=PLOT_STYLE['font_color'], ha="center", va="center", zorder=3)
+        else:
+            ax.annotate(country, (positions[node, 0], positions[node, 1]), xytext=(3, 3), textcoords="offset points", fontsize=6, zorder=3)
+    if weights.size <= NETWORK_EDGE_LABEL_LIMIT:
+        midpoints = segments.mean(axis=1)
+        for (x, y), weight in zip(midpoints, weights):
+            ax.text(x, y, f"{weight:.2f}", fontsize=PLOT_STYLE['font_size'], ha="center", va="center", bbox=dict(facecolor="white", edgecolor="none", pad=1), zorder=2)
+    # Leave room for the large nodes at the edges of the layout
+    ax.margins(0.1 if small else 0.02)
+    ax.autoscale_view()
     plt.axis("off")
     plt.title(title)
-    plt.savefig(f"figures/{title}.png", format='png', dpi=300)
-    if show:
-        plt.show()
+    save_figure(f"figures/{title}.png", show=show, dpi=PLOT_STYLE['dpi'])
 
-def plot_kmeans_with_highlight_MDS(distance_df, highlight_countries=[], n_clusters=4, title="K-Means Clustering with Highlighted Countries (MDS)", show=False):
+def kmeans_cluster_labels(distance_df, n_clusters=4):
     """
-    Plot a K-Means clustering result with MDS coordinates, highlighting specific countries.
+    K-Means labels of the distance matrix rows, memoized per matrix and cluster count.
 
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
-        highlight_countries (list): List of country names to highlight in the plot.
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
         n_clusters (int): Number of clusters for K-Means.
+
+    Returns:
+        np.ndarray: Cluster label per country.
+    """
+    from sklearn.cluster import KMeans
+    distance_matrix = as_distance_matrix(distance_df)
+    key = (distance_matrix.fingerprint(), n_clusters)
+    labels = _kmeans_labels.get(key)
+    if labels is None:
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+        labels = _kmeans_labels.put(key, kmeans.fit_predict(distance_matrix.to_numpy()))
+    return labels
+
+def plot_clusters_with_highlight_MDS(distance_df, highlight_countries=[], n_clusters=4, title="Clustering with Highlighted Countries (MDS)", show=False, engine="mds", placed=None, cluster_labels=None):
+    """
+    Plot a clustering result with MDS coordinates, highlighting specific countries.
+
+    The clusters are `cluster_labels` when given (e.g. from a k-medoids or
+    agglomerative sweep), and K-Means labels of the distance matrix otherwise;
+    name the method in `title`.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        highlight_countries (list): List of country names to highlight in the plot.
+        n_clusters (int): Number of clusters for K-Means (without `cluster_labels`).
         title (str): Title of the plot.
+        cluster_labels (np.ndarray): Precomputed cluster label per country (e.g. `ClusterSweep.best_labels`),
+            used instead of K-Means.
+        engine (str): MDS engine, one of MDS_ENGINES ("cmds" and "lmds" scale to large datasets).
+        placed (dict): Coordinates of countries placed into the existing map without refitting,
+            keyed by name (see `place_countries`). They are drawn on top of the reference map.
     """
-    # Perform MDS to reduce the distance matrix to 2D coordinates
-    mds = MDS(n_components=2, dissimilarity="precomputed", random_state=42)
-    mds_coordinates = mds.fit_transform(distance_df.values)
+    import matplotlib.pyplot as plt
+    distance_matrix = as_distance_matrix(distance_df)
+
+    # Reduce the distance matrix to 2D coordinates (memoized MDS)
+    mds_coordinates = get_embedding(distance_matrix, engine)
     
-    # Perform K-Means clustering on the distance matrix
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    kmeans_labels = kmeans.fit_predict(distance_df)
+    # Reuse the given labels, or perform K-Means clustering on the distance matrix
+    labels = cluster_labels if cluster_labels is not None else kmeans_cluster_labels(distance_matrix, n_clusters)
     
     # Scatter plot of MDS coordinates
     plt.figure(figsize=(12, 8))
-    plt.scatter(mds_coordinates[:, 0], mds_coordinates[:, 1], c=kmeans_labels, cmap='viridis', s=100, label="Clustered Points")
+    plt.scatter(mds_coordinates[:, 0], mds_coordinates[:, 1], c=labels, cmap='viridis', s=100, label="Clustered Points")
     
     # Annotate and highlight specific countries
-    for i, country in enumerate(distance_df.index):
+    for i, country in enumerate(distance_matrix.labels):
         if country in highlight_countries:
             plt.scatter(
                 mds_coordinates[i, 0], 
@@ -123,40 +454,90 @@ def plot_kmeans_with_highlight_MDS(distance_df, highlight_countries=[], n_cluste
                 color='black'
             )
     
+    if placed:
+        _draw_placed_countries(plt.gca(), placed)
+
     # Title and labels
     plt.title(title)
     plt.xlabel('MDS Dimension 1')
     plt.ylabel('MDS Dimension 2')
     plt.legend()
     plt.tight_layout()
-    plt.savefig(f'figures/{title}.png', format='png', dpi=PLOT_STYLE['dpi'])
-    if(show):
-        plt.show()
+    save_figure(f"figures/{title}.png", show=show, dpi=PLOT_STYLE['dpi'])
+
+def place_countries(distance_df, new_data, reference_data, score_key="scores", engine="mds", metric=DEFAULT_METRIC):
+    """
+    Place new countries into the existing MDS map of a distance matrix.
+
+    The reference coordinates come from the embedding store and are left untouched,
+    so the rest of the map does not shift when countries are added. The new
+    countries' distances are computed with `metric`, which must be the metric the
+    reference matrix was built with (missing="drop").
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): Distance matrix of the reference data.
+        new_data (list of dict): Records of the countries to place.
+        reference_data (list of dict): Records the distance matrix was computed from.
+        score_key (str): Key of the score dictionary inside each record.
+        engine (str): MDS engine of the reference map, one of MDS_ENGINES.
+        metric (str): Metric of the reference distance matrix, see `metrics.METRICS`.
 
-def plot_kmeans_with_highlight_t_SNE(distance_df, highlight_countries=[], n_clusters=4, title="K-Means Clustering with Highlighted Countries (t-SNE)", show=False):
+    Returns:
+        dict: Coordinates keyed by the new country names.
+
+    Raises:
+        ValueError: If the distance matrix is not the `metric` matrix of the reference data
+            with missing="drop", since the new countries would be placed in another metric space.
+    """
+    distance_matrix = as_distance_matrix(distance_df)
+    expected = calculate_distances(reference_data, metric, score_key=score_key)
+    if expected.labels != distance_matrix.labels or not np.allclose(expected.condensed, distance_matrix.condensed, rtol=1e-9, atol=1e-12):
+        raise ValueError(
+            f"The distance matrix is not the '{metric}' matrix of the reference data with missing='drop'. "
+            "Pass the metric it was computed with."
+        )
+    names, distances = calculate_distances_to_reference(new_data, reference_data, score_key, metric)
+    interpolator = EmbeddingInterpolator.from_embedding(distance_matrix, engine)
+    coordinates = interpolator.place(distances)
+    return {name: (float(coordinates[i, 0]), float(coordinates[i, 1])) for i, name in enumerate(names)}
+
+def _draw_placed_countries(ax, placed):
+    # Drawn as one extra layer, so updating a map only adds artists to it
+    coordinates = np.asarray(list(placed.values()))
+    ax.scatter(coordinates[:, 0], coordinates[:, 1], marker='*', color=PLOT_STYLE['highlight_color'], s=PLOT_STYLE['highlight_size'], edgecolor='black', label="Placed")
+    for country, (x, y) in placed.items():
+        ax.annotate(country, (x + 0.05, y + 0.05), fontsize=10, fontweight='bold', color='black')
+
+def plot_clusters_with_highlight_t_SNE(distance_df, highlight_countries=[], n_clusters=4, title="Clustering with Highlighted Countries (t-SNE)", show=False, cluster_labels=None):
     """
-    Plot a K-Means clustering result with t-SNE coordinates, highlighting specific countries.
+    Plot a clustering result with t-SNE coordinates, highlighting specific countries.
+
+    The clusters are `cluster_labels` when given, and K-Means labels of the
+    distance matrix otherwise; name the method in `title`.
 
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
         highlight_countries (list): List of country names to highlight in the plot.
-        n_clusters (int): Number of clusters for K-Means.
+        n_clusters (int): Number of clusters for K-Means (without `cluster_labels`).
         title (str): Title of the plot.
+        cluster_labels (np.ndarray): Precomputed cluster label per country (e.g. `ClusterSweep.best_labels`),
+            used instead of K-Means.
     """
-    # Perform t-SNE to reduce the distance matrix to 2D coordinates
-    tsne = TSNE(n_components=2, metric="precomputed", init="random", random_state=42)
-    tsne_coordinates = tsne.fit_transform(distance_df.values)
+    import matplotlib.pyplot as plt
+    distance_matrix = as_distance_matrix(distance_df)
+
+    # Reduce the distance matrix to 2D coordinates (memoized t-SNE)
+    tsne_coordinates = get_embedding(distance_matrix, "tsne")
     
-    # Perform K-Means clustering on the distance matrix
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-    kmeans_labels = kmeans.fit_predict(distance_df)
+    # Reuse the given labels, or perform K-Means clustering on the distance matrix
+    labels = cluster_labels if cluster_labels is not None else kmeans_cluster_labels(distance_matrix, n_clusters)
 
     # Scatter plot of t-SNE coordinates
     plt.figure(figsize=(12, 8))
-    plt.scatter(tsne_coordinates[:, 0], tsne_coordinates[:, 1], c=kmeans_labels, cmap='viridis', s=100)
+    plt.scatter(tsne_coordinates[:, 0], tsne_coordinates[:, 1], c=labels, cmap='viridis', s=100)
 
     # Annotate and highlight specific countries
-    for i, country in enumerate(distance_df.index):
+    for i, country in enumerate(distance_matrix.labels):
         if country in highlight_countries:
             plt.scatter(
                 tsne_coordinates[i, 0],
@@ -185,35 +566,151 @@ def plot_kmeans_with_highlight_t_SNE(distance_df, highlight_countries=[], n_clus
     plt.xlabel('t-SNE Dimension 1')
     plt.ylabel('t-SNE Dimension 2')
     plt.tight_layout()
-    plt.savefig(f'figures/{title}.png', format='png', dpi=PLOT_STYLE['dpi'])
-    if show:
-        plt.show()
+    save_figure(f"figures/{title}.png", show=show, dpi=PLOT_STYLE['dpi'])
+
+# Former names, from when these plots always ran K-Means
+plot_kmeans_with_highlight_MDS = plot_clusters_with_highlight_MDS
+plot_kmeans_with_highlight_t_SNE = plot_clusters_with_highlight_t_SNE
 
 def export_distances_to_csv(distance_df, title):
     filename = f"{title.replace(' ', '_').lower()}_distances.csv"
     try:
-        distance_df.to_csv("data/" + filename)
+        as_distance_matrix(distance_df).to_dataframe().to_csv("data/" + filename)
         return filename
     except Exception as e:
         print(f"Error exporting distances: {e}")
 
+def find_extreme_pairs(distance_df, k=5, chunk_size=EXTREMES_CHUNK_SIZE):
+    """
+    Find the k closest and k farthest country pairs together with summary statistics.
+
+    The condensed upper triangle is scanned once in chunks. Each chunk contributes
+    its k smallest and k largest values through partial selection (`argpartition`)
+    and is merged into running statistics, so the memory use is bounded by the
+    chunk size even for memory-mapped matrices with hundreds of millions of pairs.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        k (int): Number of closest and farthest pairs to return.
+        chunk_size (int): Number of pairs processed at a time.
+
+    Returns:
+        tuple: (closest pairs DataFrame, farthest pairs DataFrame, dict of statistics)
+    """
+    if k < 1:
+        raise ValueError(f"The number of pairs must be at least 1, got {k}.")
+    distance_matrix = as_distance_matrix(distance_df)
+    condensed = distance_matrix.condensed
+    total = condensed.size
+    k = min(k, total)
+
+    low_keys, low_values = np.empty(0, dtype=np.int64), np.empty(0)
+    high_keys, high_values = np.empty(0, dtype=np.int64), np.empty(0)
+    count, mean, m2 = 0, 0.0, 0.0
+    minimum, maximum = np.inf, -np.inf
+
+    for start in range(0, total, chunk_size):
+        chunk = np.asarray(condensed[start:start + chunk_size], dtype=float)
+
+        # Merge the chunk's mean and sum of squared deviations (Chan et al.)
+        chunk_mean = chunk.mean()
+        chunk_m2 = ((chunk - chunk_mean) ** 2).sum()
+        delta = chunk_mean - mean
+        combined = count + chunk.size
+        mean += delta * chunk.size / combined
+        m2 += chunk_m2 + delta ** 2 * count * chunk.size / combined
+        count = combined
+        minimum = min(minimum, chunk.min())
+        maximum = max(maximum, chunk.max())
+
+        # Keep only the k best candidates of the chunk and the running selection
+        low = np.argpartition(chunk, k - 1)[:k] if chunk.size > k else np.arange(chunk.size)
+        high = np.argpartition(chunk, -k)[-k:] if chunk.size > k else np.arange(chunk.size)
+        low_keys, low_values = _keep_extremes(
+            np.concatenate([low_keys, low + start]), np.concatenate([low_values, chunk[low]]), k, largest=False
+        )
+        high_keys, high_values = _keep_extremes(
+            np.concatenate([high_keys, high + start]), np.concatenate([high_values, chunk[high]]), k, largest=True
+        )
+
+    stats = {
+        "pairs": count,
+        "mean": mean,
+        "median": _chunked_median(condensed, chunk_size, minimum, maximum),
+        "std": np.sqrt(m2 / count),
+        "min": minimum,
+        "max": maximum,
+    }
+    return _pairs_frame(distance_matrix, low_keys, low_values), _pairs_frame(distance_matrix, high_keys, high_values), stats
+
+def _keep_extremes(keys, values, k, largest):
+    """Select the k smallest (or largest) values and return them sorted."""
+    if values.size > k:
+        selected = np.argpartition(values, -k)[-k:] if largest else np.argpartition(values, k - 1)[:k]
+        keys, values = keys[selected], values[selected]
+    order = np.argsort(values, kind="stable")
+    if largest:
+        order = order[::-1]
+    return keys[order], values[order]
+
+def _pairs_frame(distance_matrix, keys, values):
+    """Turn condensed positions into a table of country pairs."""
+    import pandas as pd
+    i, j = distance_matrix.pair_at(keys)
+    labels = np.asarray(distance_matrix.labels, dtype=object)
+    return pd.DataFrame({"Country 1": labels[i], "Country 2": labels[j], "Distance": values})
+
+def _chunked_median(condensed, chunk_size, minimum, maximum, bins=4096):
+    """
+    Exact median of a condensed vector without sorting or copying it as a whole.
+
+    Small vectors are partitioned directly. Larger ones are histogrammed chunk by
+    chunk to find the bins holding the middle ranks; only the values inside those
+    bins are collected and partitioned in a second pass.
+    """
+    total = condensed.size
+    if total <= chunk_size:
+        return float(np.median(np.asarray(condensed, dtype=float)))
+
+    edges = np.linspace(minimum, maximum, bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for start in range(0, total, chunk_size):
+        chunk = np.asarray(condensed[start:start + chunk_size], dtype=float)
+        counts += np.histogram(chunk, bins=edges)[0]
+
+    ranks = sorted({(total - 1) // 2, total // 2})
+    cumulative = np.cumsum(counts)
+    target_bins = np.searchsorted(cumulative, np.asarray(ranks), side="right")
+    low_bin, high_bin = target_bins.min(), target_bins.max()
+    below = cumulative[low_bin - 1] if low_bin > 0 else 0
+
+    # Collect only the values that fall into the bins holding the middle ranks
+    lower_edge, upper_edge = edges[low_bin], edges[high_bin + 1]
+    candidates = []
+    for start in range(0, total, chunk_size):
+        chunk = np.asarray(condensed[start:start + chunk_size], dtype=float)
+        if high_bin == bins - 1:
+            mask = (chunk >= lower_edge) & (chunk <= upper_edge)
+        else:
+            mask = (chunk >= lower_edge) & (chunk < upper_edge)
+        candidates.append(chunk[mask])
+    candidates = np.concatenate(candidates)
+    local_ranks = [rank - below for rank in ranks]
+    return float(np.partition(candidates, local_ranks)[local_ranks].mean())
+
 def find_max_min_distances(distance_df):
     """
     Find and display the maximum and minimum distances between countries.
 
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
-    """
-    # Get the maximum and minimum distances (ignore diagonal elements which are zero)
-    max_distance = distance_df.where(~np.eye(distance_df.shape[0], dtype=bool)).max().max()
-    min_distance = distance_df.where(~np.eye(distance_df.shape[0], dtype=bool)).min().min()
-    average_distance = distance_df.where(~np.eye(distance_df.shape[0], dtype=bool)).mean().mean()
-    # Find the corresponding countries for max distance
-    max_location = distance_df.where(distance_df == max_distance).stack().idxmax()
-    min_location = distance_df.where(distance_df == min_distance).stack().idxmin()
-    max = f"Maximum distance: {max_distance:.2f} between {max_location[0]} and {max_location[1]}"
-    min = f"Minimum distance: {min_distance:.2f} between {min_location[0]} and {min_location[1]}"
-    avg = f"Average distance: {average_distance  :.2f}"
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+    """
+    closest, farthest, stats = find_extreme_pairs(distance_df, k=1)
+    max_location = farthest.iloc[0]
+    min_location = closest.iloc[0]
+    max = f"Maximum distance: {max_location['Distance']:.2f} between {max_location['Country 1']} and {max_location['Country 2']}"
+    min = f"Minimum distance: {min_location['Distance']:.2f} between {min_location['Country 1']} and {min_location['Country 2']}"
+    avg = f"Average distance: {stats['mean']  :.2f}"
 
     return max, min, avg
     
@@ -222,15 +719,16 @@ def find_max_min_distances_for_country(title, distance_df, country):
     Find the maximum and minimum distances for a specific country.
 
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
         country (str): The country for which to find max and min distances.
     """
-    if country not in distance_df.index:
+    distance_matrix = as_distance_matrix(distance_df)
+    if country not in distance_matrix:
         print(f"Country '{country}' not found in the dataset.")
         return
 
     # Exclude the self-distance (diagonal)
-    distances = distance_df.loc[country].drop(country)
+    distances = distance_matrix.row_series(country)
 
     # Find maximum and minimum distances
     max_distance = distances.max()
@@ -252,16 +750,18 @@ def plot_country_distance_boxplot_with_highlight(distance_df, country, highlight
     Create a styled box plot of all distances for a specific country, highlighting specific distances.
 
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
         country (str): The country for which to plot distances.
         highlight_countries (list): List of countries to highlight in the box plot.
     """
-    if country not in distance_df.index:
+    import matplotlib.pyplot as plt
+    distance_matrix = as_distance_matrix(distance_df)
+    if country not in distance_matrix:
         print(f"Country '{country}' not found in the dataset.")
         return
 
     # Extract distances for the specified country
-    distances = distance_df.loc[country].drop(country)  # Exclude the self-distance
+    distances = distance_matrix.row_series(country)  # Exclude the self-distance
     highlighted_values = {highlight: distances[highlight] for highlight in highlight_countries if highlight in distances.index}
 
     # Create the box plot
@@ -309,44 +809,37 @@ def plot_country_distance_boxplot_with_highlight(distance_df, country, highlight
 
     # Save and show the plot
     plt.tight_layout()
-    plt.savefig(f"figures/{title} - {country}_distance_boxplot_styled.png", format="png", dpi=300)
-    if show:
-        plt.show()
+    save_figure(f"figures/{title} - {country}_distance_boxplot_styled.png", show=show, dpi=PLOT_STYLE['dpi'])
 
 def plot_all_distance_boxplot_with_highlight(distance_df, highlighted_pairs=None, title="Country Distances Boxplot", show=True):
     """
     Create a styled boxplot of all distances between countries and highlight specific pairs.
 
     Args:
-        distance_df (pd.DataFrame): A DataFrame containing the distance matrix.
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
         highlighted_pairs (list of tuples): List of country pairs to highlight (e.g., [("Country1", "Country2")]).
         title (str): Title for the boxplot.
         show (bool): Whether to display the plot.
     """
+    import matplotlib.pyplot as plt
+    distance_matrix = as_distance_matrix(distance_df)
     if highlighted_pairs is None:
         highlighted_pairs = []
 
     print(f"Highlighted pairs: {highlighted_pairs}")
 
-    # Flatten the distance matrix for the boxplot
-    distances = []
-    pair_to_distance = {}
-
-    for i, country1 in enumerate(distance_df.index):
-        for j, country2 in enumerate(distance_df.columns):
-            if i < j:  # Avoid duplicate pairs and self-distances
-                distance = distance_df.loc[country1, country2]
-                distances.append(distance)
-                pair_to_distance[(country1, country2)] = distance
-                pair_to_distance[(country2, country1)] = distance  # Add reverse order
-
+    # The condensed vector already holds every pair once, without self-distances
+    distances = distance_matrix.condensed
     print(f"Total distances: {len(distances)}")
-    print(f"Pairs in distance map: {len(pair_to_distance)}")
 
-    # Extract highlighted distances
-    highlighted_values = [
-        pair_to_distance[pair] for pair in highlighted_pairs if pair in pair_to_distance
+    # Resolve the highlighted pairs through the name->index map in one gather
+    highlighted_pairs = [
+        pair for pair in highlighted_pairs
+        if pair[0] in distance_matrix and pair[1] in distance_matrix and pair[0] != pair[1]
     ]
+    first = distance_matrix.positions([pair[0] for pair in highlighted_pairs])
+    second = distance_matrix.positions([pair[1] for pair in highlighted_pairs])
+    highlighted_values = distance_matrix.take(first, second).tolist()
     print(f"Highlighted values: {highlighted_values}")
 
     # Create the box plot
@@ -405,9 +898,7 @@ def plot_all_distance_boxplot_with_highlight(distance_df, highlighted_pairs=None
     plt.tight_layout()
     plot_filename = f"{title.replace(' ', '_').lower()}_styled.png"
     print(f"Saving the styled plot as {plot_filename}...")
-    plt.savefig(f"figures/{plot_filename}", format="png", dpi=300)
-    if show:
-        plt.show()
+    save_figure(f"figures/{plot_filename}", show=show, dpi=PLOT_STYLE['dpi'])
     print("Styled plot displayed or saved.")
 
 def display_cultural_dimensions(data, selected_countries):
@@ -421,6 +912,7 @@ def display_cultural_dimensions(data, selected_countries):
     Returns:
         pd.DataFrame: A DataFrame containing cultural dimensions for the selected countries.
     """
+    import pandas as pd
     # Filter the data for the selected countries
     filtered_data = [
         {**{"Country": item["name"]}, **item["scores"]}
@@ -445,27 +937,27 @@ def plot_two_distance_boxplots_with_highlight(
     Create side-by-side boxplots for two datasets, highlighting and labeling specific country pairs.
 
     Args:
-        distance_df1 (pd.DataFrame): Distance matrix for the first dataset.
-        distance_df2 (pd.DataFrame): Distance matrix for the second dataset.
+        distance_df1 (DistanceMatrix or pd.DataFrame): Distance matrix for the first dataset.
+        distance_df2 (DistanceMatrix or pd.DataFrame): Distance matrix for the second dataset.
         highlight_pairs (list of tuples): List of country pairs to highlight (e.g., [("Germany", "Japan")]).
         labels (tuple): Labels for the datasets.
         title (str): Title for the plot.
         show (bool): Whether to display the plot.
     """
-    # Extract distances from the distance matrices, excluding self-distances
-    distances1 = distance_df1.where(~pd.DataFrame(np.eye(distance_df1.shape[0], dtype=bool), index=distance_df1.index, columns=distance_df1.columns)).stack()
-    distances2 = distance_df2.where(~pd.DataFrame(np.eye(distance_df2.shape[0], dtype=bool), index=distance_df2.index, columns=distance_df2.columns)).stack()
-    
+    import matplotlib.pyplot as plt
+    distance_matrix1 = as_distance_matrix(distance_df1)
+    distance_matrix2 = as_distance_matrix(distance_df2)
+
     # Highlighted values for dataset 1 and dataset 2
     highlighted_values1 = {
-        pair: distance_df1.loc[pair[0], pair[1]] for pair in highlight_pairs if pair[0] in distance_df1.index and pair[1] in distance_df1.columns
+        pair: distance_matrix1.distance(*pair) for pair in highlight_pairs if pair[0] in distance_matrix1 and pair[1] in distance_matrix1
     }
     highlighted_values2 = {
-        pair: distance_df2.loc[pair[0], pair[1]] for pair in highlight_pairs if pair[0] in distance_df2.index and pair[1] in distance_df2.columns
+        pair: distance_matrix2.distance(*pair) for pair in highlight_pairs if pair[0] in distance_matrix2 and pair[1] in distance_matrix2
     }
     
-    # Prepare the boxplot data
-    data = [distances1.values, distances2.values]
+    # Prepare the boxplot data: each pair once, without self-distances
+    data = [distance_matrix1.condensed, distance_matrix2.condensed]
     
     # Create the plot
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -499,6 +991,4 @@ def plot_two_distance_boxplots_with_highlight(
     
     # Save and optionally show the plot
     plt.tight_layout()
-    plt.savefig(f"{title.replace(' ', '_').lower()}.png", dpi=300)
-    if show:
-        plt.show()
\ No newline at end of file
+    save_figure(f"{title.replace(' ', '_').lower()}.png", show=show, dpi=PLOT_STYLE['dpi'])
\ No newline at end of file
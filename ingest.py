@@ -0,0 +1,182 @@
+# ingest.py
+# Converts long-format (entity, dimension, value) CSV files into the project's dataset format.
+import argparse
+import json
+import sys
+
+import numpy as np
+
+INGEST_CHUNK_SIZE = 1_000_000  # CSV rows parsed at a time
+MISSING_SENTINEL = -1  # Score value the distance functions treat as missing
+MISSING_VALUES = ("", "NA", "N/A", "#NULL!", "-")
+
+
+def ingest_long_csv(
+    source,
+    entity_column="country",
+    dimension_column="cultural dimension",
+    value_column="Value",
+    code_column="ctr",
+    value_range=(0, 100),
+    missing_values=MISSING_VALUES,
+    sentinel=MISSING_SENTINEL,
+    chunk_size=INGEST_CHUNK_SIZE,
+):
+    """
+    Read a long-format CSV (one entity/dimension/value per row) into dataset records.
+
+    The file is parsed in chunks; names and dimensions are kept as categoricals,
+    so only three compact columns stay in memory. The pivot to one row per
+    entity is done once, vectorized, at the end.
+
+    Validation:
+        - The entity, dimension and value columns must exist.
+        - Values must be numeric, a missing marker or the sentinel, and lie in `value_range`.
+        - An entity may not list the same dimension twice.
+    Missing values and dimensions an entity does not list become `sentinel`.
+
+    Args:
+        source (str or file-like): CSV path or buffer.
+        entity_column (str): Column with the entity names.
+        dimension_column (str): Column with the dimension names.
+        value_column (str): Column with the scores.
+        code_column (str): Optional column with a short entity code (stored as `datamapId`), or None.
+        value_range (tuple): Inclusive (min, max) of valid scores, or None to skip the check.
+        missing_values (tuple of str): Strings treated as missing.
+        sentinel (int): Value written for missing scores.
+        chunk_size (int): Number of rows parsed at a time.
+
+    Returns:
+        list of dict: Records with id (first row of the entity), name, datamapId, isoCode,
+            isoShortCode and scores, in order of first appearance.
+    """
+    import pandas as pd
+    columns = [entity_column, dimension_column, value_column]
+    header = pd.read_csv(source, nrows=0)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    missing = [column for column in columns if column not in header.columns]
+    if missing:
+        raise ValueError(f"Input has no column {', '.join(missing)} (found {', '.join(header.columns)}).")
+    use_code = code_column is not None and code_column in header.columns
+    if use_code:
+        columns.append(code_column)
+
+    parts = []
+    offset = 0
+    reader = pd.read_csv(
+        source,
+        usecols=columns,
+        dtype={column: str for column in columns},
+        keep_default_na=False,
+        chunksize=chunk_size,
+    )
+    for chunk in reader:
+        raw = chunk[value_column].str.strip()
+        values = pd.to_numeric(raw, errors="coerce")
+        is_missing = raw.isin(missing_values) | (values == sentinel)
+        invalid = values.isna() & ~is_missing
+        if invalid.any():
+            row = offset + int(np.flatnonzero(invalid.to_numpy())[0])
+            raise ValueError(f"Non-numeric value '{raw.iloc[row - offset]}' in data row {row}.")
+        if value_range is not None:
+            low, high = value_range
+            outside = ~is_missing & ((values < low) | (values > high))
+            if outside.any():
+                row = offset + int(np.flatnonzero(outside.to_numpy())[0])
+                raise ValueError(f"Value {values.iloc[row - offset]} in data row {row} is outside {low}-{high}.")
+
+        part = pd.DataFrame({
+            "entity": chunk[entity_column].str.strip().astype("category"),
+            "dimension": chunk[dimension_column].str.strip().astype("category"),
+            "value": values.mask(is_missing).to_numpy(dtype=float),
+            "row": np.arange(offset, offset + len(chunk)),
+        })
+        if use_code:
+            part["code"] = chunk[code_column].astype("category")
+        parts.append(part)
+        offset += len(chunk)
+
+    if not parts:
+        return []
+    from pandas.api.types import union_categoricals
+    long = pd.DataFrame({
+        column: union_categoricals([part[column] for part in parts]) if column in ("entity", "dimension", "code")
+        else np.concatenate([part[column].to_numpy() for part in parts])
+        for column in parts[0].columns
+    })
+
+    duplicated = long.duplicated(["entity", "dimension"])
+    if duplicated.any():
+        first = long[duplicated].iloc[0]
+        raise ValueError(f"Dimension '{first['dimension']}' is listed twice for '{first['entity']}' (data row {first['row']}).")
+
+    # Entities and dimensions keep their order of first appearance
+    entity_codes, entities = _appearance_codes(long["entity"])
+    dimension_codes, dimensions = _appearance_codes(long["dimension"])
+    scores = np.full((len(entities), len(dimensions)), np.nan)
+    scores[entity_codes, dimension_codes] = long["value"].to_numpy()
+
+    first_rows = np.full(len(entities), offset)
+    np.minimum.at(first_rows, entity_codes, long["row"].to_numpy())
+    codes = long["code"].to_numpy()[first_rows].tolist() if use_code else [None] * len(entities)
+
+    missing = np.isnan(scores)
+    integral = np.all(missing | (scores == np.round(scores)))
+    scores = np.where(missing, sentinel, scores)
+    rows = (scores.astype(np.int64) if integral else scores).tolist()
+    records = [
+        {
+            "id": first_row,
+            "name": name,
+            "datamapId": code,
+            "isoCode": None,
+            "isoShortCode": None,
+            "scores": dict(zip(dimensions, row)),
+        }
+        for first_row, name, code, row in zip(first_rows.tolist(), entities, codes, rows)
+    ]
+    return records
+
+
+def _appearance_codes(categorical):
+    # Renumber categorical codes so that categories are ordered by first appearance
+    codes = categorical.cat.codes.to_numpy()
+    order = np.unique(codes, return_index=True)[1]
+    appearance = codes[np.sort(order)]
+    renumber = np.empty(len(categorical.cat.categories), dtype=np.intp)
+    renumber[appearance] = np.arange(appearance.size)
+    return renumber[codes], categorical.cat.categories[appearance].tolist()
+
+
+def write_records(records, path):
+    """Write dataset records as indented JSON."""
+    with open(path, "w") as f:
+        json.dump(records, f, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a long-format (entity, dimension, value) CSV into a dataset JSON file")
+    parser.add_argument("input", help="Long-format CSV file")
+    parser.add_argument("output", help="Dataset JSON file to write, e.g. data/<framework>_data.json")
+    parser.add_argument("--entity", default="country", help="Entity column")
+    parser.add_argument("--dimension", default="cultural dimension", help="Dimension column")
+    parser.add_argument("--value", default="Value", help="Value column")
+    parser.add_argument("--code", default="ctr", help="Entity code column (optional)")
+    parser.add_argument("--range", nargs=2, type=float, default=(0, 100), metavar=("MIN", "MAX"), help="Valid score range")
+    args = parser.parse_args()
+
+    try:
+        records = ingest_long_csv(
+            args.input, entity_column=args.entity, dimension_column=args.dimension,
+            value_column=args.value, code_column=args.code, value_range=tuple(args.range),
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error ingesting {args.input}: {e}")
+        sys.exit(1)
+    write_records(records, args.output)
+    print(f"{len(records)} entities saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 # main.py
 import argparse
-import json
-from terminal import terminal_interface, clear_terminal, select_country_pairs
+import os
+import sys
+from terminal import terminal_interface, clear_terminal, entity_index, select_country_pairs
 from prompt_toolkit.completion import FuzzyCompleter, WordCompleter
 from prompt_toolkit import prompt
 
@@ -15,9 +16,14 @@ from rich.layout import Layout
 from time import sleep
 
 from functions import (
-    calculate_scaled_euclidean_distances, 
+    calculate_distances,
     plot_two_distance_boxplots_with_highlight
     )
+from metrics import DEFAULT_METRIC, METRICS
+from compare import compare_frameworks
+from cache import prune_stale_entries
+from dataset import DEFAULT_DATASETS, load_dataset
+from render import VECTOR_FORMATS, VECTOR_FORMATS_ENV
 
 def display_fullscreen_exit_message(console, message):
     """Displays a fullscreen exit message centered both horizontally and vertically."""
@@ -43,20 +49,73 @@ def display_fullscreen_exit_message(console, message):
         console.print(layout)
         sleep(1)  # Hold the screen for 2 seconds before exiting
 
+def load_datasets():
+    """
+    Load both datasets and drop cached distance matrices computed from outdated data files.
+
+    The JSON files are only parsed when their compiled artifacts are missing or stale.
+    """
+    hofstede_data = load_dataset("data/hofstede_data.json")
+    culture_map_data = load_dataset("data/culture_map_data.json")
+
+    prune_stale_entries()
+    return hofstede_data, culture_map_data
+
+def run_pair_lookup(input_path, output_path, dataset, columns, missing="drop", metric=DEFAULT_METRIC):
+    """
+    Write the distance of every pair in a file and report unknown country names.
+
+    Returns:
+        int: Process exit code, 0 if the file was processed.
+    """
+    from pair_lookup import lookup_pair_file
+
+    distance_matrix = calculate_distances(load_dataset(DEFAULT_DATASETS[dataset]["path"]), metric, missing=missing)
+    try:
+        report = lookup_pair_file(distance_matrix, input_path, output_path, columns=tuple(columns))
+    except (OSError, ValueError) as e:
+        print(f"[red]Error looking up distances: {e}")
+        return 1
+
+    print(f"[green]{report['resolved']} of {report['rows']} pairs resolved, written to {output_path}")
+    if report["unknown"]:
+        print("[yellow]Unknown country names (rows affected):")
+        for name, count in report["unknown"].items():
+            print(f"  {name}: {count}")
+    return 0
+
 def main():
     console = Console()
     parser = argparse.ArgumentParser(description="Cultural Dimensions Application")
     parser.add_argument("-t", "--terminal", action="store_true", help="Launch terminal interface")
     parser.add_argument("-s", "--show", action="store_true", help="Enable showing plots during execution")
+    parser.add_argument("-b", "--batch", metavar="JOB_FILE", help="Run the analyses listed in a JSON/YAML job file without the terminal interface")
+    parser.add_argument("-l", "--lookup", nargs=2, metavar=("PAIRS_IN", "PAIRS_OUT"), help="Add the distance of every country pair in a CSV/Parquet file and write the result")
+    parser.add_argument("--dataset", choices=list(DEFAULT_DATASETS), default="hofstede", help="Dataset used by --lookup")
+    parser.add_argument("--columns", nargs=2, metavar=("COUNTRY1", "COUNTRY2"), default=("country1", "country2"), help="Columns holding the country names for --lookup")
+    parser.add_argument("-m", "--missing", choices=("drop", "pairwise"), default="drop", help="Drop dimensions with missing scores, or compare each pair on the dimensions both countries have")
+    parser.add_argument("-d", "--metric", choices=list(METRICS), default=DEFAULT_METRIC, help="Distance metric used by every analysis")
+    parser.add_argument("-v", "--vector", nargs="+", choices=VECTOR_FORMATS, default=[], help="Also write every figure in these vector formats")
     args = parser.parse_args()
     show = args.show
+    if args.missing == "pairwise" and args.metric != "seuclidean":
+        parser.error("--missing pairwise is only available with --metric seuclidean")
+
+    if not show:
+        # Figures are only saved, so use the non-GUI backend (matplotlib is imported lazily)
+        os.environ["MPLBACKEND"] = "Agg"
+    if args.vector:
+        # Read by render.save_figure, also in the worker processes
+        os.environ[VECTOR_FORMATS_ENV] = ",".join(args.vector)
+
+    if args.batch:
+        from batch import run_batch_file
+        sys.exit(run_batch_file(args.batch, show=show))
 
+    if args.lookup:
+        sys.exit(run_pair_lookup(args.lookup[0], args.lookup[1], args.dataset, args.columns, missing=args.missing, metric=args.metric))
 
-    with open("data/hofstede_data.json", "r") as f:
-        hofstede_data = json.load(f)
-    
-    with open("data/culture_map_data.json", "r") as f:
-        culture_map_data = json.load(f)
+    hofstede_data, culture_map_data = load_datasets()
 
     if args.terminal:
         while True:
@@ -91,18 +150,18 @@ def main():
                     data = culture_map_data
                     title = "Culture Map Data"
                 elif data_choice == "3" or data_choice == entries[2]:
-                    hs_distance_df = calculate_scaled_euclidean_distances(hofstede_data)
-                    cm_distance_df = calculate_scaled_euclidean_distances(culture_map_data)
+                    hs_distances = calculate_distances(hofstede_data, args.metric, missing=args.missing)
+                    cm_distances = calculate_distances(culture_map_data, args.metric, missing=args.missing)
                     clear_terminal()
                     print("\nBox Plot of both frameworks with Highlighted Pairs")
                     
                     # Select country pairs for Hofstede framework
                     print("\n[bold blue]Select country pairs for the Hofstede framework:[/bold blue]")
-                    highlighted_pairs_hofstede = select_country_pairs(hs_distance_df)
+                    highlighted_pairs_hofstede = select_country_pairs(entity_index(hofstede_data, hs_distances.labels))
 
                     # Select country pairs for Culture Map framework
                     print("\n[bold blue]Select country pairs for the Culture Map framework:[/bold blue]")
-                    highlighted_pairs_culture_map = select_country_pairs(cm_distance_df)
+                    highlighted_pairs_culture_map = select_country_pairs(entity_index(culture_map_data, cm_distances.labels))
                     
                     # Combine pairs into a single dictionary for display
                     highlight_pairs = highlighted_pairs_hofstede + highlighted_pairs_culture_map
@@ -119,12 +178,23 @@ def main():
                     
                     # Plot the boxplot with or without highlighted pairs
                     plot_two_distance_boxplots_with_highlight(
-                        hs_distance_df,
-                        cm_distance_df, 
+                        hs_distances,
+                        cm_distances, 
                         highlight_pairs=highlight_pairs, 
                         title=f"Both frameworks - Boxplot with Highlights", 
                         show=show
                     )
+
+                    with console.status("[bold blue]Running Mantel permutation tests..."):
+                        comparison = compare_frameworks(hs_distances, cm_distances)
+                    console.print(
+                        Panel(
+                            f"{comparison['countries']} common countries, {comparison['pairs']} pairs\n\n"
+                            f"[bold green]Pearson:[/bold green] r = {comparison['pearson']:.3f} (Mantel p = {comparison['pearson_p']:.4f})\n"
+                            f"[bold green]Spearman:[/bold green] rho = {comparison['spearman']:.3f} (Mantel p = {comparison['spearman_p']:.4f})\n\n"
+                            f"p-values from {comparison['permutations']} permutations of the countries",
+                            title="[bold blue]Agreement of the Frameworks[/bold blue]", border_style="blue", padding=1)
+                    )
                     
                     console.print(
                         Panel(f"[bold green]:sparkle: Box plot generated. :sparkle: [/bold green][red]\n\nPress Enter to return to the submenu...", border_style="green", padding=1)
@@ -138,7 +208,7 @@ def main():
                     display_fullscreen_exit_message(console, ":sparkle: Thank you for using the application! :sparkle: \nSee you next time.")
                     break
                 # Pass data to the terminal interface
-                terminal_interface(data, title, show)
+                terminal_interface(data, title, show, missing=args.missing, metric=args.metric)
                 clear_terminal()
             except KeyboardInterrupt:
                 display_fullscreen_exit_message(console, "Keyboard Interrupt.\n\nExiting.")
@@ -0,0 +1,77 @@
+# masked.py
+import numpy as np
+
+MASKED_CHUNK_ROWS = 2048  # Rows of the condensed output computed per batch of matrix products
+
+
+def masked_variances(scores):
+    """
+    Per-dimension sample variances over the available (non-NaN) values.
+
+    Args:
+        scores (np.ndarray): Score matrix with NaN for missing values.
+
+    Returns:
+        np.ndarray: Variance per dimension, NaN where fewer than two values exist.
+    """
+    present = ~np.isnan(scores)
+    counts = present.sum(axis=0)
+    filled = np.where(present, scores, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = filled.sum(axis=0) / counts
+        squares = np.where(present, (scores - means) ** 2, 0.0).sum(axis=0)
+        return np.where(counts > 1, squares / (counts - 1), np.nan)
+
+
+def pairwise_complete_seuclidean(scores, variances=None, chunk_rows=MASKED_CHUNK_ROWS):
+    """
+    Variance-scaled euclidean distances over the dimensions each pair shares.
+
+    With Z = X / sqrt(V) (zero where missing), the mask M of available values and
+    S(i, j) the dimensions both entities have, the squared distance over S is
+
+        sum_S z_i^2 + sum_S z_j^2 - 2 sum_S z_i z_j
+            = (Z^2 M^T)_ij + (M Z^2^T)_ij - 2 (Z Z^T)_ij
+
+    and is rescaled by d / |S| with |S| = (M M^T)_ij, so pairs sharing fewer
+    dimensions stay comparable. For complete data this is the `pdist`
+    "seuclidean" result (up to rounding). Pairs without a shared dimension get NaN;
+    `functions.calculate_distances` rejects such results with a ValueError.
+
+    Args:
+        scores (np.ndarray): Score matrix (entities x dimensions) with NaN for missing values.
+        variances (np.ndarray): Per-dimension variances (defaults to `masked_variances`).
+        chunk_rows (int): Rows of the output computed per batch of matrix products.
+
+    Returns:
+        np.ndarray: Condensed distance vector in `pdist` order.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if variances is None:
+        variances = masked_variances(scores)
+    n, d = scores.shape
+    # Dimensions without a usable variance carry no information for any pair
+    usable = np.isfinite(variances) & (variances > 0)
+    mask = ~np.isnan(scores) & usable
+    z = np.where(mask, scores / np.sqrt(np.where(usable, variances, 1.0)), 0.0)
+    z_squared = z ** 2
+    m = mask.astype(float)
+    total = int(usable.sum()) or d
+
+    condensed = np.empty(n * (n - 1) // 2)
+    start = 0
+    for r0 in range(0, n - 1, chunk_rows):
+        r1 = min(r0 + chunk_rows, n - 1)
+        # The block holds rows r0..r1-1 against columns r0+1..n-1, a superset of their upper triangle
+        rows, columns = slice(r0, r1), slice(r0 + 1, n)
+        squared = z_squared[rows] @ m[columns].T + m[rows] @ z_squared[columns].T - 2.0 * (z[rows] @ z[columns].T)
+        shared = m[rows] @ m[columns].T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            block = np.sqrt(np.maximum(squared, 0.0) * total / shared)
+        block[shared == 0] = np.nan
+        for offset, i in enumerate(range(r0, r1)):
+            length = n - i - 1
+            # Row i's upper-triangle part starts at column i + 1, i.e. block column i - r0
+            condensed[start:start + length] = block[offset, i - r0:]
+            start += length
+    return condensed
@@ -0,0 +1,210 @@
+# metrics.py
+# Registry of the distance metrics available to every analysis. Each metric is a
+# vectorized kernel over the score matrix plus the per-dataset statistics it needs;
+# the statistics are computed once per dataset and shared by all metrics.
+import numpy as np
+
+DEFAULT_METRIC = "seuclidean"
+
+
+class ScoreStatistics:
+    """
+    Per-dataset precomputations shared by the metric kernels.
+
+    Every statistic is computed on first use and kept. `functions.calculate_distances`
+    keeps one instance per dataset, so computing several metrics derives the
+    variances, the inverse covariance and the row norms once.
+
+    Args:
+        scores (np.ndarray): Score matrix (entities x dimensions) without missing values.
+        variances (np.ndarray): Per-dimension sample variances, if already known.
+    """
+
+    def __init__(self, scores, variances=None):
+        self.scores = np.asarray(scores, dtype=float)
+        self._variances = variances
+        self._standardized = None
+        self._whitening = None
+        self._unit_rows = None
+
+    @property
+    def variances(self):
+        if self._variances is None:
+            self._variances = self.scores.var(axis=0, ddof=1)
+        return self._variances
+
+    @property
+    def standardized(self):
+        """Scores divided by the per-dimension standard deviations."""
+        if self._standardized is None:
+            self._standardized = self.scores / np.sqrt(self.variances)
+        return self._standardized
+
+    @property
+    def whitening(self):
+        """
+        Matrix W with W W^T equal to the inverse covariance, so Mahalanobis
+        distances are plain euclidean distances of the scores times W.
+        """
+        if self._whitening is None:
+            covariance = np.atleast_2d(np.cov(self.scores, rowvar=False))
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+            # Directions without variance (e.g. fewer entities than dimensions) are left out, as with a pseudo-inverse
+            keep = eigenvalues > eigenvalues.max() * 1e-12
+            self._whitening = eigenvectors[:, keep] / np.sqrt(eigenvalues[keep])
+        return self._whitening
+
+    @property
+    def unit_rows(self):
+        """Score rows scaled to unit length (zero rows stay zero)."""
+        if self._unit_rows is None:
+            norms = np.linalg.norm(self.scores, axis=1, keepdims=True)
+            self._unit_rows = self.scores / np.where(norms > 0, norms, 1.0)
+        return self._unit_rows
+
+
+def seuclidean(statistics):
+    """Variance-scaled euclidean distance (the project's original metric)."""
+    from scipy.spatial.distance import pdist
+    return pdist(statistics.scores, metric="seuclidean", V=statistics.variances)
+
+
+def kogut_singh(statistics):
+    """
+    Kogut-Singh index: the mean over dimensions of the squared, variance-scaled differences.
+
+        KS_ij = 1/d * sum_k (I_ki - I_kj)^2 / V_k
+    """
+    from scipy.spatial.distance import pdist
+    return pdist(statistics.standardized, metric="sqeuclidean") / statistics.scores.shape[1]
+
+
+def mahalanobis(statistics):
+    """Mahalanobis distance with the inverse covariance of all entities."""
+    from scipy.spatial.distance import pdist
+    return pdist(statistics.scores @ statistics.whitening, metric="euclidean")
+
+
+def cosine(statistics):
+    """
+    Cosine distance (1 - cosine similarity) of the raw score vectors.
+
+    For unit vectors |a - b|^2 = 2 - 2 cos(a, b), so the distances come from
+    one euclidean pass over the normalized rows.
+    """
+    from scipy.spatial.distance import pdist
+    return pdist(statistics.unit_rows, metric="sqeuclidean") / 2.0
+
+
+def seuclidean_to(statistics, scores):
+    """Standardized euclidean distances of new score rows to the dataset's entities."""
+    from scipy.spatial.distance import cdist
+    return cdist(scores, statistics.scores, metric="seuclidean", V=statistics.variances)
+
+
+def kogut_singh_to(statistics, scores):
+    """Kogut-Singh indices of new score rows to the dataset's entities."""
+    from scipy.spatial.distance import cdist
+    standardized = np.asarray(scores, dtype=float) / np.sqrt(statistics.variances)
+    return cdist(standardized, statistics.standardized, metric="sqeuclidean") / statistics.scores.shape[1]
+
+
+def mahalanobis_to(statistics, scores):
+    """Mahalanobis distances of new score rows to the dataset's entities (the dataset's covariance)."""
+    from scipy.spatial.distance import cdist
+    return cdist(np.asarray(scores, dtype=float) @ statistics.whitening, statistics.scores @ statistics.whitening)
+
+
+def cosine_to(statistics, scores):
+    """Cosine distances of new score rows to the dataset's entities."""
+    from scipy.spatial.distance import cdist
+    scores = np.asarray(scores, dtype=float)
+    norms = np.linalg.norm(scores, axis=1, keepdims=True)
+    unit_rows = scores / np.where(norms > 0, norms, 1.0)
+    return cdist(unit_rows, statistics.unit_rows, metric="sqeuclidean") / 2.0
+
+
+# Name -> (kernel, label used in titles and menus)
+METRICS = {
+    "seuclidean": (seuclidean, "Standardized Euclidean"),
+    "kogut_singh": (kogut_singh, "Kogut-Singh Index"),
+    "mahalanobis": (mahalanobis, "Mahalanobis"),
+    "cosine": (cosine, "Cosine"),
+}
+
+# Name -> function of (ScoreStatistics, new score rows) returning the (new, dataset) distances
+CROSS_KERNELS = {
+    "seuclidean": seuclidean_to,
+    "kogut_singh": kogut_singh_to,
+    "mahalanobis": mahalanobis_to,
+    "cosine": cosine_to,
+}
+
+
+def register_metric(name, kernel, label=None, cross_kernel=None):
+    """
+    Make a metric available to `functions.calculate_distances` and the interfaces.
+
+    Args:
+        name (str): Metric name used in the API, the CLI and batch files.
+        kernel (callable): Function of a `ScoreStatistics` returning the condensed distance vector.
+        label (str): Human-readable name (defaults to `name`).
+        cross_kernel (callable): Function of a `ScoreStatistics` and new score rows returning
+            their distances to the dataset's entities; needed to place new countries.
+    """
+    METRICS[name] = (kernel, label or name)
+    if cross_kernel is not None:
+        CROSS_KERNELS[name] = cross_kernel
+
+
+def metric_label(name):
+    """Human-readable name of a registered metric."""
+    return METRICS[name][1]
+
+
+def metric_title(title, metric):
+    """
+    Dataset title, followed by the metric name unless it is the default metric.
+
+    Figures and exports are named after their titles, so results of different
+    metrics do not overwrite each other.
+    """
+    return title if metric == DEFAULT_METRIC else f"{title} ({metric_label(metric)})"
+
+
+def compute_metric(name, statistics):
+    """
+    Compute the condensed distances of a registered metric.
+
+    Args:
+        name (str): Metric name, see METRICS.
+        statistics (ScoreStatistics): Shared statistics of the dataset.
+
+    Returns:
+        np.ndarray: Condensed distance vector in `pdist` order.
+    """
+    if name not in METRICS:
+        raise ValueError(f"Unknown metric '{name}'. Choose from {', '.join(METRICS)}.")
+    return METRICS[name][0](statistics)
+
+
+def compute_cross_metric(name, statistics, scores):
+    """
+    Compute the distances of new score rows to a dataset under a registered metric.
+
+    The dataset's statistics (variances, covariance) are used unchanged, so the
+    result is on the scale of the dataset's own distance matrix.
+
+    Args:
+        name (str): Metric name, see METRICS.
+        statistics (ScoreStatistics): Statistics of the dataset.
+        scores (np.ndarray): New score rows over the dataset's dimensions.
+
+    Returns:
+        np.ndarray: Distances of shape (new rows, dataset entities).
+    """
+    if name not in METRICS:
+        raise ValueError(f"Unknown metric '{name}'. Choose from {', '.join(METRICS)}.")
+    if name not in CROSS_KERNELS:
+        raise ValueError(f"Metric '{name}' has no kernel for distances to new countries.")
+    return CROSS_KERNELS[name](statistics, scores)
@@ -0,0 +1,129 @@
+# neighbours.py
+import numpy as np
+
+from functions import prepare_scores
+
+
+def check_neighbour_count(k, n):
+    """Raise a ValueError unless 1 <= k <= n - 1 for an index over n entities."""
+    if not 1 <= k <= n - 1:
+        raise ValueError(f"The number of neighbours must be between 1 and {n - 1}, got {k}.")
+
+
+class NeighbourIndex:
+    """
+    KD-tree over the variance-scaled score vectors.
+
+    Dividing every dimension by its standard deviation turns the standardized
+    euclidean distance into a plain euclidean one, so neighbour queries can be
+    answered by the tree without a distance matrix.
+
+    Args:
+        labels (list of str): Entity names in row order.
+        scores (np.ndarray): Score matrix of shape (n_entities, n_dimensions).
+        variances (np.ndarray): Per-dimension variances used for scaling.
+    """
+
+    def __init__(self, labels, scores, variances):
+        from scipy.spatial import cKDTree
+
+        self.labels = list(labels)
+        self.points = np.asarray(scores, dtype=float) / np.sqrt(np.asarray(variances, dtype=float))
+        self.tree = cKDTree(self.points)
+        self._positions = {label: i for i, label in enumerate(self.labels)}
+
+    @classmethod
+    def from_data(cls, data, score_key="scores"):
+        """Build the index from dataset records, using the same preparation as the distance matrix."""
+        return cls(*prepare_scores(data, score_key))
+
+    def __contains__(self, label):
+        return label in self._positions
+
+    def most_similar(self, label, k=5):
+        """
+        Return the k entities closest to `label`.
+
+        Returns:
+            list of tuple: (name, distance) pairs, closest first.
+        """
+        check_neighbour_count(k, len(self.labels))
+        i = self._positions[label]
+        # Ask for one extra neighbour because the entity finds itself
+        distances, indices = self.tree.query(self.points[i], k=min(k + 1, len(self.labels)))
+        return [
+            (self.labels[j], float(d)) for d, j in zip(np.atleast_1d(distances), np.atleast_1d(indices)) if j != i
+        ][:k]
+
+    def least_similar(self, label, k=5):
+        """
+        Return the k entities farthest from `label`.
+
+        Farthest-neighbour queries are not supported by the tree, so the distances
+        to all points are computed in one vectorized pass and partially selected.
+
+        Returns:
+            list of tuple: (name, distance) pairs, farthest first.
+        """
+        check_neighbour_count(k, len(self.labels))
+        i = self._positions[label]
+        distances = np.sqrt(((self.points - self.points[i]) ** 2).sum(axis=1))
+        farthest = np.argpartition(distances, -k)[-k:]
+        farthest = farthest[np.argsort(distances[farthest])[::-1]]
+        return [(self.labels[j], float(distances[j])) for j in farthest]
+
+    def within_radius(self, label, radius):
+        """
+        Return all entities within `radius` of `label`.
+
+        Returns:
+            list of tuple: (name, distance) pairs, closest first.
+        """
+        i = self._positions[label]
+        indices = np.asarray(self.tree.query_ball_point(self.points[i], r=radius), dtype=np.intp)
+        indices = indices[indices != i]
+        distances = np.sqrt(((self.points[indices] - self.points[i]) ** 2).sum(axis=1))
+        order = np.argsort(distances)
+        return [(self.labels[j], float(distances[o])) for o, j in zip(order, indices[order])]
+
+
+class MatrixNeighbours:
+    """
+    Neighbour queries answered from the rows of a distance matrix.
+
+    Same interface as NeighbourIndex, for distances a KD-tree cannot reproduce
+    (e.g. pairwise-complete distances over differing dimensions). Each query
+    gathers one matrix row, O(n).
+
+    Args:
+        distance_matrix (DistanceMatrix): The distance matrix.
+    """
+
+    def __init__(self, distance_matrix):
+        self.distance_matrix = distance_matrix
+        self.labels = distance_matrix.labels
+
+    def __contains__(self, label):
+        return label in self.distance_matrix
+
+    def _others(self, label):
+        distances = self.distance_matrix.row(label)
+        others = np.flatnonzero((np.arange(len(self.labels)) != self.distance_matrix.position(label)) & ~np.isnan(distances))
+        return others, distances[others]
+
+    def most_similar(self, label, k=5):
+        check_neighbour_count(k, len(self.labels))
+        others, distances = self._others(label)
+        order = np.argsort(distances, kind="stable")[:k]
+        return [(self.labels[others[o]], float(distances[o])) for o in order]
+
+    def least_similar(self, label, k=5):
+        check_neighbour_count(k, len(self.labels))
+        others, distances = self._others(label)
+        order = np.argsort(distances, kind="stable")[::-1][:k]
+        return [(self.labels[others[o]], float(distances[o])) for o in order]
+
+    def within_radius(self, label, radius):
+        others, distances = self._others(label)
+        order = np.argsort(distances, kind="stable")
+        return [(self.labels[others[o]], float(distances[o])) for o in order if distances[o] <= radius]
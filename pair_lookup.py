@@ -0,0 +1,154 @@
+# pair_lookup.py
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from distance_matrix import as_distance_matrix
+
+LOOKUP_CHUNK_SIZE = 1_000_000  # Rows read, resolved and written at a time
+LOOKUP_FORMATS = (".csv", ".parquet")
+
+
+def resolve_names(distance_matrix, names, index=None):
+    """
+    Map entity names to matrix positions, -1 for unknown names.
+
+    Each distinct name is looked up once, so millions of rows over a few hundred
+    countries cost one factorization plus an integer gather.
+
+    Args:
+        distance_matrix (DistanceMatrix): The distance matrix.
+        names (array-like): Entity names.
+        index (pd.Index): Precomputed `distance_matrix.index`, to avoid rebuilding it per chunk.
+
+    Returns:
+        np.ndarray: Matrix positions of the names.
+    """
+    import pandas as pd
+    index = distance_matrix.index if index is None else index
+    codes, uniques = pd.factorize(np.asarray(names, dtype=object))
+    # factorize marks missing values with -1, which selects the trailing -1 slot
+    positions = np.append(index.get_indexer(uniques), -1)
+    return positions[codes]
+
+
+def pair_distances(distance_df, first, second, index=None):
+    """
+    Gather the distances of many (name, name) pairs in one call.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        first, second (array-like): Names of the two entities of every pair.
+        index (pd.Index): Precomputed name index (see `resolve_names`).
+
+    Returns:
+        tuple: (distances with NaN for unknown names, mask of rows with an unknown name)
+    """
+    distance_matrix = as_distance_matrix(distance_df)
+    i = resolve_names(distance_matrix, first, index)
+    j = resolve_names(distance_matrix, second, index)
+    unknown = (i < 0) | (j < 0)
+    distances = distance_matrix.take(np.where(unknown, 0, i), np.where(unknown, 0, j))
+    distances[unknown] = np.nan
+    return distances, unknown
+
+
+def _read_chunks(path, columns, chunk_size):
+    import pandas as pd
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # The name columns are read as plain strings, everything else as pandas infers
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={column: str for column in columns})
+
+
+def _output_schema(chunk, columns, distance_column):
+    # The schema of the first chunk with fixed types for the columns this module fills,
+    # so a name column that happens to be all null there does not become a null column
+    import pyarrow as pa
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if field.name in columns or pa.types.is_null(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+        elif field.name == distance_column:
+            schema = schema.set(i, pa.field(field.name, pa.float64()))
+    return schema
+
+
+def lookup_pair_file(distance_df, input_path, output_path, columns=("country1", "country2"), distance_column="distance", chunk_size=LOOKUP_CHUNK_SIZE):
+    """
+    Add the distance of every pair in a CSV or Parquet file, streaming it in chunks.
+
+    Rows with a name that is not in the distance matrix get an empty distance and
+    are counted in the returned report instead of failing the whole file. Parquet
+    output has string name columns and a float64 distance column in every chunk.
+    The output is written under a temporary name and renamed when complete, so a
+    failure never leaves a truncated file behind.
+
+    Args:
+        distance_df (DistanceMatrix or pd.DataFrame): The distance matrix.
+        input_path (str): CSV or Parquet file with one pair per row.
+        output_path (str): CSV or Parquet file to write (format chosen by suffix).
+        columns (tuple of str): Names of the two columns holding the entity names.
+        distance_column (str): Name of the added column.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        dict: Report with the number of rows, resolved rows and unknown names with their counts.
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    for path in (input_path, output_path):
+        if path.suffix not in LOOKUP_FORMATS:
+            raise ValueError(f"Unsupported file type '{path.suffix}'. Use {' or '.join(LOOKUP_FORMATS)}.")
+    distance_matrix = as_distance_matrix(distance_df)
+    index = distance_matrix.index
+    first_column, second_column = columns
+
+    rows = resolved = 0
+    unknown_names = Counter()
+    writer = None
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, suffix=f"{output_path.suffix}.tmp")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    n = -1
+    try:
+        for n, chunk in enumerate(_read_chunks(input_path, columns, chunk_size)):
+            missing = [column for column in columns if column not in chunk.columns]
+            if missing:
+                raise ValueError(f"Input file has no column {', '.join(missing)}.")
+            distances, unknown = pair_distances(distance_matrix, chunk[first_column], chunk[second_column], index)
+            chunk[distance_column] = distances
+
+            rows += len(chunk)
+            resolved += int((~unknown).sum())
+            if unknown.any():
+                for column in columns:
+                    names = chunk.loc[unknown, column]
+                    unknown_names.update(names[~names.isin(index)].fillna("<missing>").tolist())
+
+            if output_path.suffix == ".parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    schema = _output_schema(chunk, columns, distance_column)
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            else:
+                chunk.to_csv(tmp_path, mode="w" if n == 0 else "a", header=n == 0, index=False)
+        if writer is not None:
+            writer.close()
+            writer = None
+        if n >= 0:
+            os.replace(tmp_path, output_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
+
+    return {"rows": rows, "resolved": resolved, "unknown": dict(unknown_names.most_common())}
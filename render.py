@@ -0,0 +1,181 @@
+# render.py
+# Two-stage figure output: a low-resolution preview (or the figure window) right
+# away, and the full-resolution files from a background writer thread.
+import atexit
+import os
+import queue
+import tempfile
+import threading
+from pathlib import Path
+
+RENDER_DPI = 300
+PREVIEW_DPI = 72
+PREVIEW_DIR = Path(".cache") / "previews"
+VECTOR_FORMATS = ("pdf", "svg")
+VECTOR_FORMATS_ENV = "FIGURE_VECTOR_FORMATS"  # Comma-separated vector formats written next to each PNG
+WRITER_QUEUE_SIZE = 4  # Figures waiting for the writer before save_figure blocks
+RASTERIZE_MIN_ELEMENTS = 2_000  # Markers/segments from which a layer is embedded as an image in vector files
+
+
+def vector_formats():
+    """Vector formats requested through VECTOR_FORMATS_ENV (inherited by worker processes)."""
+    requested = [fmt.strip().lower() for fmt in os.environ.get(VECTOR_FORMATS_ENV, "").split(",") if fmt.strip()]
+    unknown = set(requested) - set(VECTOR_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown vector format '{unknown.pop()}'. Choose from {', '.join(VECTOR_FORMATS)}.")
+    return tuple(requested)
+
+
+def rasterize_heavy_layers(fig, min_elements=RASTERIZE_MIN_ELEMENTS):
+    """
+    Mark the large scatter, line collection and marker layers of a figure as rasterized.
+
+    Only vector outputs are affected: those layers are embedded as one image at
+    the save DPI instead of thousands of vector paths, while axes, labels and
+    text stay vector. PNG output is unchanged.
+
+    Returns:
+        int: Number of layers marked.
+    """
+    from matplotlib.collections import Collection
+    from matplotlib.lines import Line2D
+    marked = 0
+    for ax in fig.axes:
+        for artist in ax.get_children():
+            if isinstance(artist, Collection):
+                size = max(len(artist.get_offsets()), len(artist.get_paths()))
+            elif isinstance(artist, Line2D) and artist.get_marker() not in (None, "None", "", " "):
+                size = len(artist.get_xdata())
+            else:
+                continue
+            if size >= min_elements:
+                artist.set_rasterized(True)
+                marked += 1
+    return marked
+
+
+def _save_atomic(fig, path, fmt, dpi):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=f".{fmt}.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            fig.savefig(f, format=fmt, dpi=dpi)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class FigureWriter:
+    """
+    Background thread writing finished figures at full resolution.
+
+    Figures are handed over detached from pyplot, so the thread is their only
+    user. The queue is bounded: a caller producing figures faster than they are
+    written waits instead of holding an unbounded number of figures in memory.
+    Files are written under a temporary name and renamed, so a figure file is
+    never seen half-written.
+
+    Args:
+        max_queued (int): Figures that may wait for the writer.
+    """
+
+    def __init__(self, max_queued=WRITER_QUEUE_SIZE):
+        self.max_queued = max_queued
+        self.errors = []
+        self._reset()
+
+    def _reset(self):
+        # A forked process inherits the queue's waiters but not the thread, so it starts afresh
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fig, path, formats=("png",), dpi=RENDER_DPI):
+        """
+        Queue a figure for writing; blocks while the queue is full.
+
+        Args:
+            fig (Figure): Figure to write (no longer drawn on by the caller).
+            path (str or Path): Path of the PNG; other formats replace its suffix.
+            formats (tuple of str): Output formats.
+            dpi (int): Resolution of the PNG and of rasterized layers.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="figure-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((fig, Path(path), formats, dpi))
+
+    def _work(self):
+        while True:
+            fig, path, formats, dpi = self._queue.get()
+            try:
+                for fmt in formats:
+                    _save_atomic(fig, path.with_suffix(f".{fmt}"), fmt, dpi)
+            except Exception as e:
+                self.errors.append(f"{path}: {type(e).__name__}: {e}")
+                print(f"Error writing figure {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def pending(self):
+        """Number of figures not written yet."""
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Wait until every queued figure has been written."""
+        self._queue.join()
+
+
+# Shared by every plotting function; flushed when the interpreter exits
+figure_writer = FigureWriter()
+atexit.register(figure_writer.flush)
+os.register_at_fork(after_in_child=figure_writer._reset)
+
+
+def save_figure(path, show=False, fig=None, dpi=RENDER_DPI):
+    """
+    Output a finished figure in two stages.
+
+    First the figure is shown (with `show`) or saved as a PREVIEW_DPI preview
+    in PREVIEW_DIR, which takes a fraction of the full-resolution save. The
+    figure is then detached from pyplot and written at `dpi` as PNG, plus the
+    vector formats of `vector_formats()`, by the background `figure_writer`.
+    Callers continue as soon as the first stage is done; `flush_figures` waits
+    for the files.
+
+    Args:
+        path (str or Path): Path of the full-resolution PNG.
+        show (bool): Show the figure instead of writing a preview.
+        fig (Figure): Figure to output (defaults to the current figure).
+        dpi (int): Resolution of the PNG.
+
+    Returns:
+        Path: Path of the preview, or None when the figure was shown.
+    """
+    import matplotlib.pyplot as plt
+    fig = fig or plt.gcf()
+    formats = ("png", *vector_formats())
+    if len(formats) > 1:
+        rasterize_heavy_layers(fig)
+
+    preview = None
+    if show:
+        plt.show()
+    else:
+        preview = PREVIEW_DIR / Path(path).name
+        try:
+            _save_atomic(fig, preview, "png", PREVIEW_DPI)
+        except OSError as e:
+            print(f"Error writing preview: {e}")
+            preview = None
+    plt.close(fig)
+    figure_writer.submit(fig, path, formats, dpi)
+    return preview
+
+
+def flush_figures():
+    """Wait until all figures handed to the writer are on disk."""
+    figure_writer.flush()
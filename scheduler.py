@@ -0,0 +1,82 @@
+# scheduler.py
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from render import flush_figures
+
+# A unit of work: `func(*args, **kwargs)` must be a module-level (picklable) function
+Job = namedtuple("Job", ["name", "func", "args", "kwargs"], defaults=((), {}))
+
+
+def _init_worker():
+    # Every worker renders into its own off-screen Agg figures
+    os.environ["MPLBACKEND"] = "Agg"
+
+
+def _run_job(func, args, kwargs):
+    start = perf_counter()
+    try:
+        return func(*args, **kwargs), None, perf_counter() - start
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", perf_counter() - start
+    finally:
+        # Pool workers end without running exit handlers, so write the job's figures now
+        flush_figures()
+        # Workers are reused between jobs, so release the job's figures
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+
+
+def run_jobs(jobs, max_workers=None, on_start=None, on_complete=None):
+    """
+    Run independent jobs concurrently in a process pool.
+
+    Embedding, clustering and rendering jobs share nothing but their inputs, so
+    each one runs in its own worker with its own figures. The wall-clock time of
+    a job set therefore approaches the duration of its slowest job.
+
+    Args:
+        jobs (list of Job): Jobs to run.
+        max_workers (int): Number of worker processes (defaults to one per job, capped
+            at the CPU count). 0 runs the jobs one after the other in this process,
+            which is required when figures are displayed interactively.
+        on_start (callable): Called with each job when it is submitted.
+        on_complete (callable): Called as `on_complete(job, result, error, seconds)` as
+            soon as a job finishes, in completion order.
+
+    Returns:
+        list of tuple: (result, error, seconds) per job, in the order of `jobs`.
+    """
+    results = [None] * len(jobs)
+
+    def finished(i, outcome):
+        results[i] = outcome
+        if on_complete:
+            on_complete(jobs[i], *outcome)
+
+    if max_workers == 0:
+        for i, job in enumerate(jobs):
+            if on_start:
+                on_start(job)
+            start = perf_counter()
+            try:
+                outcome = (job.func(*job.args, **job.kwargs), None, perf_counter() - start)
+            except Exception as e:
+                outcome = (None, f"{type(e).__name__}: {e}", perf_counter() - start)
+            finished(i, outcome)
+        return results
+
+    if max_workers is None:
+        max_workers = max(1, min(len(jobs), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = {}
+        for i, job in enumerate(jobs):
+            futures[executor.submit(_run_job, job.func, job.args, job.kwargs)] = i
+            if on_start:
+                on_start(job)
+        for future in as_completed(futures):
+            finished(futures[future], future.result())
+    return results
@@ -1,14 +1,15 @@
 # terminal.py
 import os
 from prompt_toolkit import prompt
-from prompt_toolkit.completion import FuzzyCompleter, WordCompleter
+from prompt_toolkit.completion import Completer, Completion
+import numpy as np
 from functions import (
-    calculate_scaled_euclidean_distances, 
+    NETWORK_MODES,
+    calculate_distances,
     visualize_country_network, 
-    plot_kmeans_with_highlight_MDS, 
-    plot_kmeans_with_highlight_t_SNE, 
-    export_distances_to_csv, 
-    find_max_min_distances, 
+    plot_clusters_with_highlight_MDS, 
+    plot_clusters_with_highlight_t_SNE, 
+    find_extreme_pairs, 
     find_max_min_distances_for_country, 
     plot_country_distance_boxplot_with_highlight,
     plot_all_distance_boxplot_with_highlight,
@@ -21,23 +22,74 @@ from rich.columns import Columns
 from rich.panel import Panel
 from rich.progress import Progress
 from rich.align import Align
-from rich.prompt import Prompt
+from rich.prompt import Prompt, IntPrompt, FloatPrompt
 from rich.table import Table
-from time import sleep
 import pyperclip
+from distance_io import EXPORT_FORMATS, export_distances
+from neighbours import MatrixNeighbours, NeighbourIndex
+from clustering import clustering_label, sweep_clusters
+from scheduler import Job, run_jobs
+from metrics import DEFAULT_METRIC, METRICS, metric_label, metric_title
+from bootstrap import BOOTSTRAP_METHODS, BOOTSTRAP_REPLICATES, bootstrap_distances
+from entities import DEFAULT_HIGHLIGHTS, EntityIndex
+from embeddings import get_embedding
+from background import BackgroundTasks
+from cache import LRUMemo, records_fingerprint
 
 console = Console()
 
+DEFAULT_PAIRS = 5  # Pairs listed by "Find Maximum and Minimum Distances" unless chosen otherwise
+
+# EntityIndex keyed by (records fingerprint, labels it covers); filled by the background tasks too
+_entity_indexes = LRUMemo(max_entries=8)
+
 
 def clear_terminal():
     """Clear the terminal output."""
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def dynamic_country_selection(prompt_message, countries, allow_empty=False):
+class EntityCompleter(Completer):
+    """Prompt completions from the trigram search of an EntityIndex."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        for name in self.index.search(text):
+            yield Completion(name, start_position=-len(text))
+
+def entity_index(records, countries):
+    """
+    Return the cached entity index of some countries of a dataset.
+
+    Args:
+        records (list of dict or Dataset): Dataset records, whose codes are indexed with the names.
+        countries (list of str): Country labels to index (e.g. those of a distance matrix).
+
+    Returns:
+        EntityIndex: Index resolving names, aliases and codes to the labels.
+    """
+    key = (records_fingerprint(records), tuple(countries))
+    index = _entity_indexes.get(key)
+    if index is None:
+        # Only the countries of the list are indexed, so nothing resolves to a label outside it
+        index = _entity_indexes.put(key, EntityIndex.from_records(records, names=key[1]))
+    return index
+
+def dynamic_country_selection(prompt_message, index, allow_empty=False):
     """
     Use fuzzy search with autocompletion for country selection.
+
+    Names, aliases (e.g. "UK" for "Great Britain") and ISO codes are accepted
+    and resolved to the country's label.
+
+    Args:
+        prompt_message (str): Message shown above the prompt.
+        index (EntityIndex): Index of the selectable countries, from `entity_index`.
+        allow_empty (bool): Whether an empty input (returning None) is accepted.
     """
-    completer = FuzzyCompleter(WordCompleter(countries, ignore_case=True))
+    completer = EntityCompleter(index)
     while True:
         # Display the prompt message with rich
         console.print(
@@ -52,26 +104,27 @@ def dynamic_country_selection(prompt_message, countries, allow_empty=False):
         
         if allow_empty and country == "":
             return None
-        if country in countries:
-            return country
+        resolved = index.resolve(country)
+        if resolved is not None:
+            return resolved
         
         # Display error message using rich
         console.print(Panel("[bold red]Invalid selection. Please try again.[/bold red]", border_style="red"))
 
-def display_selected_cultural_dimensions(data, countries):
+def display_selected_cultural_dimensions(data, index):
     """
     Display cultural dimensions for dynamically selected countries using a Rich table
     and copy the table to the clipboard for pasting into Word.
 
     Args:
         data (list of dict): List of dictionaries containing country data and their cultural dimensions.
-        countries (list of str): List of all available countries.
+        index (EntityIndex): Index of the selectable countries.
     """
     selected_countries = []
     while True:
         # Use the existing dynamic_country_selection function to get a country
         country = dynamic_country_selection(
-            "Select a country (press Enter with no input to finish):", countries, allow_empty=True
+            "Select a country (press Enter with no input to finish):", index, allow_empty=True
         )
         if not country:  # Exit if no country is selected
             break
@@ -116,42 +169,185 @@ def display_selected_cultural_dimensions(data, countries):
         except pyperclip.PyperclipException as e:
             console.print(f"[bold red]Failed to copy to clipboard: {e}[/bold red]")
 
-def extract_distance(distance_df):
-    """Extract the distance of a country pair through a selection menu."""
+def display_similar_countries(neighbour_index, title, index):
+    """
+    Show the most and least similar countries for a selected country.
+
+    Args:
+        neighbour_index (NeighbourIndex): Index over the variance-scaled scores of the dataset.
+        title (str): Title of the dataset.
+        index (EntityIndex): Index of the countries of `neighbour_index`.
+    """
+    country = dynamic_country_selection(f" {title} - Select a country", index)
+    k = ask_count("？ Number of countries to list", default=min(5, len(neighbour_index.labels) - 1), maximum=len(neighbour_index.labels) - 1)
+    radius = FloatPrompt.ask("？ Also list all countries within this distance (0 to skip)", default=0.0)
+    clear_terminal()
+
+    tables = [
+        ("Most similar", neighbour_index.most_similar(country, k)),
+        ("Least similar", neighbour_index.least_similar(country, k)),
+    ]
+    if radius > 0:
+        tables.append((f"Within {radius:.2f}", neighbour_index.within_radius(country, radius)))
+
+    renderables = []
+    for table_title, rows in tables:
+        table = Table(title=table_title, title_style="bold magenta")
+        table.add_column("Country", style="bold cyan", justify="left")
+        table.add_column("Distance", style="bold white", justify="right")
+        for name, distance in rows:
+            table.add_row(name, f"{distance:.2f}")
+        renderables.append(table)
+
+    console.print(
+        Panel(Align.center(Columns(renderables, equal=True, expand=True)), title=f"Similar countries for: {country}", padding=(1, 2))
+    )
+    console.print("[red]Press Enter to return to the submenu...")
+
+def display_bootstrap_intervals(data, title):
+    """
+    Bootstrap the distances, show neighbour stability and one country's intervals,
+    and export the intervals of all pairs to a CSV file.
+
+    Args:
+        data (list of dict): Records of the dataset.
+        title (str): Title of the dataset.
+    """
+    method = Prompt.ask("？ Resample", choices=list(BOOTSTRAP_METHODS), default="dimensions")
+    errors = FloatPrompt.ask("？ Standard error of the scores", default=5.0) if method != "dimensions" else None
+    replicates = ask_count("？ Number of replicates", default=BOOTSTRAP_REPLICATES)
+    try:
+        with console.status(f"[bold blue]Computing {replicates} replicate distance matrices..."):
+            result = bootstrap_distances(data, method=method, replicates=replicates, errors=errors)
+    except ValueError as e:
+        console.print(Panel(f"[bold red]Bootstrap failed: {e}[/bold red][red]\n\n Press Enter to return to the submenu...", border_style="red", padding=1))
+        return
+    country = dynamic_country_selection(f" {title} - Select a country for its intervals", entity_index(data, result.labels), allow_empty=True)
+    clear_terminal()
+
+    renderables = [dataframe_table(result.stability_dataframe().head(10), "Least stable neighbourhoods")]
+    if country:
+        pairs = result.to_dataframe()
+        pairs = pairs[(pairs["Country 1"] == country) | (pairs["Country 2"] == country)].nsmallest(10, "Distance")
+        pairs.insert(0, "Country", np.where(pairs["Country 1"] == country, pairs["Country 2"], pairs["Country 1"]))
+        renderables.append(dataframe_table(pairs.drop(columns=["Country 1", "Country 2"]), f"Nearest to {country} ({result.confidence:.0%} intervals)"))
+
+    filename = f"data/{title.replace(' ', '_').lower()}_distance_intervals.csv"
+    result.to_dataframe().to_csv(filename, index=False)
+    console.print(
+        Panel(Align.center(Columns(renderables, equal=True, expand=True)), title=f"Bootstrap ({method}, {replicates} replicates)", padding=(1, 2))
+    )
+    console.print(f"[bold green]Intervals of all pairs exported to {filename}")
+    console.print("[red]Press Enter to return to the submenu...")
+
+def render_jobs(jobs, progress, master_task, show):
+    """
+    Run independent visualization jobs concurrently and report their progress.
+
+    Args:
+        jobs (list of Job): Jobs to run.
+        progress (Progress): Rich progress display to update.
+        master_task (TaskID): Progress task counting finished jobs.
+        show (bool): Whether figures are displayed; runs the jobs in this process if set.
+    """
+    def on_start(job):
+        progress.log(f"[bold yellow]Starting {job.name} visualization...")
+
+    def on_complete(job, result, error, seconds):
+        if error:
+            progress.log(f"[bold red]{job.name} visualization failed: {error}")
+        else:
+            progress.log(f"[green]{job.name} visualization complete ({seconds:.1f}s).")
+        progress.update(master_task, advance=1, description=f"{job.name} done")
+
+    progress.update(master_task, description="Rendering")
+    run_jobs(jobs, max_workers=0 if show else None, on_start=on_start, on_complete=on_complete)
+    progress.update(master_task, description="complete")
+
+def dataframe_table(df, title):
+    """Render a DataFrame as a Rich table, formatting floats with two decimals."""
+    table = Table(title=title, title_style="bold magenta")
+    for column in df.columns:
+        numeric = df[column].dtype.kind in "fiu"
+        table.add_column(str(column), style="bold white" if numeric else "bold cyan", justify="right" if numeric else "left")
+    for row in df.itertuples(index=False):
+        table.add_row(*[f"{value:.2f}" if isinstance(value, float) else str(value) for value in row])
+    return table
+
+def ask_count(message, default, minimum=1, maximum=None):
+    """Prompt for an integer until it lies within [minimum, maximum]."""
+    while True:
+        value = IntPrompt.ask(message, default=default)
+        if value >= minimum and (maximum is None or value <= maximum):
+            return value
+        if maximum is None:
+            console.print(f"[red]Please enter a number of at least {minimum}.")
+        else:
+            console.print(f"[red]Please enter a number between {minimum} and {maximum}.")
+
+def display_extreme_pairs(distance_matrix, title, precomputed=None):
+    """
+    Show the closest and farthest country pairs and summary statistics of all distances.
+
+    Args:
+        distance_matrix (DistanceMatrix): Distance matrix of the dataset.
+        title (str): Title of the dataset.
+        precomputed (tuple): `find_extreme_pairs` result for DEFAULT_PAIRS pairs, used if that many are listed.
+    """
+    k = ask_count("？ Number of pairs to list", default=DEFAULT_PAIRS)
+    clear_terminal()
+    if precomputed is not None and k == DEFAULT_PAIRS:
+        closest, farthest, stats = precomputed
+    else:
+        closest, farthest, stats = find_extreme_pairs(distance_matrix, k=k)
+
+    tables = Columns(
+        [dataframe_table(closest, "Closest pairs"), dataframe_table(farthest, "Farthest pairs")],
+        equal=True,
+        expand=True,
+    )
+    summary = (
+        f"[bold green]Pairs: {stats['pairs']}   Mean: {stats['mean']:.2f}   Median: {stats['median']:.2f}   "
+        f"Std: {stats['std']:.2f}   Min: {stats['min']:.2f}   Max: {stats['max']:.2f}[/bold green]"
+    )
+    console.print(Panel(Align.center(tables), title=f"Distances for: {title}", padding=(1, 2)))
+    console.print(Panel(Align.center(summary), padding=1))
+    console.print("[red]Press Enter to return to the submenu...")
+
+def extract_distance(distance_matrix, index):
+    """Extract the distance of a country pair through a selection menu (`index` covers the matrix labels)."""
     console.print(
         Panel("[bold blue]Country Distance Extraction Menu[/bold blue]", border_style="blue", padding=(1, 2))
     )
-    countries = distance_df.index.tolist()
-    country1 = dynamic_country_selection("Select the first country", countries)
+    country1 = dynamic_country_selection("Select the first country", index)
     clear_terminal()
-    country2 = dynamic_country_selection(f"First Country: [blue] {country1} \n[bold cyan]Select the second country", countries)
-    distance = distance_df.loc[country1, country2]
+    country2 = dynamic_country_selection(f"First Country: [blue] {country1} \n[bold cyan]Select the second country", index)
+    distance = distance_matrix.distance(country1, country2)
     clear_terminal()
     console.print(
         Panel(f"[bold green]:sparkle: Distance between {country1} and {country2}: {distance:.2f} :sparkle: [/bold green][red]\n\n Press Enter to return to the submenu...", border_style="green", padding=1)
     )
-def select_country_pairs(distance_df):
+def select_country_pairs(index):
     """
     Allow the user to interactively select multiple country pairs.
     
     Args:
-        distance_df (pd.DataFrame): Distance matrix with country indices.
+        index (EntityIndex): Index of the selectable countries.
     
     Returns:
         list: List of selected country pairs.
     """
     highlighted_pairs = []
-    countries = distance_df.index.tolist()
 
     print("\nSelect country pairs to highlight (press Enter with no input to finish):")
     while True:
         # Select the first country
-        country1 = dynamic_country_selection("Select the first country", countries, allow_empty=True)
+        country1 = dynamic_country_selection("Select the first country", index, allow_empty=True)
         if not country1:
             break  # Exit if no input
 
         # Select the second country
-        country2 = dynamic_country_selection(f"First country: {country1}\nSelect the second country", countries, allow_empty=True)
+        country2 = dynamic_country_selection(f"First country: {country1}\nSelect the second country", index, allow_empty=True)
         if not country2:
             print("Second country not selected. Restarting pair selection.")
             continue
@@ -163,15 +359,80 @@ def select_country_pairs(distance_df):
 
     return highlighted_pairs
 
-def terminal_interface(data, title, show):
+def load_distances(data, missing, metric):
+    """Compute the distance matrix and the neighbour index of one metric."""
+    distance_matrix = calculate_distances(data, metric, missing=missing)
+    # The KD-tree reproduces the complete-dimension standardized euclidean distances only
+    if missing == "drop" and metric == "seuclidean":
+        return distance_matrix, NeighbourIndex.from_data(data)
+    return distance_matrix, MatrixNeighbours(distance_matrix)
+
+def precompute(data, missing, metric):
+    """
+    Start preparing the results of the menu actions in the background.
+
+    The tasks run in the order the menu needs them: the distance matrix and
+    neighbour index, the highlight countries, the extreme pairs, the network
+    layout, the cluster sweep and the MDS and t-SNE embeddings. The cluster
+    sweep and the embeddings land in their memo stores (the embeddings also on
+    disk, where the rendering workers find them), so the handlers only look
+    them up.
+
+    Args:
+        data (list or Dataset): Dataset records.
+        missing (str): Missing-value strategy of the distances.
+        metric (str): Distance metric, see `metrics.METRICS`.
+
+    Returns:
+        BackgroundTasks: The running tasks.
+    """
+    background = BackgroundTasks(name="precompute")
+    background.submit("distances", load_distances, data, missing, metric)
+
+    def matrix():
+        return background.result("distances")[0]
+
+    def highlights():
+        return entity_index(data, matrix().labels).resolve_all(DEFAULT_HIGHLIGHTS)
+
+    background.submit("highlights", highlights)
+    background.submit("extreme pairs", lambda: find_extreme_pairs(matrix(), k=DEFAULT_PAIRS))
+    background.submit("network layout", lambda: get_embedding(matrix(), "mds", subset=background.result("highlights")))
+    # No worker processes are started from the background thread
+    background.submit("cluster sweep", lambda: sweep_clusters(matrix(), max_workers=0, cancel=background.cancelled))
+    background.submit("MDS", lambda: get_embedding(matrix(), "mds"))
+    background.submit("t-SNE", lambda: get_embedding(matrix(), "tsne"))
+    return background
+
+def await_tasks(background, names, message):
+    """Wait for background tasks, showing a spinner only if they are not finished yet."""
+    if set(names) & set(background.pending()):
+        with console.status(f"[bold blue]{message}..."):
+            background.wait(names)
+
+def terminal_interface(data, title, show, missing="drop", metric=DEFAULT_METRIC):
     console = Console()
-    distance_df = calculate_scaled_euclidean_distances(data)
-    
-    if title == "Hofstede Data":
-        selected_countries = ["Germany", "Great Britain", "Indonesia", "Ireland", "Japan", "U.S.A."]
-    elif title == "Culture Map Data":
-        selected_countries = ["Germany", "UK", "Indonesia", "Ireland", "Japan", "United States"]
-        
+    while metric is not None:
+        # Each metric gets its own background tasks, prepared while the menu shows
+        background = precompute(data, missing, metric)
+        try:
+            metric = submenu(data, title, show, missing, metric, background, console)
+        finally:
+            # Also reached on KeyboardInterrupt, which leaves the running task behind
+            background.cancel()
+        # The running task finishes before the next one starts, so they never compete
+        with console.status("[bold blue]Stopping background work..."):
+            background.join()
+    clear_terminal()
+
+def submenu(data, dataset_title, show, missing, metric, background, console):
+    """
+    Run the submenu of one dataset and metric until the user leaves it.
+
+    Returns:
+        str: The metric to continue with, or None to return to the main menu.
+    """
+    title = metric_title(dataset_title, metric)
     while True:
         clear_terminal()
 
@@ -179,40 +440,81 @@ def terminal_interface(data, title, show):
         entries= [
             "1. [blue]Extract Distance",
             "2. [blue]Visualize Network",
-            "3. [blue]Visualize K-Means Clustering",
-            "4. [blue]Export Distances to CSV",
+            "3. [blue]Visualize Clustering (best k)",
+            "4. [blue]Export Distances (CSV, NPY, NPZ, raw, Parquet)",
             "5. [blue]Find Maximum and Minimum Distances",
             "6. [blue]Find Max/Min Distances for a Specific Country",
             "7. [blue]One Country's Distances: Box Plot with Highlighted Distances",
             "8. [blue]All Distances: Box Plot with Highlighted Distances",
             "9. [blue]Display cultural dimensions",
-            f"10. [blue]Show Cultural Dimensions of {title}",
-            "11. [red] Exit"
+            "10. [blue]Find Most/Least Similar Countries",
+            f"11. [blue]Show Cultural Dimensions of {title}",
+            f"12. [blue]Change Distance Metric ({metric_label(metric)})",
+            "13. [blue]Distance Confidence Intervals (bootstrap)",
+            "14. [red] Exit"
             ]
         user_renderables = [Panel(entry) for entry in entries]
 
         # Render the main menu
         menu_columns = Columns(user_renderables, equal=True, expand=True)
-        menu_panel = Panel(Align.center(menu_columns), title=f"[bold blue]Submenu: {title}", padding=(1, 2))
+        pending = background.pending()
+        status = f"[dim]Preparing in the background: {', '.join(pending)}" if pending else None
+        menu_panel = Panel(Align.center(menu_columns), title=f"[bold blue]Submenu: {title}", subtitle=status, padding=(1, 2))
 
         console.print(menu_panel)
-        choice = Prompt.ask("？ Select an option [green](1-10)").strip()
+        choice = Prompt.ask("？ Select an option [green](1-14)").strip()
+
+        if choice.isdigit() and 1 <= int(choice) <= 10:
+            # These actions work on the distance matrix, which is usually ready by now
+            await_tasks(background, ["distances", "highlights"], f"Computing {metric_label(metric)} distances")
+            try:
+                distance_matrix, neighbour_index = background.result("distances")
+                selected_countries = background.result("highlights")
+                # Built by the highlights task, so this is a lookup
+                index = entity_index(data, distance_matrix.labels)
+            except Exception as e:
+                clear_terminal()
+                console.print(
+                    Panel(f"[bold red]Could not compute the distances: {e}[/bold red][red]\n\n Press Enter to return to the submenu...", border_style="red", padding=1)
+                )
+                input()
+                continue
 
         if choice == "1":
             clear_terminal()
-            extract_distance(distance_df)
+            extract_distance(distance_matrix, index)
             input()
         elif choice == "2":
             clear_terminal()
-            visualize_country_network(distance_df, selected_countries, title=f"{title} - Network Graph", show=show)
+            mode = Prompt.ask("？ Select the edges to draw", choices=list(NETWORK_MODES), default="complete")
+            if mode == "complete":
+                # Every pair is drawn, so keep to the selected countries
+                await_tasks(background, ["network layout"], "Laying out the network")
+                visualize_country_network(distance_matrix, selected_countries, title=f"{title} - Network Graph", show=show)
+            else:
+                k = ask_count("？ Number of neighbours", default=min(3, distance_matrix.n - 1), maximum=distance_matrix.n - 1) if mode == "knn" else 3
+                threshold = FloatPrompt.ask("？ Maximum distance", default=round(float(np.percentile(distance_matrix.condensed, 10)), 2)) if mode == "threshold" else None
+                visualize_country_network(distance_matrix, title=f"{title} - Network Graph ({mode})", show=show, mode=mode, k=k, threshold=threshold)
             console.print(
                 Panel(f"[bold green]:sparkle: Graph generated. :sparkle: [/bold green][red]\n\n Press Enter to return to the submenu...", border_style="green", padding=1)
             )
             input()
         elif choice == "3":
             clear_terminal()
+            # The rendering workers read the embeddings cached by the background tasks
+            await_tasks(background, ["cluster sweep", "MDS", "t-SNE"], "Sweeping cluster counts and fitting embeddings")
+            with console.status("[bold blue]Sweeping cluster counts..."):
+                sweep = sweep_clusters(distance_matrix)
+            console.print(dataframe_table(sweep.to_dataframe().reset_index(), "Silhouette Scores"))
+            console.print(f"[bold green]Best clustering: {sweep.best_method}, k = {sweep.best_k} (silhouette {sweep.best_score:.3f})")
+            clusters = {"cluster_labels": sweep.best_labels, "show": show}
+            label = clustering_label(sweep.best_method, sweep.best_k)
+            jobs = [
+                Job("t-SNE", plot_clusters_with_highlight_t_SNE, (distance_matrix, selected_countries), {"title": f"{title} - {label} Clustering (t-SNE)", **clusters}),
+                Job("MDS", plot_clusters_with_highlight_MDS, (distance_matrix, selected_countries), {"title": f"{title} - {label} Clustering (MDS)", **clusters}),
+            ]
             progress = Progress(auto_refresh=True)
-            master_task = progress.add_task("overall", total=3)  # Two tasks: t-SNE and MDS
+            master_task = progress.add_task("overall", total=len(jobs))
 
             progress.console.print(
                 Panel(
@@ -222,48 +524,35 @@ def terminal_interface(data, title, show):
             )
 
             with progress:
-                # t-SNE Visualization Task
-                progress.log("[bold yellow]Starting t-SNE visualization...")
-                progress.update(master_task, advance=1, description="Running t-SNE")
-                plot_kmeans_with_highlight_t_SNE(distance_df, selected_countries, title=f"{title} - K-Means Clustering (t-SNE)", show=show)
-                sleep(1)  # Simulating progress
-                progress.log("[green]t-SNE visualization complete.")
-
-                # MDS Visualization Task
-                progress.log("[bold yellow]Starting MDS visualization...")
-                progress.update(master_task, advance=1, description="Running MDS")
-                plot_kmeans_with_highlight_MDS(distance_df, selected_countries, title=f"{title} - K-Means Clustering (MDS)",show=show)
-                sleep(1)  # Simulating progress
-                progress.log("[green]MDS visualization complete.")
-                progress.update(master_task, advance=1, description="complete")
+                render_jobs(jobs, progress, master_task, show)
             progress.console.print(
                 Panel("[bold green]:sparkle: Cluster visualization complete! :sparkle: [red]\n\n Press Enter to return to the submenu...", border_style="green", padding=1)
             )
             input()
         elif choice == "4":
             clear_terminal()
-            filename = export_distances_to_csv(distance_df, title)
+            fmt = Prompt.ask("？ Select an export format", choices=list(EXPORT_FORMATS), default="csv")
+            filename = export_distances(distance_matrix, title, fmt=fmt)
             console.print(
                 Panel(f"[bold green]:sparkle: Distances successfully exported to {filename} :sparkle: [/bold green][red]\n\n Press Enter to return to the submenu...", border_style="green", padding=1)
             )
             input()
         elif choice == "5":
             clear_terminal()
-            max, min, avg = find_max_min_distances(distance_df)
-            panel = Panel(Align.center(f"[bold green]:sparkle: {max} :sparkle:\n:sparkle: {min} :sparkle:\n:sparkle: {avg} :sparkle:[/bold green][red]\n\n Press Enter to return to the submenu..."), title=f"Distances for: {title}", padding=(1, 2))
-            console.print(panel)
+            await_tasks(background, ["extreme pairs"], "Finding extreme pairs")
+            display_extreme_pairs(distance_matrix, title, background.result("extreme pairs") if background.done("extreme pairs") else None)
             input()
         elif choice == "6":
             clear_terminal()
-            country = dynamic_country_selection(f" {title} - Select a country", distance_df.index.tolist())
+            country = dynamic_country_selection(f" {title} - Select a country", index)
             clear_terminal()
-            max, min, avg= find_max_min_distances_for_country(title, distance_df, country)
+            max, min, avg= find_max_min_distances_for_country(title, distance_matrix, country)
             panel = Panel(Align.center(f"[bold green]:sparkle: {max} :sparkle:\n:sparkle: {min} :sparkle:\n:sparkle: {avg} :sparkle:[/bold green][red]\n\n Press Enter to return to the submenu..."), title=f"Distances for: {country}", padding=(1, 2))
             console.print(panel)
             input()
         elif choice == "7":
             clear_terminal()
-            country = dynamic_country_selection(f" {title} - Select a country", distance_df.index.tolist())
+            country = dynamic_country_selection(f" {title} - Select a country", index)
             if not country:
                 print("No country selected. Returning to submenu.")
                 continue
@@ -271,12 +560,12 @@ def terminal_interface(data, title, show):
             highlight_countries = []
             print("\nSelect countries to highlight (press Enter with no input to finish):")
             while True:
-                highlight = dynamic_country_selection("Select a country to highlight", distance_df.index.tolist(), allow_empty=True)
+                highlight = dynamic_country_selection("Select a country to highlight", index, allow_empty=True)
                 if not highlight:
                     break
                 highlight_countries.append(highlight)
                 print(f"Added {highlight} to highlights.")
-            plot_country_distance_boxplot_with_highlight(distance_df, country, highlight_countries, title=title,show=show)
+            plot_country_distance_boxplot_with_highlight(distance_matrix, country, highlight_countries, title=title,show=show)
             clear_terminal()
             console.print(
                 Panel(f"[bold green]:sparkle: Box plot generated. :sparkle: [/bold green][red]\n\n Press Enter to return to the submenu...", border_style="green", padding=1)
@@ -285,30 +574,42 @@ def terminal_interface(data, title, show):
         elif choice == "8":
             clear_terminal()
             print("\nInteractive Box Plot with Highlighted Pairs")
-            
+        
             # Allow interactive selection of pairs
-            highlighted_pairs = select_country_pairs(distance_df)
-            
+            highlighted_pairs = select_country_pairs(index)
+        
             if not highlighted_pairs:
                 print("No pairs selected. Generating boxplot without highlights...")
-            
+        
             # Plot the boxplot with or without highlighted pairs
             plot_all_distance_boxplot_with_highlight(
-                distance_df, 
+                distance_matrix, 
                 highlighted_pairs=highlighted_pairs, 
                 title=f"{title} - Boxplot with Highlights", 
                 show=show
             )
-            
+        
             console.print(
                 Panel(f"[bold green]:sparkle: Box plot generated. :sparkle: [/bold green][red]\n\nPress Enter to return to the submenu...", border_style="green", padding=1)
             )
             input()
         elif choice == "9":
-            countries = distance_df.index.tolist()
-            display_selected_cultural_dimensions(data, countries)
+            display_selected_cultural_dimensions(data, index)
         elif choice == "10":
+            clear_terminal()
+            display_similar_countries(neighbour_index, title, entity_index(data, neighbour_index.labels))
+            input()
+        elif choice == "11":
             break
+        elif choice == "12":
+            clear_terminal()
+            choices = [name for name in METRICS if missing == "drop" or name == "seuclidean"]
+            return Prompt.ask("？ Select a distance metric", choices=choices, default=metric)
+        elif choice == "13":
+            clear_terminal()
+            # The intervals are those of the standardized euclidean distances
+            display_bootstrap_intervals(data, dataset_title)
+            input()
         else:
             break
-    clear_terminal()
+
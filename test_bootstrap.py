@@ -0,0 +1,62 @@
+# test_bootstrap.py
+# Regression test of the batched bootstrap against one distance computation per replicate.
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist
+
+from bootstrap import _perturbed_scores, bootstrap_distances, dimension_weights
+
+
+def synthetic_records(n_entities=30, n_dimensions=6, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 101, size=(n_entities, n_dimensions))
+    return [
+        {"name": f"Entity {i}", "scores": {f"dim{k}": int(value) for k, value in enumerate(row)}}
+        for i, row in enumerate(scores)
+    ]
+
+
+def loop_replicates(records, method, replicates, errors, random_state):
+    """Distances of every replicate, recomputed from scratch one replicate at a time."""
+    scores = np.array([list(item["scores"].values()) for item in records], dtype=float)
+    d = scores.shape[1]
+    weights = np.ones((replicates, d)) if method == "perturb" else dimension_weights(d, replicates, random_state)
+    stacked = []
+    for b in range(replicates):
+        sample = scores if method == "dimensions" else _perturbed_scores(scores, errors, b, b + 1, random_state)[0]
+        standardized = sample / sample.std(axis=0, ddof=1)
+        # A dimension drawn w times contributes w times its squared difference
+        stacked.append(pdist(standardized * np.sqrt(weights[b]), metric="euclidean"))
+    return np.array(stacked)
+
+
+@pytest.mark.parametrize("method", ["dimensions", "perturb", "both"])
+def test_intervals_match_loop(method):
+    records = synthetic_records()
+    replicates, errors, confidence = 40, 5.0, 0.9
+    # Small batches and memory budget split the work into several batches and row blocks
+    result = bootstrap_distances(
+        records, method=method, replicates=replicates, errors=errors, confidence=confidence,
+        batch=7, memory_bytes=replicates * len(records) * 8 * 4, max_workers=0,
+    )
+    stacked = loop_replicates(records, method, replicates, errors, random_state=42)
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = np.quantile(stacked, [alpha, 1.0 - alpha], axis=0)
+
+    np.testing.assert_allclose(result.lower.condensed, lower, rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(result.upper.condensed, upper, rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(result.spread.condensed, stacked.std(axis=0, ddof=1), rtol=1e-8, atol=1e-10)
+
+
+def test_results_do_not_depend_on_batch_size():
+    records = synthetic_records()
+    first = bootstrap_distances(records, method="both", replicates=20, errors=3.0, batch=3, max_workers=0)
+    second = bootstrap_distances(records, method="both", replicates=20, errors=3.0, batch=20, max_workers=0)
+    np.testing.assert_allclose(first.lower.condensed, second.lower.condensed)
+    np.testing.assert_allclose(first.neighbour_stability, second.neighbour_stability)
+
+
+@pytest.mark.parametrize("arguments", [{"replicates": 0}, {"replicates": -5}, {"confidence": 0.0}, {"confidence": 1.0}, {"k": 0}])
+def test_invalid_arguments(arguments):
+    with pytest.raises(ValueError):
+        bootstrap_distances(synthetic_records(), **arguments)
@@ -0,0 +1,80 @@
+# test_cache.py
+# Content addressing, storage and pruning of the on-disk distance cache.
+import json
+import os
+
+import numpy as np
+import pytest
+
+from cache import (
+    LRUMemo,
+    distance_cache_key,
+    evict_cache_entries,
+    load_cached_distances,
+    prune_stale_entries,
+    store_cached_distances,
+)
+
+RECORDS = [
+    {"name": "A", "scores": {"pdi": 10, "idv": 20}},
+    {"name": "B", "scores": {"pdi": 30, "idv": None}},
+]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A working directory with one source file under data/, as the cache expects."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "source.json").write_text(json.dumps(RECORDS))
+    return tmp_path
+
+
+def test_key_depends_on_metric_missing_and_data():
+    key = distance_cache_key(RECORDS, metric="seuclidean", missing="drop")
+    assert key == distance_cache_key(RECORDS, metric="seuclidean", missing="drop")
+    assert key != distance_cache_key(RECORDS, metric="cosine", missing="drop")
+    assert key != distance_cache_key(RECORDS, metric="seuclidean", missing="pairwise")
+    changed = [dict(RECORDS[0], scores={"pdi": 11, "idv": 20}), RECORDS[1]]
+    assert key != distance_cache_key(changed, metric="seuclidean", missing="drop")
+
+
+def test_store_and_load_round_trip(workspace):
+    condensed = np.array([0.5, 1.5, 2.5])
+    store_cached_distances("key", condensed, ["a", "b", "c"], cache_dir=workspace / "cache")
+    loaded, labels = load_cached_distances("key", cache_dir=workspace / "cache")
+    np.testing.assert_array_equal(loaded, condensed)
+    assert labels == ["a", "b", "c"]
+    assert load_cached_distances("other", cache_dir=workspace / "cache") is None
+
+
+def test_prune_removes_entries_of_changed_sources(workspace):
+    cache_dir = workspace / "cache"
+    store_cached_distances("key", np.ones(3), ["a", "b", "c"], cache_dir=cache_dir)
+    assert prune_stale_entries(cache_dir) == 0
+
+    source = workspace / "data" / "source.json"
+    source.write_text(json.dumps(RECORDS + [{"name": "C", "scores": {}}]))
+    assert prune_stale_entries(cache_dir) == 1
+    assert load_cached_distances("key", cache_dir=cache_dir) is None
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    for age, name in enumerate(["newest", "middle", "oldest"]):
+        path = tmp_path / f"{name}.npz"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+
+    evict_cache_entries(tmp_path, max_bytes=200)
+
+    assert sorted(path.stem for path in tmp_path.glob("*.npz")) == ["middle", "newest"]
+
+
+def test_lru_memo_keeps_recent_entries():
+    memo = LRUMemo(max_entries=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    memo.get("a")
+    memo.put("c", 3)
+    assert "a" in memo and "c" in memo and "b" not in memo
+    assert len(memo) == 2
@@ -0,0 +1,59 @@
+# test_clustering.py
+# Clustering on precomputed distances against scikit-learn and brute force.
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist, squareform
+from sklearn.metrics import silhouette_score
+
+from clustering import k_medoids, silhouette_scores
+from distance_matrix import DistanceMatrix
+
+
+def clustered_matrix(n=45, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.random((3, 4)) * 10
+    points = centres[np.arange(n) % 3] + rng.normal(size=(n, 4))
+    return DistanceMatrix(pdist(points), [f"Entity {i}" for i in range(n)])
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 1024])
+def test_silhouette_matches_sklearn(chunk_rows):
+    matrix = clustered_matrix()
+    square = squareform(matrix.condensed)
+    rng = np.random.default_rng(1)
+    labelings = [np.arange(matrix.n) % 3, rng.integers(0, 5, size=matrix.n), np.arange(matrix.n) % 2]
+    # An entity alone in its cluster scores 0
+    labelings.append(np.where(np.arange(matrix.n) == 0, 9, np.arange(matrix.n) % 2))
+
+    scores = silhouette_scores(matrix, labelings, chunk_rows=chunk_rows)
+
+    expected = [silhouette_score(square, labels, metric="precomputed") for labels in labelings]
+    np.testing.assert_allclose(scores, expected, rtol=1e-10)
+
+
+def test_silhouette_of_single_cluster_is_zero():
+    matrix = clustered_matrix(n=10)
+    assert silhouette_scores(matrix, [np.zeros(10, dtype=int)])[0] == 0.0
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 5, 1024])
+def test_k_medoids_assigns_to_nearest_medoid(chunk_rows):
+    matrix = clustered_matrix()
+    square = squareform(matrix.condensed)
+    labels, medoids = k_medoids(matrix, 3, chunk_rows=chunk_rows)
+
+    assert len(set(medoids.tolist())) == 3
+    np.testing.assert_array_equal(labels, np.argmin(square[:, medoids], axis=1))
+    # Every medoid minimizes the distance sum within its own cluster
+    for cluster, medoid in enumerate(medoids):
+        members = np.flatnonzero(labels == cluster)
+        within = square[np.ix_(members, members)].sum(axis=1)
+        assert square[medoid, members].sum() == pytest.approx(within.min())
+
+
+def test_k_medoids_ignores_chunking():
+    matrix = clustered_matrix()
+    labels, medoids = k_medoids(matrix, 4, chunk_rows=1)
+    chunked_labels, chunked_medoids = k_medoids(matrix, 4, chunk_rows=1024)
+    np.testing.assert_array_equal(labels, chunked_labels)
+    np.testing.assert_array_equal(medoids, chunked_medoids)
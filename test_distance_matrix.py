@@ -0,0 +1,50 @@
+# test_distance_matrix.py
+# Condensed indexing of DistanceMatrix against scipy's squareform layout.
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist, squareform
+
+from distance_matrix import DistanceMatrix
+
+
+def random_matrix(n, seed=0):
+    points = np.random.default_rng(seed).random((n, 3))
+    return DistanceMatrix(pdist(points), [f"Entity {i}" for i in range(n)])
+
+
+@pytest.mark.parametrize("n", [2, 3, 7, 50, 1001])
+def test_pair_at_matches_squareform(n):
+    matrix = random_matrix(n)
+    square = squareform(matrix.condensed)
+    keys = np.arange(matrix.condensed.size)
+    i, j = matrix.pair_at(keys)
+
+    expected_i, expected_j = np.triu_indices(n, k=1)
+    np.testing.assert_array_equal(i, expected_i)
+    np.testing.assert_array_equal(j, expected_j)
+    np.testing.assert_array_equal(square[i, j], matrix.condensed)
+    np.testing.assert_array_equal(matrix.condensed_index(i, j), keys)
+    # The index is symmetric in i and j
+    np.testing.assert_array_equal(matrix.condensed_index(j, i), keys)
+
+
+def test_take_row_and_submatrix_match_square():
+    matrix = random_matrix(30)
+    square = squareform(matrix.condensed)
+    rng = np.random.default_rng(1)
+    i, j = rng.integers(0, 30, size=(2, 500))
+    np.testing.assert_array_equal(matrix.take(i, j), square[i, j])
+    np.testing.assert_array_equal(matrix.row("Entity 4"), square[4])
+
+    order = [7, 2, 29, 0, 13]
+    subset = matrix.submatrix([matrix.labels[k] for k in order])
+    np.testing.assert_array_equal(squareform(subset.condensed), square[np.ix_(order, order)])
+    assert matrix.distance("Entity 3", "Entity 3") == 0.0
+    assert matrix.distance("Entity 3", "Entity 8") == square[3, 8]
+
+
+def test_rejects_mismatched_labels():
+    with pytest.raises(ValueError):
+        DistanceMatrix(np.zeros(3), ["a", "b"])
+    with pytest.raises(ValueError):
+        DistanceMatrix(np.zeros(3), ["a", "b", "a"])
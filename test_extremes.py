@@ -0,0 +1,36 @@
+# test_extremes.py
+# Chunked extreme pairs and statistics against sorting the whole condensed vector.
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist
+
+from distance_matrix import DistanceMatrix
+from functions import find_extreme_pairs
+
+
+@pytest.mark.parametrize("n, chunk_size", [(40, 7), (40, 10_000_000), (41, 100)])
+def test_matches_full_sort(n, chunk_size):
+    points = np.random.default_rng(n).random((n, 4))
+    matrix = DistanceMatrix(pdist(points), [f"Entity {i}" for i in range(n)])
+    condensed = matrix.condensed
+    k = 6
+
+    closest, farthest, stats = find_extreme_pairs(matrix, k=k, chunk_size=chunk_size)
+
+    np.testing.assert_allclose(closest["Distance"], np.sort(condensed)[:k])
+    np.testing.assert_allclose(farthest["Distance"], np.sort(condensed)[::-1][:k])
+    first = closest.iloc[0]
+    assert matrix.distance(first["Country 1"], first["Country 2"]) == pytest.approx(first["Distance"])
+    assert stats["pairs"] == condensed.size
+    assert stats["mean"] == pytest.approx(condensed.mean())
+    assert stats["median"] == pytest.approx(np.median(condensed))
+    assert stats["std"] == pytest.approx(condensed.std())
+    assert (stats["min"], stats["max"]) == (condensed.min(), condensed.max())
+
+
+def test_k_is_capped_and_validated():
+    matrix = DistanceMatrix(np.array([1.0, 2.0, 3.0]), ["a", "b", "c"])
+    closest, farthest, _ = find_extreme_pairs(matrix, k=10)
+    assert len(closest) == len(farthest) == 3
+    with pytest.raises(ValueError):
+        find_extreme_pairs(matrix, k=0)
@@ -0,0 +1,58 @@
+# test_masked.py
+# Pairwise-complete distances of masked.py against a loop over the pairs.
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist
+
+from masked import masked_variances, pairwise_complete_seuclidean
+
+
+def scores_with_gaps(n=25, d=6, missing=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 101, size=(n, d)).astype(float)
+    scores[rng.random(scores.shape) < missing] = np.nan
+    return scores
+
+
+def loop_distances(scores, variances):
+    """Standardized euclidean distance of every pair over the dimensions both have, rescaled to all dimensions."""
+    usable = np.isfinite(variances) & (variances > 0)
+    total = int(usable.sum())
+    n = scores.shape[0]
+    distances = []
+    for i in range(n):
+        for j in range(i + 1, n):
+            shared = usable & ~np.isnan(scores[i]) & ~np.isnan(scores[j])
+            if not shared.any():
+                distances.append(np.nan)
+                continue
+            squared = ((scores[i, shared] - scores[j, shared]) ** 2 / variances[shared]).sum()
+            distances.append(np.sqrt(squared * total / shared.sum()))
+    return np.array(distances)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 4, 2048])
+def test_matches_loop(chunk_rows):
+    scores = scores_with_gaps()
+    variances = masked_variances(scores)
+    result = pairwise_complete_seuclidean(scores, variances, chunk_rows=chunk_rows)
+    np.testing.assert_allclose(result, loop_distances(scores, variances), rtol=1e-10, equal_nan=True)
+
+
+def test_complete_data_matches_pdist():
+    scores = scores_with_gaps(missing=0.0)
+    result = pairwise_complete_seuclidean(scores)
+    np.testing.assert_allclose(result, pdist(scores, "seuclidean", V=scores.var(axis=0, ddof=1)), rtol=1e-10)
+
+
+def test_pairs_without_shared_dimension_are_nan():
+    scores = np.array([[1.0, np.nan], [np.nan, 2.0], [3.0, 4.0], [5.0, 1.0]])
+    result = pairwise_complete_seuclidean(scores)
+    # Pair (0, 1) is the first entry of the condensed vector
+    assert np.isnan(result[0])
+    assert np.isfinite(result[1:]).all()
+
+
+def test_masked_variances_ignore_missing():
+    scores = scores_with_gaps()
+    np.testing.assert_allclose(masked_variances(scores), np.nanvar(scores, axis=0, ddof=1))
@@ -0,0 +1,20 @@
+# test_tiled.py
+# The tiled out-of-core engine against a single pdist call.
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist
+
+from tiled import compute_condensed_tiled
+
+
+@pytest.mark.parametrize("n, tile_size, max_workers", [(37, 8, 1), (37, 37, 1), (64, 10, 2), (5, 100, 1)])
+def test_tiled_matches_pdist(tmp_path, n, tile_size, max_workers):
+    rng = np.random.default_rng(n)
+    scores = rng.integers(0, 101, size=(n, 6)).astype(float)
+    variances = scores.var(axis=0, ddof=1)
+    labels = [f"Entity {i}" for i in range(n)]
+
+    result = compute_condensed_tiled(scores, variances, labels, tmp_path / "distances", tile_size=tile_size, max_workers=max_workers)
+
+    assert result.labels == labels
+    np.testing.assert_allclose(result.condensed, pdist(scores, "seuclidean", V=variances), rtol=1e-12, atol=1e-12)
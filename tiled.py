@@ -0,0 +1,109 @@
+# tiled.py
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from distance_io import load_raw, write_raw_header
+
+DEFAULT_TILE_SIZE = 1024
+
+# Per-process state, set once by _init_worker so tasks only carry tile offsets
+_worker_state = {}
+
+
+def _init_worker(scores, variances, path, n):
+    _worker_state["scores"] = scores
+    _worker_state["variances"] = variances
+    _worker_state["output"] = np.memmap(path, dtype="<f8", mode="r+", shape=(n * (n - 1) // 2,))
+    _worker_state["n"] = n
+
+
+def _compute_tile(r0, c0, tile_size):
+    """
+    Compute one tile of the upper triangle and write it into the condensed output.
+
+    `cdist` uses the same kernel as `pdist`, so every value is bitwise identical
+    to the single-call `pdist(..., "seuclidean", V=variances)` result.
+
+    Returns:
+        int: Number of pairs written.
+    """
+    from scipy.spatial.distance import cdist
+
+    scores = _worker_state["scores"]
+    output = _worker_state["output"]
+    n = _worker_state["n"]
+    r1 = min(r0 + tile_size, n)
+    c1 = min(c0 + tile_size, n)
+    tile = cdist(scores[r0:r1], scores[c0:c1], metric="seuclidean", V=_worker_state["variances"])
+
+    written = 0
+    for r in range(r0, r1):
+        start = max(c0, r + 1)
+        if start >= c1:
+            continue
+        # Within one row, the condensed layout stores columns contiguously
+        offset = n * r - r * (r + 1) // 2 + (start - r - 1)
+        output[offset:offset + (c1 - start)] = tile[r - r0, start - c0:]
+        written += c1 - start
+    output.flush()
+    return written
+
+
+def compute_condensed_tiled(scores, variances, labels, path, tile_size=DEFAULT_TILE_SIZE, max_workers=None, progress=None):
+    """
+    Compute variance-scaled euclidean distances tile by tile into a memory-mapped file.
+
+    The entity set is split into row and column blocks of `tile_size`. Tiles on or
+    above the diagonal are computed in a process pool and written straight into a
+    raw condensed `.f64` file (see `distance_io.save_raw`), so neither the dense
+    matrix nor the full condensed vector has to fit into memory.
+
+    Args:
+        scores (np.ndarray): Score matrix of shape (n_entities, n_dimensions).
+        variances (np.ndarray): Per-dimension variances used for scaling.
+        labels (list of str): Entity names in row order.
+        path (str or Path): Output path of the raw condensed file.
+        tile_size (int): Number of entities per row/column block.
+        max_workers (int): Number of worker processes. 1 computes in the current process.
+        progress (callable): Optional callback receiving the number of pairs written per finished tile.
+
+    Returns:
+        DistanceMatrix: Distance matrix backed by the memory-mapped output file.
+    """
+    scores = np.ascontiguousarray(scores, dtype=np.float64)
+    variances = np.ascontiguousarray(variances, dtype=np.float64)
+    n = scores.shape[0]
+    path = Path(path).with_suffix(".f64")
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Allocate the output file up front; workers open it in place
+    with open(path, "wb") as f:
+        f.truncate(n * (n - 1) // 2 * 8)
+    write_raw_header(path, labels)
+
+    blocks = range(0, n, tile_size)
+    tiles = [(r0, c0) for r0 in blocks for c0 in blocks if c0 >= r0]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers == 1 or len(tiles) == 1:
+        _init_worker(scores, variances, path, n)
+        for r0, c0 in tiles:
+            written = _compute_tile(r0, c0, tile_size)
+            if progress:
+                progress(written)
+        _worker_state.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(scores, variances, path, n)
+        ) as executor:
+            futures = [executor.submit(_compute_tile, r0, c0, tile_size) for r0, c0 in tiles]
+            for future in as_completed(futures):
+                written = future.result()
+                if progress:
+                    progress(written)
+
+    return load_raw(path)